@@ -41,6 +41,9 @@ from ohsome_quality_analyst.definitions import (
     get_report_names,
 )
 from ohsome_quality_analyst.geodatabase import client as db_client
+from ohsome_quality_analyst.ohsome import cache as ohsome_cache
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.ohsome import series as ohsome_series
 from ohsome_quality_analyst.utils.exceptions import (
     HexCellsNotFoundError,
     LayerDataSchemaError,
@@ -105,6 +108,16 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup_event():
+    await oqt.startup()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await oqt.shutdown()
+
+
 class CustomJSONResponse(JSONResponse):
     def render(self, content):
         return json.dumps(content, default=json_serialize).encode()
@@ -328,6 +341,25 @@ async def list_fid_fields():
     return response
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Get runtime statistics of the worker process (E.g. connection pools)."""
+    response = empty_api_response()
+    response["result"] = {
+        "ohsome_api_pool": ohsome_client.get_pool_stats(),
+        "ohsome_api_cache": ohsome_cache.get_cache().get_stats(),
+        "ohsome_api_single_flight": ohsome_client.single_flight.get_stats(),
+        "ohsome_api_concurrency": ohsome_client.get_controller().get_stats(),
+        "geodatabase_pool": db_client.get_pool_stats(),
+        "geodatabase_results_cache": db_client.get_results_cache_stats(),
+        "results_revalidation": oqt.revalidator.get_stats(),
+    }
+    series_store = ohsome_series.get_store()
+    if series_store is not None:
+        response["result"]["ohsome_api_series"] = series_store.get_stats()
+    return response
+
+
 def remove_result_item_from_properties(
     geojson_object: Union[Feature, FeatureCollection], key: str, flatten: bool
 ) -> None:
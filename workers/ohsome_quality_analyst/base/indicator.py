@@ -1,11 +1,12 @@
 """The base classes on which every indicator class is based on."""
 
+import asyncio
 import json
 from abc import ABCMeta, abstractmethod
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from io import StringIO
-from typing import Dict, Literal, Optional
+from typing import TYPE_CHECKING, Dict, Literal, Optional
 
 import matplotlib.pyplot as plt
 from dacite import from_dict
@@ -19,6 +20,9 @@ from ohsome_quality_analyst.html_templates.template import (
 )
 from ohsome_quality_analyst.utils.helper import flatten_dict, json_serialize
 
+if TYPE_CHECKING:
+    from ohsome_quality_analyst.base.requirement import Requirement
+
 
 @dataclass
 class Metadata:
@@ -46,6 +50,12 @@ class Result:
             result.
         description (str): The result description.
         svg (str): Figure of the result as SVG
+        stale (bool): True if the result has been computed on outdated OSM data. Only
+            results fetched from the database can be stale. They are recomputed in the
+            background.
+        timestamp_snapshot (datetime): Latest timestamp of the ohsome API data when
+            the result has been computed. Used to detect stale results. Not part of
+            the GeoJSON representation.
     """
 
     description: str
@@ -55,6 +65,8 @@ class Result:
     timestamp_osm: Optional[datetime] = None
     value: Optional[float] = None
     class_: Optional[Literal[1, 2, 3, 4, 5]] = None
+    stale: bool = False
+    timestamp_snapshot: Optional[datetime] = None
 
     @property
     def label(self) -> Literal["green", "yellow", "red", "undefined"]:
@@ -80,6 +92,8 @@ class BaseIndicator(metaclass=ABCMeta):
             svg=self._get_default_figure(),
             html="",
         )
+        # Data declared by `requirements`. Set by `oqt.fetch_inputs` or on demand.
+        self.inputs: Optional[dict] = None
 
     def as_feature(self, flatten: bool = False, include_data: bool = False) -> Feature:
         """Return a GeoJSON Feature object.
@@ -94,6 +108,7 @@ class BaseIndicator(metaclass=ABCMeta):
         result = asdict(self.result)  # only attributes, no properties
         result["label"] = self.result.label  # label is a property
         result["class"] = result.pop("class_")
+        result.pop("timestamp_snapshot")
         properties = {
             "metadata": {
                 "name": self.metadata.name,
@@ -138,6 +153,7 @@ class BaseIndicator(metaclass=ABCMeta):
         data.pop("metadata")
         data.pop("layer")
         data.pop("feature")
+        data.pop("inputs")
         return json.loads(json.dumps(data, default=json_serialize).encode())
 
     @classmethod
@@ -151,6 +167,27 @@ class BaseIndicator(metaclass=ABCMeta):
         """
         return get_attribution(["OSM"])
 
+    async def requirements(self) -> Dict[str, "Requirement"]:
+        """Declare data needed for preprocessing by name.
+
+        Requirements of all indicators of a report are fetched at once. Identical
+        requirements are fetched only once (See `oqt.fetch_inputs`).
+
+        This method should be overwritten by the Sub Class. Defaults to no
+        requirements (All data is fetched by `preprocess` itself).
+        """
+        return {}
+
+    async def get_inputs(self) -> dict:
+        """Get data declared by `requirements`. Fetch data if not done yet."""
+        if self.inputs is None:
+            requirements = await self.requirements()
+            values = await asyncio.gather(
+                *(r.fetch(self.feature) for r in requirements.values())
+            )
+            self.inputs = dict(zip(requirements.keys(), values))
+        return self.inputs
+
     @abstractmethod
     async def preprocess(self) -> None:
         """Get fetch and preprocess data.
@@ -0,0 +1,126 @@
+"""Data requirements which indicators declare before they are executed.
+
+Indicators declare the data they need (See `BaseIndicator.requirements`). Identical
+requirements of different indicators for the same feature (E.g. of all indicators of a
+report) are fetched only once (See `oqt.fetch_inputs`).
+"""
+
+import asyncio
+import json
+from abc import ABCMeta, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Optional, Tuple
+
+from geojson import Feature
+
+from ohsome_quality_analyst.base.layer import BaseLayer as Layer
+from ohsome_quality_analyst.base.layer import LayerDefinition
+from ohsome_quality_analyst.definitions import get_raster_dataset
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.raster import client as raster_client
+from ohsome_quality_analyst.utils.geometry import get_area
+
+
+class Requirement(metaclass=ABCMeta):
+    """The base class of every data requirement."""
+
+    @property
+    @abstractmethod
+    def key(self) -> str:
+        """Key identifying requirements which yield the same data for a feature."""
+        pass
+
+    @abstractmethod
+    async def fetch(self, feature: Feature) -> Any:
+        """Fetch data for the feature."""
+        pass
+
+
+@dataclass
+class OhsomeQuery(Requirement):
+    """Query of the ohsome API for a Layer (See `ohsome.client.query`).
+
+    Attributes:
+        series: Query a time series with an open end using the series store
+            (See `ohsome.client.query_series`).
+    """
+
+    layer: Layer
+    time: Optional[str] = None
+    ratio: bool = False
+    count_latest_contributions: bool = False
+    series: bool = False
+
+    @property
+    def key(self) -> str:
+        if isinstance(self.layer, LayerDefinition):
+            # Layers with different keys may have the same endpoint and filters
+            layer = asdict(self.layer)
+            for field in ("key", "name", "description", "source"):
+                layer.pop(field)
+        else:
+            # Data attached to the Layer is only identified by the object itself
+            layer = id(self.layer)
+        return json.dumps(
+            [
+                "ohsome",
+                layer,
+                self.time,
+                self.ratio,
+                self.count_latest_contributions,
+                self.series,
+            ],
+            sort_keys=True,
+        )
+
+    async def fetch(self, feature: Feature) -> dict:
+        if self.series:
+            return await ohsome_client.query_series(self.layer, feature, self.time)
+        return await ohsome_client.query(
+            self.layer,
+            feature,
+            time=self.time,
+            ratio=self.ratio,
+            count_latest_contributions=self.count_latest_contributions,
+        )
+
+
+@dataclass
+class Area(Requirement):
+    """Geodesic area of the feature in km²."""
+
+    @property
+    def key(self) -> str:
+        return json.dumps(["area"])
+
+    async def fetch(self, feature: Feature) -> float:
+        return get_area(feature)
+
+
+@dataclass
+class ZonalStats(Requirement):
+    """Zonal statistics of a raster dataset for the feature.
+
+    Attributes:
+        raster: Name of the raster dataset.
+        stats: Statistics as accepted by `rasterstats.zonal_stats`.
+    """
+
+    raster: str
+    stats: Tuple[str, ...]
+
+    @property
+    def key(self) -> str:
+        return json.dumps(["zonal_stats", self.raster, sorted(self.stats)])
+
+    async def fetch(self, feature: Feature) -> list:
+        # Reading a raster is blocking I/O
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            lambda: raster_client.get_zonal_stats(
+                feature,
+                get_raster_dataset(self.raster),
+                stats=list(self.stats),
+            ),
+        )
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+from typing import Any, Coroutine
 
 import click
 import geojson
@@ -33,6 +34,19 @@ def cli_option(option):
     return _cli_option
 
 
+def run(coroutine: Coroutine) -> Any:
+    """Run coroutine inside of the OQT lifecycle (See `oqt.startup`)."""
+
+    async def _run():
+        await oqt.startup()
+        try:
+            return await coroutine
+        finally:
+            await oqt.shutdown()
+
+    return asyncio.run(_run())
+
+
 @click.group()
 @click.version_option()
 @click.option("--quiet", "-q", is_flag=True, help="Disable logging.")
@@ -85,7 +99,7 @@ def list_fid_fields():
 @cli.command("list-regions")
 def get_available_regions():
     """List available regions."""
-    regions = asyncio.run(db_client.get_regions())
+    regions = run(db_client.get_regions())
     format_row = "{:>4}{:>20}"
     click.echo(format_row.format("fid", "name"))
     click.echo(format_row.format("---", "-" * 19))
@@ -145,8 +159,10 @@ def create_indicator(
             dataset=dataset_name,
             featureId=feature_id,
             fidField=fid_field,
+            includeSvg=True,
+            includeHtml=True,
         )
-    geojson_object = asyncio.run(oqt.create_indicator_as_geojson(parameters, force))
+    geojson_object = run(oqt.create_indicator_as_geojson(parameters, force))
     if outfile:
         write_geojson(outfile, geojson_object)
     click.echo(geojson.dumps(geojson_object, default=json_serialize, allow_nan=True))
@@ -190,8 +206,10 @@ def create_report(
             dataset=dataset_name,
             featureId=feature_id,
             fidField=fid_field,
+            includeSvg=True,
+            includeHtml=True,
         )
-    geojson_object = asyncio.run(oqt.create_report_as_geojson(parameters, force))
+    geojson_object = run(oqt.create_report_as_geojson(parameters, force))
     if outfile:
         write_geojson(outfile, geojson_object)
     click.echo(geojson.dumps(geojson_object, default=json_serialize, allow_nan=True))
@@ -254,7 +272,7 @@ def create_all_indicators(
             + "database."
         )
     click.confirm("Do you want to continue?", abort=True)
-    asyncio.run(
+    run(
         oqt.create_all_indicators(
             dataset_name,
             indicator_name=indicator_name,
@@ -264,5 +282,24 @@ def create_all_indicators(
     )
 
 
+@cli.command("refresh-dataset")
+@click.option(
+    "--dataset-name",
+    "-d",
+    required=True,
+    type=click.Choice(
+        get_config_value("datasets").keys(),
+        case_sensitive=True,
+    ),
+    help=("Choose a dataset containing geometries."),
+)
+def refresh_dataset(dataset_name: str):
+    """Announce that the features of a dataset have changed.
+
+    Cached results of the dataset are evicted by all running OQT processes.
+    """
+    run(db_client.refresh_dataset(dataset_name))
+
+
 if __name__ == "__main__":
     cli()
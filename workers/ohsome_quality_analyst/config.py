@@ -30,11 +30,34 @@ def load_config_default() -> dict:
         "postgres_db": "oqt",
         "postgres_user": "oqt",
         "postgres_password": "oqt",
+        "postgres_pool_min_size": 1,
+        "postgres_pool_max_size": 10,
+        "postgres_write_batch_size": 500,
+        "postgres_write_flush_interval": 10,
+        "postgres_results_cache_size": 1024,
         "data_dir": get_default_data_dir(),
         "geom_size_limit": 100,
         "log_level": "INFO",
         "ohsome_api": "https://api.ohsome.org/v1/",
+        "ohsome_api_max_connections": 20,
+        "ohsome_api_max_keepalive_connections": 10,
+        "ohsome_api_keepalive_expiry": 60,
+        "ohsome_api_http2": False,
+        "ohsome_cache_size": 256,
+        "ohsome_cache_dir": "",
+        "ohsome_series_dir": "",
+        "ohsome_metadata_refresh_interval": 600,
+        "ohsome_batch_size": 50,
+        "ohsome_batch_window": 200,
+        "ohsome_concurrency_limit": 4,
+        "ohsome_latency_target": 60000,
+        "ohsome_retry_budget": 300,
+        "ohsome_max_shards": 4,
+        "ohsome_shard_duration": 120,
+        "ohsome_tile_size": 50,
         "concurrent_computations": 4,
+        "stale_while_revalidate": False,
+        "shdi_index": False,
         "user_agent": "ohsome-quality-analyst/{}".format(oqt_version),
         "datasets": {
             "regions": {
@@ -62,10 +85,37 @@ def load_config_from_env() -> dict:
         "postgres_db": os.getenv("POSTGRES_DB"),
         "postgres_user": os.getenv("POSTGRES_USER"),
         "postgres_password": os.getenv("POSTGRES_PASSWORD"),
+        "postgres_pool_min_size": os.getenv("POSTGRES_POOL_MIN_SIZE"),
+        "postgres_pool_max_size": os.getenv("POSTGRES_POOL_MAX_SIZE"),
+        "postgres_write_batch_size": os.getenv("POSTGRES_WRITE_BATCH_SIZE"),
+        "postgres_write_flush_interval": os.getenv("POSTGRES_WRITE_FLUSH_INTERVAL"),
+        "postgres_results_cache_size": os.getenv("POSTGRES_RESULTS_CACHE_SIZE"),
         "data_dir": os.getenv("OQT_DATA_DIR"),
         "geom_size_limit": os.getenv("OQT_GEOM_SIZE_LIMIT"),
         "ohsome_api": os.getenv("OQT_OHSOME_API"),
+        "ohsome_api_max_connections": os.getenv("OQT_OHSOME_API_MAX_CONNECTIONS"),
+        "ohsome_api_max_keepalive_connections": os.getenv(
+            "OQT_OHSOME_API_MAX_KEEPALIVE_CONNECTIONS"
+        ),
+        "ohsome_api_keepalive_expiry": os.getenv("OQT_OHSOME_API_KEEPALIVE_EXPIRY"),
+        "ohsome_api_http2": os.getenv("OQT_OHSOME_API_HTTP2"),
+        "ohsome_cache_size": os.getenv("OQT_OHSOME_CACHE_SIZE"),
+        "ohsome_cache_dir": os.getenv("OQT_OHSOME_CACHE_DIR"),
+        "ohsome_series_dir": os.getenv("OQT_OHSOME_SERIES_DIR"),
+        "ohsome_metadata_refresh_interval": os.getenv(
+            "OQT_OHSOME_METADATA_REFRESH_INTERVAL"
+        ),
+        "ohsome_batch_size": os.getenv("OQT_OHSOME_BATCH_SIZE"),
+        "ohsome_batch_window": os.getenv("OQT_OHSOME_BATCH_WINDOW"),
+        "ohsome_concurrency_limit": os.getenv("OQT_OHSOME_CONCURRENCY_LIMIT"),
+        "ohsome_latency_target": os.getenv("OQT_OHSOME_LATENCY_TARGET"),
+        "ohsome_retry_budget": os.getenv("OQT_OHSOME_RETRY_BUDGET"),
+        "ohsome_max_shards": os.getenv("OQT_OHSOME_MAX_SHARDS"),
+        "ohsome_shard_duration": os.getenv("OQT_OHSOME_SHARD_DURATION"),
+        "ohsome_tile_size": os.getenv("OQT_OHSOME_TILE_SIZE"),
         "concurrent_computations": os.getenv("OQT_CONCURRENT_COMPUTATIONS"),
+        "stale_while_revalidate": os.getenv("OQT_STALE_WHILE_REVALIDATE"),
+        "shdi_index": os.getenv("OQT_SHDI_INDEX"),
         "user_agent": os.getenv("OQT_USER_AGENT"),
     }
     return {k: v for k, v in cfg.items() if v is not None}
@@ -91,6 +141,15 @@ def get_config_value(key: str) -> Union[str, int, dict]:
     return config[key]
 
 
+def get_config_flag(key: str) -> bool:
+    """Get a boolean configuration value.
+
+    Values of environment variables are strings. `true` and `1` (case-insensitive)
+    are considered true.
+    """
+    return str(get_config_value(key)).lower() in ("true", "1")
+
+
 def get_default_data_dir() -> str:
     return str(get_project_root() / "data")
 
@@ -14,40 +14,510 @@ On preventing SQL injections:
     please make sure no SQL injection attack is possible.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
-from contextlib import asynccontextmanager
-from typing import List, Union
+import time
+import zlib
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
 
 import asyncpg
 import geojson
 from asyncpg import Record
-from geojson import Feature, FeatureCollection, MultiPolygon, Polygon
+from geojson import Feature, FeatureCollection
 
 from ohsome_quality_analyst.base.indicator import BaseIndicator as Indicator
 from ohsome_quality_analyst.config import get_config_value
+from ohsome_quality_analyst.ohsome.cache import LRUCache
 from ohsome_quality_analyst.utils.exceptions import EmptyRecordError
 from ohsome_quality_analyst.utils.helper import json_serialize
 
 WORKING_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
-@asynccontextmanager
-async def get_connection():
-    # DNS in libpq connection URI format
-    dns = "postgres://{user}:{password}@{host}:{port}/{database}".format(
+def load_sql(file_name: str, directory: str = WORKING_DIR) -> str:
+    """Read a SQL file. Meant to be called once on import of a module."""
+    with open(os.path.join(directory, file_name), "r") as file:
+        return file.read()
+
+
+# Queries are loaded once. asyncpg prepares a statement once per connection of the
+# pool and re-uses it for every query with the same text (statement cache).
+CREATE_RESULTS_TABLE = load_sql("create_results_table.sql")
+SAVE_RESULTS = load_sql("save_results.sql")
+LOAD_RESULTS = load_sql("load_results.sql")
+LOAD_RESULTS_BATCH = load_sql("load_results_batch.sql")
+SAVE_FIGURES = load_sql("save_figures.sql")
+LOAD_FIGURES = load_sql("load_figures.sql")
+REGIONS_AS_GEOJSON = load_sql("regions_as_geojson.sql")
+SELECT_SHDI = load_sql("select_shdi.sql")
+CREATE_RESULTS_STAGING = load_sql("create_results_staging.sql")
+SAVE_RESULTS_STAGING = load_sql("save_results_staging.sql")
+SELECT_LEGACY_RESULTS = load_sql("select_legacy_results.sql")
+EXISTS_LEGACY_RESULTS = "SELECT to_regclass('results_legacy') IS NOT NULL"
+# Processes starting at the same time bootstrap the schema one after another
+BOOTSTRAP_LOCK = "SELECT pg_advisory_xact_lock(hashtext('oqt_bootstrap_schema'))"
+# Number of legacy results migrated at once
+MIGRATION_BATCH_SIZE = 500
+# Seconds until the schema of a dataset without table is looked up again
+MISSING_TABLE_TTL = 60
+
+# Other processes are notified about saved results and refreshed datasets on this
+# channel to evict them from their in-process caches (See `start_listener`).
+NOTIFY_CHANNEL = "oqt_cache_invalidation"
+NOTIFY = "SELECT pg_notify($1, $2)"
+
+RESULTS_COLUMNS = (
+    "indicator_name",
+    "layer_key",
+    "dataset_name",
+    "fid",
+    "timestamp_oqt",
+    "timestamp_osm",
+    "timestamp_snapshot",
+    "result_class",
+    "result_value",
+    "result_description",
+    "figure_id",
+    "data",
+)
+
+
+# A single connection pool is shared by all queries to the geodatabase.
+# It is bound to the event loop it has been created in.
+_pool_task: Optional[asyncio.Task] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool_stats: Counter = Counter()
+
+# A single connection per process listens for notifications. Like the pool it is bound
+# to the event loop it has been created in.
+_listener: Optional[asyncpg.Connection] = None
+_listener_loop: Optional[asyncio.AbstractEventLoop] = None
+# Task listening again after the connection has been lost. Kept until it is done.
+_listener_task: Optional[asyncio.Task] = None
+
+# In-process cache of results. Only used while listening for notifications.
+_results_cache: Optional[LRUCache] = None
+# Incremented on every eviction. Results loaded meanwhile are not cached.
+_results_generation = 0
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """Schema of a dataset of the geodatabase as configured by `datasets`.
+
+    Attributes:
+        name: Name of the dataset (table).
+        default: Name of the unique feature id field.
+        other: Names of other feature id fields.
+        column_types: Data type of each column as given by
+            `information_schema.columns`.
+    """
+
+    name: str
+    default: str
+    other: Tuple[str, ...]
+    column_types: Dict[str, str]
+
+    def is_fid_field(self, fid_field: str) -> bool:
+        return fid_field == self.default or fid_field in self.other
+
+    def cast_feature_id(self, feature_id: str, fid_field: str) -> Union[str, int]:
+        """Cast the feature id to the data type of the feature id field."""
+        if self.column_types.get(fid_field) == "integer":
+            return int(feature_id)
+        return feature_id
+
+
+# Schemas of all configured datasets. Loaded on startup or on first usage.
+_catalog: Dict[str, DatasetSchema] = {}
+# Time (monotonic) a table has been found missing by dataset (negative cache)
+_missing_tables: Dict[str, float] = {}
+
+
+async def startup() -> None:
+    """Create the shared connection pool and load the schemas of all datasets.
+
+    If the geodatabase is not reachable the creation of the pool is retried on the
+    first query.
+    """
+    try:
+        await get_pool()
+        await refresh_catalog()
+    except (OSError, asyncpg.PostgresError) as error:
+        logging.warning("Could not connect to geodatabase: {0}".format(repr(error)))
+        return
+    await start_listener()
+
+
+async def shutdown() -> None:
+    """Stop listening for notifications and close the shared connection pool."""
+    global _pool_task, _pool_loop
+    # Do not listen again after shutdown
+    listener_task = _listener_task
+    if listener_task is not None and not listener_task.done():
+        if listener_task.get_loop() is asyncio.get_running_loop():
+            listener_task.cancel()
+    await stop_listener()
+    task, loop = _pool_task, _pool_loop
+    _pool_task = None
+    _pool_loop = None
+    if task is None or loop is not asyncio.get_running_loop():
+        return
+    try:
+        pool = await task
+    except (OSError, asyncpg.PostgresError):
+        return
+    await pool.close()
+
+
+async def get_pool() -> asyncpg.Pool:
+    """Get the shared connection pool. It is created on first usage.
+
+    Concurrent callers await the creation of the same pool. The pool is re-created if
+    its creation failed, if it has been closed or if it has been created inside of
+    another event loop (E.g. consecutive calls of `asyncio.run`).
+    """
+    global _pool_task, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool_task is None or _pool_loop is not loop or is_broken(_pool_task):
+        _pool_task = loop.create_task(create_pool())
+        _pool_loop = loop
+    # Cancellation of a caller should not cancel the creation for other callers
+    return await asyncio.shield(_pool_task)
+
+
+def is_broken(task: asyncio.Task) -> bool:
+    """Check if the creation of the pool has failed or the pool has been closed."""
+    if not task.done():
+        return False
+    if task.cancelled() or task.exception() is not None:
+        return True
+    return task.result().is_closing()
+
+
+def get_dns() -> str:
+    """Get DNS in libpq connection URI format."""
+    return "postgres://{user}:{password}@{host}:{port}/{database}".format(
         host=get_config_value("postgres_host"),
         port=get_config_value("postgres_port"),
         database=get_config_value("postgres_db"),
         user=get_config_value("postgres_user"),
         password=get_config_value("postgres_password"),
     )
-    conn = await asyncpg.connect(dns)
+
+
+async def create_pool() -> asyncpg.Pool:
+    dns = get_dns()
+    min_size = int(get_config_value("postgres_pool_min_size"))
+    max_size = int(get_config_value("postgres_pool_max_size"))
+    logging.debug("Create connection pool (size: {0}-{1})".format(min_size, max_size))
+    pool = await asyncpg.create_pool(dns, min_size=min_size, max_size=max_size)
+    await bootstrap_schema(pool)
+    return pool
+
+
+async def bootstrap_schema(pool: asyncpg.Pool) -> None:
+    """Create the tables OQT writes to if they do not exist.
+
+    Executed once on creation of the pool instead of before every write. Failure
+    (E.g. due to missing privileges of a read-only user) is only logged.
+
+    Results of a results table of a previous version are migrated (See
+    `migrate_legacy_results`).
+    """
+    async with pool.acquire() as conn:
+        try:
+            async with conn.transaction():
+                await conn.execute(BOOTSTRAP_LOCK)
+                await conn.execute(CREATE_RESULTS_TABLE)
+                await migrate_legacy_results(conn)
+        except asyncpg.PostgresError as error:
+            logging.warning("Could not create results table: {0}".format(repr(error)))
+
+
+async def migrate_legacy_results(conn: asyncpg.Connection) -> None:
+    """Copy results of the legacy results table into the results table.
+
+    The results table of previous versions stored the whole indicator as GeoJSON
+    Feature. It is renamed to `results_legacy` (See `create_results_table.sql`). Its
+    figures are moved into the figures table. Indicator data is taken from the
+    properties of the Feature. Afterwards the legacy table is dropped.
+
+    Needs to be executed inside of a transaction.
+    """
+    if not await conn.fetchval(EXISTS_LEGACY_RESULTS):
+        return
+    logging.info("Migrate results of legacy results table")
+    count = 0
+    cursor = await conn.cursor(SELECT_LEGACY_RESULTS)
+    while True:
+        rows = await cursor.fetch(MIGRATION_BATCH_SIZE)
+        if not rows:
+            break
+        records = []
+        figures = {}
+        for row in rows:
+            figure_id = None
+            if row["result_svg"] is not None:
+                figure_id = get_figure_id(row["result_svg"])
+                figures[figure_id] = zlib.compress(row["result_svg"].encode())
+            records.append(
+                (
+                    row["indicator_name"],
+                    row["layer_key"],
+                    row["dataset_name"],
+                    row["fid"],
+                    row["timestamp_oqt"],
+                    row["timestamp_osm"],
+                    None,  # Data snapshot is unknown
+                    row["result_class"],
+                    row["result_value"],
+                    row["result_description"],
+                    figure_id,
+                    row["data"],
+                )
+            )
+        if figures:
+            await conn.execute(SAVE_FIGURES, *map(list, zip(*figures.items())))
+        await conn.copy_records_to_table(
+            "results",
+            records=records,
+            columns=RESULTS_COLUMNS,
+        )
+        count += len(records)
+    await conn.execute("DROP TABLE results_legacy")
+    logging.info("{0} results of legacy results table migrated".format(count))
+
+
+async def start_listener() -> None:
+    """Listen for notifications about results and datasets changed by any process.
+
+    Matching entries of the in-process caches are evicted on notification (See
+    `on_notification`). Notifications sent while not listening are missed. That is
+    why the results cache is cleared on start and is only used while listening.
+    """
+    global _listener, _listener_loop
+    await stop_listener()
     try:
-        yield conn
-    finally:
+        conn = await asyncpg.connect(get_dns())
+    except (OSError, asyncpg.PostgresError) as error:
+        logging.warning("Could not listen for notifications: {0}".format(repr(error)))
+        return
+    try:
+        await conn.add_listener(NOTIFY_CHANNEL, on_notification)
+    except asyncpg.PostgresError as error:
+        logging.warning("Could not listen for notifications: {0}".format(repr(error)))
         await conn.close()
+        return
+    conn.add_termination_listener(on_listener_terminated)
+    get_results_cache().clear()
+    _listener = conn
+    _listener_loop = asyncio.get_running_loop()
+
+
+async def stop_listener() -> None:
+    global _listener, _listener_loop
+    conn, loop = _listener, _listener_loop
+    _listener = None
+    _listener_loop = None
+    if conn is None or conn.is_closed() or loop is not asyncio.get_running_loop():
+        return
+    await conn.close()
+
+
+def is_listening() -> bool:
+    return (
+        _listener is not None
+        and not _listener.is_closed()
+        and _listener_loop is asyncio.get_running_loop()
+    )
+
+
+def on_listener_terminated(conn: asyncpg.Connection) -> None:
+    """Disable the results cache and try to listen again on loss of connection."""
+    global _listener, _listener_task
+    if conn is not _listener:
+        # Closed by `stop_listener`
+        return
+    logging.warning("Connection listening for notifications has been lost")
+    _listener = None
+    get_results_cache().clear()
+    _listener_task = asyncio.get_running_loop().create_task(start_listener())
+    _listener_task.add_done_callback(on_listener_task_done)
+
+
+def on_listener_task_done(task: asyncio.Task) -> None:
+    global _listener_task
+    if task is _listener_task:
+        _listener_task = None
+
+
+def on_notification(_conn, _pid: int, _channel: str, payload: str) -> None:
+    """Evict cache entries matching the notification.
+
+    A notification is either about saved results `{"results": [indicator_name,
+    layer_key, dataset, feature_id]}` or about a refreshed dataset
+    `{"dataset": dataset}`.
+    """
+    try:
+        event = json.loads(payload)
+    except json.JSONDecodeError:
+        logging.warning("Invalid notification: {0}".format(payload))
+        return
+    if "results" in event:
+        evict_results(*event["results"])
+    elif "dataset" in event:
+        evict_dataset(event["dataset"])
+
+
+def get_results_cache() -> LRUCache:
+    """Get the process-wide results cache. It is created on first usage."""
+    global _results_cache
+    if _results_cache is None:
+        _results_cache = LRUCache(int(get_config_value("postgres_results_cache_size")))
+    return _results_cache
+
+
+def get_results_key(
+    indicator_name: str,
+    layer_key: str,
+    dataset: str,
+    feature_id: str,
+) -> str:
+    return json.dumps([indicator_name, layer_key, dataset, str(feature_id)])
+
+
+def get_cached_results(key: str, include_svg: bool) -> Optional[dict]:
+    """Get a row of the results table and its figure from the in-process cache.
+
+    Returns:
+        `{"record": row, "figures": {figure_id: svg}}` or None if not cached. A row
+        cached without figure is not returned if the figure is requested.
+    """
+    if not is_listening():
+        return None
+    entry = get_results_cache().get(key)
+    if entry is None:
+        return None
+    figure_id = entry["record"]["figure_id"]
+    if include_svg and figure_id is not None and figure_id not in entry["figures"]:
+        return None
+    return entry
+
+
+def cache_results(
+    key: str,
+    record: Record,
+    figures: Dict[str, str],
+    generation: int,
+) -> None:
+    """Cache a row of the results table unless an eviction happened in the meantime.
+
+    The generation is read before querying the geodatabase. If it has changed the
+    row might already be outdated.
+    """
+    if not is_listening() or generation != _results_generation:
+        return
+    figure_id = record["figure_id"]
+    get_results_cache().set(
+        key,
+        {
+            "record": dict(record),
+            "figures": {figure_id: figures[figure_id]} if figure_id in figures else {},
+        },
+    )
+
+
+def evict_results(
+    indicator_name: str,
+    layer_key: str,
+    dataset: str,
+    feature_id: str,
+) -> None:
+    global _results_generation
+    _results_generation += 1
+    get_results_cache().delete(
+        get_results_key(indicator_name, layer_key, dataset, feature_id)
+    )
+
+
+def evict_dataset(dataset: str) -> None:
+    """Evict all results of the dataset and its schema."""
+    global _results_generation
+    _results_generation += 1
+    cache = get_results_cache()
+    for key in cache.keys():
+        if json.loads(key)[2] == dataset:
+            cache.delete(key)
+    _catalog.pop(dataset, None)
+    _missing_tables.pop(dataset, None)
+
+
+def get_results_notification(record: tuple) -> str:
+    """Get payload of a notification about a saved row of the results table."""
+    return json.dumps({"results": [str(value) for value in record[:4]]})
+
+
+def get_results_cache_stats() -> dict:
+    cache = get_results_cache()
+    return {
+        "listening": _listener is not None and not _listener.is_closed(),
+        "size": len(cache),
+        "maxsize": cache.maxsize,
+        "memory": dict(cache.stats),
+    }
+
+
+@asynccontextmanager
+async def get_connection():
+    """Acquire a connection from the shared connection pool.
+
+    The connection is released back to the pool afterwards. Time waited for a
+    connection is recorded (See `get_pool_stats`).
+    """
+    pool = await get_pool()
+    saturated = pool.get_idle_size() == 0 and pool.get_size() >= pool.get_max_size()
+    started_at = time.monotonic()
+    async with pool.acquire() as conn:
+        wait = (time.monotonic() - started_at) * 1000
+        _pool_stats["acquires"] += 1
+        _pool_stats["acquire_wait_ms"] += wait
+        _pool_stats["max_acquire_wait_ms"] = max(
+            _pool_stats["max_acquire_wait_ms"], wait
+        )
+        if saturated:
+            _pool_stats["saturated"] += 1
+        yield conn
+
+
+def get_pool_stats() -> dict:
+    """Get statistics of the shared connection pool.
+
+    Returns:
+        Size of the pool, number of idle connections and connections in use, number
+        of acquired connections, total and maximal time waited for a connection in ms
+        and number of acquisitions while all connections were in use (saturated).
+    """
+    stats = {
+        "acquires": _pool_stats["acquires"],
+        "acquire_wait_ms": round(_pool_stats["acquire_wait_ms"], 3),
+        "max_acquire_wait_ms": round(_pool_stats["max_acquire_wait_ms"], 3),
+        "saturated": _pool_stats["saturated"],
+    }
+    if _pool_task is not None and _pool_task.done() and not is_broken(_pool_task):
+        pool = _pool_task.result()
+        stats["size"] = pool.get_size()
+        stats["idle"] = pool.get_idle_size()
+        stats["in_use"] = pool.get_size() - pool.get_idle_size()
+        stats["max_size"] = pool.get_max_size()
+    return stats
 
 
 async def save_indicator_results(
@@ -57,49 +527,213 @@ async def save_indicator_results(
 ) -> None:
     """Save the indicator result for a given dataset and feature in the Geodatabase.
 
-    Create results table if not exists.
-    Insert or on conflict update results.
+    Insert or on conflict update results. The results table is created on creation of
+    the connection pool (See `bootstrap_schema`).
+
+    The figure is saved once per content (See `get_figure_record`). The geometry is
+    not saved but referenced by dataset and feature id.
+
+    Inside of the `buffered_writes` context the result is saved later on together
+    with other results.
+
+    Listening processes are notified on commit (See `start_listener`).
     """
 
     logging.info("Save indicator result to database")
 
-    file_path = os.path.join(WORKING_DIR, "create_results_table.sql")
-    with open(file_path, "r") as file:
-        create_query = file.read()
+    record = get_results_record(indicator, dataset, feature_id)
+    figures = get_figure_records(indicator)
+    writer = current_writer.get()
+    if writer is not None:
+        await writer.add(record, figures)
+        return
+    async with get_connection() as conn:
+        async with conn.transaction():
+            if figures:
+                await conn.execute(SAVE_FIGURES, *map(list, zip(*figures.items())))
+            await conn.execute(SAVE_RESULTS, *record)
+            await conn.execute(NOTIFY, NOTIFY_CHANNEL, get_results_notification(record))
+    evict_results(*record[:4])
 
-    file_path = os.path.join(WORKING_DIR, "save_results.sql")
-    with open(file_path, "r") as file:
-        upsert_query = file.read()
 
-    data = (
+def get_results_record(indicator: Indicator, dataset: str, feature_id: str) -> tuple:
+    """Get a row of the results table. Values are ordered as in `RESULTS_COLUMNS`."""
+    svg = indicator.result.svg
+    return (
         indicator.metadata.name,
         indicator.layer.name,
         dataset,
         feature_id,
         indicator.result.timestamp_oqt,
         indicator.result.timestamp_osm,
+        indicator.result.timestamp_snapshot,
         indicator.result.class_,
         indicator.result.value,
         indicator.result.description,
-        indicator.result.svg,
-        json.dumps(indicator.as_feature(include_data=True), default=json_serialize),
+        get_figure_id(svg) if svg is not None else None,
+        json.dumps(indicator.data, default=json_serialize),
     )
 
+
+def get_figure_id(svg: str) -> str:
+    """Get the content hash of a figure."""
+    return hashlib.sha256(svg.encode()).hexdigest()
+
+
+def get_figure_records(indicator: Indicator) -> Dict[str, bytes]:
+    """Get compressed figures of the indicator by their content hash."""
+    svg = indicator.result.svg
+    if svg is None:
+        return {}
+    return {get_figure_id(svg): zlib.compress(svg.encode())}
+
+
+async def load_figures(conn, figure_ids: List[str]) -> Dict[str, str]:
+    """Get decompressed figures by their content hash."""
+    records = await conn.fetch(LOAD_FIGURES, figure_ids)
+    return {r["figure_id"]: zlib.decompress(r["svg"]).decode() for r in records}
+
+
+async def save_results_records(records: List[tuple], figures: Dict[str, bytes]) -> None:
+    """Save multiple rows of the results table with one upsert.
+
+    Rows are copied into a temporary staging table from which the results table is
+    updated in the same transaction. Figures are saved beforehand with one query.
+    Listening processes are notified on commit.
+    """
     async with get_connection() as conn:
-        await conn.execute(create_query)
-        await conn.execute(upsert_query, *data)
+        async with conn.transaction():
+            if figures:
+                await conn.execute(SAVE_FIGURES, *map(list, zip(*figures.items())))
+            await conn.execute(CREATE_RESULTS_STAGING)
+            await conn.copy_records_to_table(
+                "results_staging",
+                records=records,
+                columns=RESULTS_COLUMNS,
+            )
+            await conn.execute(SAVE_RESULTS_STAGING)
+            await conn.executemany(
+                NOTIFY,
+                [(NOTIFY_CHANNEL, get_results_notification(r)) for r in records],
+            )
+    for record in records:
+        evict_results(*record[:4])
+
+
+class ResultsWriter:
+    """Buffer rows of the results table and save them in batches.
+
+    A batch is saved if it is full or if the flush interval has passed. Saving a batch
+    is retried a limited number of times before the batch is dropped. If saving fails
+    or the process crashes at most one batch of results is lost.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: int,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # A later result of the same indicator, layer and feature replaces the earlier
+        self.buffer: Dict[tuple, tuple] = {}
+        self.figures: Dict[str, bytes] = {}
+        self.lock = asyncio.Lock()
+        self.flush_task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "ResultsWriter":
+        self.flush_task = asyncio.create_task(self.flush_periodically())
+        return self
+
+    async def __aexit__(self, *_args) -> None:
+        self.flush_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self.flush_task
+        await self.flush()
+
+    async def add(
+        self,
+        record: tuple,
+        figures: Optional[Dict[str, bytes]] = None,
+    ) -> None:
+        self.buffer[record[:4]] = record
+        self.figures.update(figures or {})
+        if len(self.buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self.lock:
+            if not self.buffer:
+                return
+            buffer, self.buffer = self.buffer, {}
+            figures, self.figures = self.figures, {}
+            logging.info("Save {0} indicator results to database".format(len(buffer)))
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    await save_results_records(list(buffer.values()), figures)
+                    return
+                except (OSError, asyncpg.PostgresError) as error:
+                    logging.warning(
+                        "Could not save results (attempt {0} of {1}): {2}".format(
+                            attempt, self.max_attempts, repr(error)
+                        )
+                    )
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.retry_delay * attempt)
+            logging.error(
+                "Drop batch of {0} indicator results which could not be saved".format(
+                    len(buffer)
+                )
+            )
+
+    async def flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+current_writer: ContextVar[Optional[ResultsWriter]] = ContextVar(
+    "current_writer", default=None
+)
+
+
+@asynccontextmanager
+async def buffered_writes():
+    """Save indicator results in batches inside of this context.
+
+    Results saved by `save_indicator_results` are buffered and saved in batches of
+    configurable size (`postgres_write_batch_size`) or at the latest after the flush
+    interval (`postgres_write_flush_interval`). Remaining results are saved on exit.
+    """
+    batch_size = int(get_config_value("postgres_write_batch_size"))
+    if batch_size <= 1:
+        yield None
+        return
+    flush_interval = int(get_config_value("postgres_write_flush_interval"))
+    async with ResultsWriter(batch_size, flush_interval) as writer:
+        token = current_writer.set(writer)
+        try:
+            yield writer
+        finally:
+            current_writer.reset(token)
 
 
 async def load_indicator_results(
     indicator: Indicator,
     dataset: str,
     feature_id: str,
+    include_svg: bool = True,
 ) -> Indicator:
     """Get the indicator result from the Geodatabase.
 
     Reads given dataset and feature id from the indicator object.
-    Load indicators results from the Geodatabase.
+    Load indicators results from the in-process cache or from the Geodatabase.
     Writes retrieved results to the result attribute of the indicator object.
+    The figure is only loaded if `include_svg` is true.
 
     Returns:
         Indicator object
@@ -109,10 +743,6 @@ async def load_indicator_results(
     """
     logging.info("Load Indicator results from database")
 
-    file_path = os.path.join(WORKING_DIR, "load_results.sql")
-    with open(file_path, "r") as file:
-        query = file.read()
-
     query_data = (
         indicator.metadata.name,
         indicator.layer.name,
@@ -120,25 +750,182 @@ async def load_indicator_results(
         feature_id,
     )
 
+    key = get_results_key(*query_data)
+    entry = get_cached_results(key, include_svg)
+    if entry is not None:
+        set_indicator_results(indicator, entry["record"], entry["figures"])
+        return indicator
+
+    generation = _results_generation
+    async with get_connection() as conn:
+        query_result = await conn.fetchrow(LOAD_RESULTS, *query_data)
+        if not query_result:
+            raise EmptyRecordError()
+        figures = {}
+        if include_svg and query_result["figure_id"] is not None:
+            figures = await load_figures(conn, [query_result["figure_id"]])
+
+    cache_results(key, query_result, figures, generation)
+    set_indicator_results(indicator, query_result, figures)
+    return indicator
+
+
+async def load_indicator_results_batch(
+    indicators: List[Indicator],
+    dataset: str,
+    feature_id: str,
+    include_svg: bool = True,
+) -> List[Indicator]:
+    """Get the results of multiple indicators for the same feature with one query.
+
+    Results cached in-process are not queried. Writes retrieved results to the
+    result attribute of each indicator object. Figures are only loaded if
+    `include_svg` is true.
+
+    Returns:
+        Indicator objects for which no results are stored in the Geodatabase.
+    """
+    keys = {}
+    uncached = []
+    for indicator in indicators:
+        key = get_results_key(
+            indicator.metadata.name,
+            indicator.layer.name,
+            dataset,
+            feature_id,
+        )
+        entry = get_cached_results(key, include_svg)
+        if entry is None:
+            keys[(indicator.metadata.name, indicator.layer.name)] = key
+            uncached.append(indicator)
+        else:
+            set_indicator_results(indicator, entry["record"], entry["figures"])
+    if not uncached:
+        return []
+
+    logging.info("Load results of {0} indicators from database".format(len(uncached)))
+    query_data = (
+        dataset,
+        feature_id,
+        [indicator.metadata.name for indicator in uncached],
+        [indicator.layer.name for indicator in uncached],
+    )
+    generation = _results_generation
     async with get_connection() as conn:
-        query_result = await conn.fetchrow(query, *query_data)
+        records = await conn.fetch(LOAD_RESULTS_BATCH, *query_data)
+        figures = {}
+        figure_ids = {r["figure_id"] for r in records} - {None}
+        if include_svg and figure_ids:
+            figures = await load_figures(conn, list(figure_ids))
+    records = {(r["indicator_name"], r["layer_key"]): r for r in records}
+    missing = []
+    for indicator in uncached:
+        name = (indicator.metadata.name, indicator.layer.name)
+        record = records.get(name)
+        if record is None:
+            missing.append(indicator)
+        else:
+            cache_results(keys[name], record, figures, generation)
+            set_indicator_results(indicator, record, figures)
+    return missing
 
-    if not query_result:
-        raise EmptyRecordError()
 
-    indicator.result.timestamp_oqt = query_result["timestamp_oqt"]
-    indicator.result.timestamp_osm = query_result["timestamp_osm"]
-    indicator.result.class_ = query_result["result_class"]
-    indicator.result.value = query_result["result_value"]
-    indicator.result.description = query_result["result_description"]
-    indicator.result.svg = query_result["result_svg"]
+def set_indicator_results(
+    indicator: Indicator,
+    record: Union[Record, dict],
+    figures: Dict[str, str],
+) -> None:
+    """Write a row of the results table and its figure to the indicator object.
+
+    If the figure has not been loaded the default figure is kept.
+    """
+    indicator.result.timestamp_oqt = record["timestamp_oqt"]
+    indicator.result.timestamp_osm = record["timestamp_osm"]
+    indicator.result.timestamp_snapshot = record["timestamp_snapshot"]
+    indicator.result.class_ = record["result_class"]
+    indicator.result.value = record["result_value"]
+    indicator.result.description = record["result_description"]
+    if record["figure_id"] in figures:
+        indicator.result.svg = figures[record["figure_id"]]
 
     # Write data back to the attributes of the indicator object
-    feature = geojson.loads(query_result["feature"])
-    if "data" in feature["properties"]:
-        for key, value in feature["properties"]["data"].items():
+    if record["data"] is not None:
+        for key, value in json.loads(record["data"]).items():
             setattr(indicator, key, value)
-    return indicator
+
+
+async def refresh_catalog() -> Dict[str, DatasetSchema]:
+    """Load the schemas of all datasets configured by `datasets` in one query."""
+    global _catalog, _missing_tables
+    datasets = get_config_value("datasets")
+    query = (
+        "SELECT table_name, column_name, data_type "
+        + "FROM information_schema.columns "
+        + "WHERE table_name = ANY($1::text[])"
+    )
+    async with get_connection() as conn:
+        records = await conn.fetch(query, list(datasets.keys()))
+    column_types = defaultdict(dict)
+    for record in records:
+        table, column = record["table_name"], record["column_name"]
+        column_types[table][column] = record["data_type"]
+    _catalog = {
+        name: DatasetSchema(
+            name=name,
+            default=fields["default"],
+            other=tuple(fields.get("other", [])),
+            column_types=column_types[name],
+        )
+        for name, fields in datasets.items()
+    }
+    now = time.monotonic()
+    _missing_tables = {name: now for name in datasets if not column_types[name]}
+    return _catalog
+
+
+async def get_dataset_schema(dataset: str) -> DatasetSchema:
+    """Get the schema of a dataset from the catalog.
+
+    The catalog is refreshed if the dataset is not part of it yet (E.g. on first
+    usage). If the table of the dataset has been missing it is looked up again at
+    most every `MISSING_TABLE_TTL` seconds (E.g. if the table has been created later
+    on).
+
+    Raises:
+        ValueError: If the dataset is not configured.
+    """
+    if not sanity_check_dataset(dataset):
+        raise ValueError("Input dataset is not valid: " + dataset)
+    schema = _catalog.get(dataset)
+    if schema is None or (not schema.column_types and not is_missing_table(dataset)):
+        schema = (await refresh_catalog())[dataset]
+    return schema
+
+
+def is_missing_table(dataset: str) -> bool:
+    """Has the table of the dataset been found missing recently?"""
+    missing_since = _missing_tables.get(dataset)
+    return (
+        missing_since is not None
+        and time.monotonic() - missing_since < MISSING_TABLE_TTL
+    )
+
+
+async def refresh_dataset(dataset: str) -> None:
+    """Announce that the features of a dataset have changed (E.g. after an import).
+
+    All processes listening for notifications evict cached results and the schema of
+    the dataset. The schema is reloaded right away.
+
+    Raises:
+        ValueError: If the dataset is not configured.
+    """
+    if not sanity_check_dataset(dataset):
+        raise ValueError("Input dataset is not valid: " + dataset)
+    async with get_connection() as conn:
+        await conn.execute(NOTIFY, NOTIFY_CHANNEL, json.dumps({"dataset": dataset}))
+    evict_dataset(dataset)
+    await refresh_catalog()
 
 
 async def get_feature_ids(dataset: str) -> List[str]:
@@ -153,28 +940,10 @@ async def get_feature_ids(dataset: str) -> List[str]:
     return [str(record[fid_field]) for record in records]
 
 
-async def get_area_of_bpolys(bpolys: Union[Polygon, MultiPolygon]):
-    """Calculates the area of a geojson geometry in postgis"""
-    logging.info("Get area of polygon")
-    query = """
-        SELECT
-            public.ST_Area(
-                st_setsrid(
-                    public.ST_GeomFromGeoJSON($1)::public.geography,
-                    4326
-                    )
-            ) / (1000*1000) as area_sqkm
-        """
-    async with get_connection() as conn:
-        result = await conn.fetchrow(query, geojson.dumps(bpolys))
-    return result["area_sqkm"]
-
-
 async def get_feature_from_db(dataset: str, feature_id: str) -> Feature:
     """Get regions from geodatabase as a GeoJSON Feature object"""
-    if not sanity_check_dataset(dataset):
-        raise ValueError("Input dataset is not valid: " + dataset)
-    fid_field = get_config_value("datasets")[dataset]["default"]
+    schema = await get_dataset_schema(dataset)
+    fid_field = schema.default
 
     logging.info("Dataset name:     " + dataset)
     logging.info("Feature id:       " + feature_id)
@@ -186,19 +955,15 @@ async def get_feature_from_db(dataset: str, feature_id: str) -> Feature:
         + "WHERE {0} = $1".format(fid_field)
     )
     logging.debug("SQL Query: " + query)
-    if await type_of(dataset, fid_field) == "integer":
-        feature_id = int(feature_id)
+    feature_id = schema.cast_feature_id(feature_id, fid_field)
     async with get_connection() as conn:
         result = await conn.fetchrow(query, feature_id)
     return Feature(geometry=geojson.loads(result[0]))
 
 
 async def get_regions_as_geojson() -> FeatureCollection:
-    file_path = os.path.join(WORKING_DIR, "regions_as_geojson.sql")
-    with open(file_path, "r") as file:
-        query = file.read()
     async with get_connection() as conn:
-        record = await conn.fetchrow(query)
+        record = await conn.fetchrow(REGIONS_AS_GEOJSON)
     feature_collection = geojson.loads(record[0])
     # To be compliant with rfc7946 "id" should be a member of the feature
     # and not of the properties.
@@ -228,31 +993,32 @@ def sanity_check_fid_field(dataset: str, fid_field: str) -> bool:
 
 
 async def type_of(table_name: str, column_name: str) -> str:
-    """Get data type of field"""
-    query = (
-        "SELECT data_type "
-        + "FROM information_schema.columns "
-        + "WHERE table_name = $1 AND column_name = $2"
-    )
-    async with get_connection() as conn:
-        record = await conn.fetchrow(query, table_name, column_name)
-    return record[0]
+    """Get data type of field from the catalog (See `get_dataset_schema`)
+
+    Raises:
+        ValueError: If the column does not exist.
+    """
+    schema = await get_dataset_schema(table_name)
+    try:
+        return schema.column_types[column_name]
+    except KeyError:
+        raise ValueError(
+            "Column {0} does not exist in dataset {1}".format(column_name, table_name)
+        ) from None
 
 
 async def map_fid_to_uid(dataset: str, feature_id: str, fid_field: str) -> str:
     """Map feature id to the unique feature id of the dataset"""
-    if not sanity_check_dataset(dataset):
-        raise ValueError("Input dataset is not valid: " + dataset)
-    if not sanity_check_fid_field(dataset, fid_field):
+    schema = await get_dataset_schema(dataset)
+    if not schema.is_fid_field(fid_field):
         raise ValueError("Input feature id field is not valid: " + fid_field)
-    uid = get_config_value("datasets")[dataset]["default"]
+    uid = schema.default
     query = (
         "SELECT {uid} ".format(uid=uid)
         + "FROM {dataset} ".format(dataset=dataset)
         + "WHERE {fid_field} = $1".format(fid_field=fid_field)
     )
-    if await type_of(dataset, fid_field) == "integer":
-        feature_id = int(feature_id)
+    feature_id = schema.cast_feature_id(feature_id, fid_field)
     async with get_connection() as conn:
         record = await conn.fetchrow(query, feature_id)
     return str(record[0])
@@ -267,9 +1033,6 @@ async def get_shdi(bpoly: Union[Feature, FeatureCollection]) -> List[Record]:
     If intersection with multiple GDL regions occurs, return the weighted average using
     the intersection area as the weight.
     """
-    file_path = os.path.join(WORKING_DIR, "select_shdi.sql")
-    with open(file_path, "r") as file:
-        query = file.read()
     if isinstance(bpoly, Feature):
         geom = [str(bpoly.geometry)]
     elif isinstance(bpoly, FeatureCollection):
@@ -281,4 +1044,4 @@ async def get_shdi(bpoly: Union[Feature, FeatureCollection]) -> List[Record]:
             )
         )
     async with get_connection() as conn:
-        return await conn.fetch(query, geom)
+        return await conn.fetch(SELECT_SHDI, geom)
@@ -0,0 +1,3 @@
+CREATE TEMPORARY TABLE IF NOT EXISTS results_staging (
+    LIKE results INCLUDING DEFAULTS
+) ON COMMIT DELETE ROWS;
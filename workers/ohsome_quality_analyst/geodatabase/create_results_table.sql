@@ -1,14 +1,54 @@
+DO $$
+BEGIN
+    -- Results table of previous versions stored the whole indicator as GeoJSON Feature.
+    -- Its results are migrated afterwards (See `client.migrate_legacy_results`).
+    IF EXISTS (
+        SELECT
+        FROM
+            information_schema.columns
+        WHERE
+            table_name = 'results'
+            AND column_name = 'feature') THEN
+    ALTER TABLE results RENAME TO results_legacy;
+    ALTER TABLE results_legacy RENAME CONSTRAINT results_pkey TO results_legacy_pkey;
+END IF;
+END
+$$;
+
+-- Figures are stored once and referenced by their content hash
+CREATE TABLE IF NOT EXISTS figures (
+    figure_id text PRIMARY KEY,  -- SHA-256 hash of the SVG
+    svg bytea NOT NULL  -- zlib compressed SVG
+);
+
 CREATE TABLE IF NOT EXISTS results (
     indicator_name text,  -- INDICATOR is a SQL keyword
     layer_key text,
     dataset_name text,
-    fid text,
+    fid text,  -- Geometry is referenced by dataset and feature id
     timestamp_oqt timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
     timestamp_osm timestamp with time zone,
+    -- Latest timestamp of the ohsome API data when the result has been computed
+    timestamp_snapshot timestamp with time zone,
     result_class integer,
     result_value float,  -- VALUE is an SQL keyword
     result_description text,
-    result_svg text,
-    feature json,
+    figure_id text,
+    data jsonb,
     PRIMARY KEY (indicator_name, layer_key, dataset_name, fid)
 );
+
+-- Column has been added after the table
+ALTER TABLE results
+    ADD COLUMN IF NOT EXISTS timestamp_snapshot timestamp with time zone;
+
+-- Lookup of results by dataset and indicator answered from the index only
+CREATE INDEX IF NOT EXISTS results_dataset_indicator_idx ON results (
+    dataset_name,
+    indicator_name,
+    layer_key,
+    fid,
+    result_class,
+    result_value,
+    timestamp_osm
+);
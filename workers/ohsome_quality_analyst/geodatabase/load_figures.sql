@@ -0,0 +1,7 @@
+SELECT
+    figure_id,
+    svg
+FROM
+    figures
+WHERE
+    figure_id = ANY (cast($1 AS text[]))
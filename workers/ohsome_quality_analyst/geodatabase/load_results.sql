@@ -1,15 +1,12 @@
 SELECT
-    indicator_name,
-    layer_key,
-    dataset_name,
-    fid,
     timestamp_oqt,
     timestamp_osm,
+    timestamp_snapshot,
     result_class,
     result_value,
     result_description,
-    result_svg,
-    feature
+    figure_id,
+    data
 FROM
     results
 WHERE
@@ -0,0 +1,21 @@
+SELECT
+    indicator_name,
+    layer_key,
+    timestamp_oqt,
+    timestamp_osm,
+    timestamp_snapshot,
+    result_class,
+    result_value,
+    result_description,
+    figure_id,
+    data
+FROM
+    results
+WHERE
+    dataset_name = $1
+    AND fid = $2
+    AND (indicator_name, layer_key) IN (
+        SELECT
+            *
+        FROM
+            unnest(cast($3 AS text[]), cast($4 AS text[])))
@@ -0,0 +1,7 @@
+INSERT INTO figures (figure_id, svg)
+SELECT
+    *
+FROM
+    unnest(cast($1 AS text[]), cast($2 AS bytea[]))
+ON CONFLICT (figure_id)
+    DO NOTHING;
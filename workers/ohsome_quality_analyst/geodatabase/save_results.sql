@@ -5,11 +5,12 @@ INSERT INTO results (
     fid,
     timestamp_oqt,
     timestamp_osm,
+    timestamp_snapshot,
     result_class,
     result_value,
     result_description,
-    result_svg,
-    feature)
+    figure_id,
+    data)
 VALUES (
     $1,
     $2,
@@ -21,7 +22,8 @@ VALUES (
     $8,
     $9,
     $10,
-    $11)
+    $11,
+    $12)
 ON CONFLICT (
     indicator_name,
     layer_key,
@@ -31,15 +33,17 @@ ON CONFLICT (
         (
             timestamp_oqt,
             timestamp_osm,
+            timestamp_snapshot,
             result_class,
             result_value,
             result_description,
-            result_svg,
-            feature) = (
+            figure_id,
+            data) = (
             excluded.timestamp_oqt,
             excluded.timestamp_osm,
+            excluded.timestamp_snapshot,
             excluded.result_class,
             excluded.result_value,
             excluded.result_description,
-            excluded.result_svg,
-            excluded.feature);
+            excluded.figure_id,
+            excluded.data);
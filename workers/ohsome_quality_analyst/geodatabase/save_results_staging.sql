@@ -0,0 +1,51 @@
+INSERT INTO results (
+    indicator_name,
+    layer_key,
+    dataset_name,
+    fid,
+    timestamp_oqt,
+    timestamp_osm,
+    timestamp_snapshot,
+    result_class,
+    result_value,
+    result_description,
+    figure_id,
+    data)
+SELECT
+    indicator_name,
+    layer_key,
+    dataset_name,
+    fid,
+    timestamp_oqt,
+    timestamp_osm,
+    timestamp_snapshot,
+    result_class,
+    result_value,
+    result_description,
+    figure_id,
+    data
+FROM
+    results_staging
+ON CONFLICT (
+    indicator_name,
+    layer_key,
+    dataset_name,
+    fid)
+    DO UPDATE SET
+        (
+            timestamp_oqt,
+            timestamp_osm,
+            timestamp_snapshot,
+            result_class,
+            result_value,
+            result_description,
+            figure_id,
+            data) = (
+            excluded.timestamp_oqt,
+            excluded.timestamp_osm,
+            excluded.timestamp_snapshot,
+            excluded.result_class,
+            excluded.result_value,
+            excluded.result_description,
+            excluded.figure_id,
+            excluded.data);
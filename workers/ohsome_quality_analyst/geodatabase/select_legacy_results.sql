@@ -0,0 +1,26 @@
+SELECT
+    indicator_name,
+    layer_key,
+    dataset_name,
+    fid,
+    timestamp_oqt,
+    timestamp_osm,
+    result_class,
+    result_value,
+    result_description,
+    result_svg,
+    feature -> 'properties' -> 'data' AS data
+FROM
+    results_legacy
+WHERE
+    -- Results computed since are newer
+    NOT EXISTS (
+        SELECT
+            1
+        FROM
+            results
+        WHERE
+            results.indicator_name = results_legacy.indicator_name
+            AND results.layer_key = results_legacy.layer_key
+            AND results.dataset_name = results_legacy.dataset_name
+            AND results.fid = results_legacy.fid)
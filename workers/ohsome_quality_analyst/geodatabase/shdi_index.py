@@ -0,0 +1,143 @@
+"""In-process spatial index of the Subnational Human Development Index (SHDI).
+
+Alternative to `client.get_shdi` which intersects geometries with the SHDI table
+inside of the geodatabase. If enabled (`shdi_index`) the polygons of the GlobalDataLab
+(GDL) regions are loaded once per process into a STRtree. The area weighted SHDI is
+then computed in-process. This takes the spatial join off the shared geodatabase
+during bulk runs (E.g. `create-all-indicators`).
+
+Results match the ones of the geodatabase: Geometries are intersected in WGS84
+coordinates and weighted by their geodesic area (See `utils.geometry`).
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Union
+
+import numpy as np
+from geojson import Feature, FeatureCollection
+from shapely import wkb
+from shapely.geometry import mapping, shape
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+from ohsome_quality_analyst.config import get_config_flag
+from ohsome_quality_analyst.geodatabase import client as db_client
+from ohsome_quality_analyst.utils.geometry import get_area
+
+SELECT_SHDI_REGIONS = "SELECT shdi, ST_AsBinary(geom) AS geom FROM shdi"
+
+
+class ShdiIndex:
+    """STRtree of GDL regions and their SHDI values."""
+
+    def __init__(self, geometries: list, values: List[float]) -> None:
+        self.geometries = geometries
+        # Prepared geometries speed up repeated predicates against the same region
+        self.prepared = [prep(geometry) for geometry in geometries]
+        self.values = np.asarray(values, dtype=float)
+        self.tree = STRtree(geometries)
+
+    def query(self, geometry) -> np.ndarray:
+        """Get indices of GDL regions whose bounding box intersects the geometry."""
+        # Shapely 1.8 returns geometries by `query` and indices by `query_items`
+        if hasattr(self.tree, "query_items"):
+            return np.asarray(self.tree.query_items(geometry), dtype=int)
+        return np.asarray(self.tree.query(geometry), dtype=int)
+
+    def get_shdi(self, geometries: list) -> List[dict]:
+        """Get area weighted SHDI of geometries intersecting with GDL regions.
+
+        Returns:
+            Records with keys `shdi` and `rownumber` (starting at 1) ordered by row
+            number like `client.get_shdi`. Geometries not intersecting with any GDL
+            region are omitted.
+        """
+        total_areas = np.asarray([get_polygon_area(g) for g in geometries])
+        rows, regions, areas = [], [], []
+        for i, geometry in enumerate(geometries):
+            for j in self.query(geometry):
+                if self.prepared[j].contains(geometry):
+                    # Most hex-cells are within a single region
+                    area = total_areas[i]
+                elif self.prepared[j].intersects(geometry):
+                    area = get_polygon_area(self.geometries[j].intersection(geometry))
+                else:
+                    continue
+                rows.append(i)
+                regions.append(j)
+                areas.append(area)
+        if not rows:
+            return []
+        rows = np.asarray(rows, dtype=int)
+        regions = np.asarray(regions, dtype=int)
+        weights = np.asarray(areas) / total_areas[rows]
+        shdi = np.bincount(
+            rows,
+            weights=weights * self.values[regions],
+            minlength=len(geometries),
+        )
+        return [
+            {"shdi": float(shdi[i]), "rownumber": int(i) + 1} for i in np.unique(rows)
+        ]
+
+
+def get_polygon_area(geometry) -> float:
+    """Get geodesic area of the polygonal parts of a shapely geometry in km²."""
+    if geometry.geom_type in ("Polygon", "MultiPolygon"):
+        return get_area(mapping(geometry))
+    if geometry.geom_type == "GeometryCollection":
+        return sum(get_polygon_area(g) for g in geometry.geoms)
+    return 0.0
+
+
+_index: Optional[ShdiIndex] = None
+_lock: Optional[asyncio.Lock] = None
+_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_index() -> ShdiIndex:
+    """Get the process-wide SHDI index. It is loaded from the geodatabase once."""
+    global _index, _lock, _lock_loop
+    # Lock needs to be created inside of the event loop
+    loop = asyncio.get_running_loop()
+    if _lock is None or _lock_loop is not loop:
+        _lock = asyncio.Lock()
+        _lock_loop = loop
+    async with _lock:
+        if _index is None:
+            logging.info("Load SHDI index")
+            async with db_client.get_connection() as conn:
+                records = await conn.fetch(SELECT_SHDI_REGIONS)
+            _index = await loop.run_in_executor(None, build_index, records)
+    return _index
+
+
+def build_index(records: list) -> ShdiIndex:
+    return ShdiIndex(
+        geometries=[wkb.loads(bytes(r["geom"])) for r in records],
+        values=[r["shdi"] for r in records],
+    )
+
+
+async def get_shdi(bpoly: Union[Feature, FeatureCollection]) -> List[dict]:
+    """Get Subnational Human Development Index (SHDI) for a bounding polygon.
+
+    Computed in-process by the SHDI index if enabled (`shdi_index`). Otherwise
+    computed by the geodatabase (See `client.get_shdi`).
+    """
+    if not get_config_flag("shdi_index"):
+        return await db_client.get_shdi(bpoly)
+    if isinstance(bpoly, Feature):
+        geometries = [shape(bpoly.geometry)]
+    elif isinstance(bpoly, FeatureCollection):
+        geometries = [shape(feature.geometry) for feature in bpoly.features]
+    else:
+        raise TypeError(
+            "Expected type `Feature` or `FeatureCollection`. Got `{0}` instead.".format(
+                type(bpoly)
+            )
+        )
+    index = await get_index()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, index.get_shdi, geometries)
@@ -0,0 +1,18 @@
+/* Covariates of the Building Completeness model per hex-cell. */
+/* Static per hex-cell. Computed once by `scripts/build_hexcell_covariates.py`. */
+CREATE TABLE IF NOT EXISTS hexcells_covariates (
+    geohash_id integer PRIMARY KEY,
+    shdi double precision,
+    vnl double precision,
+    ghs_pop double precision,
+    ghs_pop_density double precision,
+    water double precision,
+    very_low_density_rural double precision,
+    low_density_rural double precision,
+    rural_cluster double precision,
+    suburban_or_peri_urban double precision,
+    semi_dense_urban_cluster double precision,
+    dense_urban_cluster double precision,
+    urban_centre double precision,
+    timestamp timestamp with time zone DEFAULT now()
+);
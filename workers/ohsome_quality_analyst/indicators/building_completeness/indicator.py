@@ -1,9 +1,11 @@
 import logging
 import os
+from datetime import datetime, timezone
 from io import StringIO
 from string import Template
+from typing import List, Optional
 
-import dateutil.parser
+import asyncpg
 import geojson
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
@@ -15,10 +17,36 @@ import ohsome_quality_analyst.geodatabase.client as db_client
 from ohsome_quality_analyst.base.indicator import BaseIndicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
 from ohsome_quality_analyst.definitions import get_raster_dataset
+from ohsome_quality_analyst.geodatabase import shdi_index
 from ohsome_quality_analyst.ohsome import client as ohsome_client
 from ohsome_quality_analyst.raster import client as raster_client
 from ohsome_quality_analyst.utils.exceptions import HexCellsNotFoundError
 
+WORKING_DIR = os.path.dirname(os.path.abspath(__file__))
+SELECT_HEX_CELLS = db_client.load_sql("select_hex_cells.sql", directory=WORKING_DIR)
+SELECT_HEX_CELLS_COVARIATES = db_client.load_sql(
+    "select_hex_cells_covariates.sql",
+    directory=WORKING_DIR,
+)
+CREATE_COVARIATES_TABLE = db_client.load_sql(
+    "create_covariates_table.sql",
+    directory=WORKING_DIR,
+)
+SAVE_COVARIATES = db_client.load_sql("save_covariates.sql", directory=WORKING_DIR)
+
+# GHSL SMOD L2 classes
+SMOD_CLASSES = {
+    30: "urban_centre",
+    23: "dense_urban_cluster",
+    22: "semi_dense_urban_cluster",
+    21: "suburban_or_peri_urban",
+    13: "rural_cluster",
+    12: "low_density_rural",
+    11: "very_low_density_rural",
+    10: "water",
+}
+COVARIATES = ("shdi", "vnl", "ghs_pop", "ghs_pop_density", *SMOD_CLASSES.values())
+
 
 class BuildingCompleteness(BaseIndicator):
     """Building Completeness Indicator
@@ -47,8 +75,11 @@ class BuildingCompleteness(BaseIndicator):
 
     The spatial resolution of the model are hex-cells (DGGRID ISEA 3H World Resolution
     12). The input AOI is split into hex-cells and the prediction is done for each of
-    those. The model is trained on hex-cells in Africa. Therefor the Indicator is
-    restricted to input AOI within the bounding box of Africa.
+    those. Covariates are static per hex-cell. They are precomputed and stored in the
+    geodatabase (See `scripts/build_hexcell_covariates.py`). Only if they are missing
+    for a hex-cell they are computed on request. The model is trained on hex-cells in
+    Africa. Therefor the Indicator is restricted to input AOI within the bounding box
+    of Africa.
 
     The training data and code of the model training are accessible at:
     https://gitlab.gistools.geog.uni-heidelberg.de/giscience/big-data/ohsome/ml-models/building-completeness-model
@@ -84,38 +115,24 @@ class BuildingCompleteness(BaseIndicator):
         # Get hex-cells
         hex_cells: FeatureCollection = await get_hex_cells(self.feature)
         self.hex_cell_geohash = [feature.id for feature in hex_cells.features]
-        # Get OSM data
-        query_results = await ohsome_client.query(
+        # Get covariates (input parameters or X) before querying the ohsome API.
+        # Precomputed covariates are removed from the properties of the hex-cells.
+        covariates = await get_covariates(hex_cells)
+        covariates["shdi"] = fill_missing_shdi(covariates["shdi"])
+        self.covariates = covariates
+        # Get OSM data. The result of each hex-cell is read as soon as it has been
+        # received instead of holding the whole response in memory.
+        self.building_area_osm = []
+        async for arrays in ohsome_client.query_arrays(
             self.layer,
             hex_cells,
             group_by_boundary=True,
+        ):
+            self.building_area_osm.append(float(arrays.values[0]))
+            timestamp = arrays.timestamps[0]
+        self.result.timestamp_osm = timestamp.astype(datetime).replace(
+            tzinfo=timezone.utc
         )
-        # Extract OSM data
-        self.result.timestamp_osm = dateutil.parser.isoparse(
-            query_results["groupByResult"][0]["result"][0]["timestamp"]
-        )
-        self.building_area_osm = [
-            item["result"][0]["value"] for item in query_results["groupByResult"]
-        ]
-        # Get covariates (input parameters or X)
-        ghs_pop = raster_client.get_zonal_stats(
-            hex_cells,
-            get_raster_dataset("GHS_POP_R2019A"),
-            stats=["sum"],
-        )
-        vnl = raster_client.get_zonal_stats(
-            hex_cells,
-            get_raster_dataset("VNL"),
-            stats=["sum"],
-        )
-        self.covariates["shdi"] = await get_shdi(hex_cells)
-        self.covariates["vnl"] = [i["sum"] for i in vnl]
-        self.covariates["ghs_pop"] = [i["sum"] or 0 for i in ghs_pop]
-        self.covariates["ghs_pop_density"] = [
-            pop / cell.properties["area"]
-            for pop, cell in zip(self.covariates["ghs_pop"], hex_cells["features"])
-        ]
-        self.covariates.update(get_smod_class_share(hex_cells))
 
     def calculate(self) -> None:
         if len(self.covariates.keys()) != 12:
@@ -212,22 +229,12 @@ def get_smod_class_share(featurecollection: FeatureCollection) -> dict:
         list: List of dictionaries where the keys are the category names and the values
             are the share of the class (0, 1).
     """
-    category_map = {
-        30: "urban_centre",
-        23: "dense_urban_cluster",
-        22: "semi_dense_urban_cluster",
-        21: "suburban_or_peri_urban",
-        13: "rural_cluster",
-        12: "low_density_rural",
-        11: "very_low_density_rural",
-        10: "water",
-    }
     # Get a dict containing unique raster values as keys and pixel counts as values
     class_count = raster_client.get_zonal_stats(
         featurecollection,
         get_raster_dataset("GHS_SMOD_R2019A"),
         categorical=True,
-        category_map=category_map,
+        category_map=SMOD_CLASSES,
     )
     pixel_count = raster_client.get_zonal_stats(
         featurecollection,
@@ -236,7 +243,7 @@ def get_smod_class_share(featurecollection: FeatureCollection) -> dict:
     )
     pixel_count = [i["count"] for i in pixel_count]
     shares = {}
-    for category in category_map.values():
+    for category in SMOD_CLASSES.values():
         shares[category] = [
             c.get(category, 0) / p for c, p in zip(class_count, pixel_count)
         ]
@@ -246,38 +253,115 @@ def get_smod_class_share(featurecollection: FeatureCollection) -> dict:
 async def get_hex_cells(feature: Feature) -> FeatureCollection:
     """Select hex-cells which are intersecting with features of a FeatureCollection.
 
+    Precomputed covariates are part of the properties of each hex-cell (See
+    `get_precomputed_covariates`).
+
     Raises:
         HexCellsNotFoundError
     """
-    file_path = os.path.join(
-        os.path.dirname(
-            os.path.abspath(__file__),
-        ),
-        "select_hex_cells.sql",
-    )
-    with open(file_path, "r") as file:
-        query = file.read()
     async with db_client.get_connection() as conn:
-        record = await conn.fetchrow(query, str(feature.geometry))
+        try:
+            record = await conn.fetchrow(
+                SELECT_HEX_CELLS_COVARIATES,
+                str(feature.geometry),
+            )
+        except asyncpg.UndefinedTableError:
+            logging.warning("Covariates of hex-cells have not been precomputed.")
+            record = await conn.fetchrow(SELECT_HEX_CELLS, str(feature.geometry))
     feature_collection = geojson.loads(record[0])
     if feature_collection["features"] is None:
         raise HexCellsNotFoundError
     return feature_collection
 
 
-async def get_shdi(featurecollection: FeatureCollection) -> list:
+def get_precomputed_covariates(hex_cells: FeatureCollection) -> List[Optional[dict]]:
+    """Get precomputed covariates of the hex-cells and remove them from the properties.
+
+    Returns:
+        Covariates by name for each hex-cell. None for hex-cells without precomputed
+        covariates.
+    """
+    return [
+        cell["properties"].pop("covariates", None) for cell in hex_cells["features"]
+    ]
+
+
+async def get_covariates(hex_cells: FeatureCollection) -> dict:
+    """Get covariates of the hex-cells.
+
+    Precomputed covariates are used if present (See `get_precomputed_covariates`).
+    Covariates are computed only for the hex-cells without precomputed covariates.
+
+    Returns:
+        Lists of covariates by name.
+    """
+    covariates = get_precomputed_covariates(hex_cells)
+    missing = [i for i, c in enumerate(covariates) if c is None]
+    if missing:
+        logging.info(
+            "Covariates of {0} of {1} hex-cells are not precomputed. "
+            "Compute covariates.".format(len(missing), len(covariates))
+        )
+        computed = await compute_covariates(
+            FeatureCollection(features=[hex_cells["features"][i] for i in missing])
+        )
+        for j, i in enumerate(missing):
+            covariates[i] = {name: computed[name][j] for name in COVARIATES}
+    return {name: [c.get(name) for c in covariates] for name in COVARIATES}
+
+
+async def compute_covariates(hex_cells: FeatureCollection) -> dict:
+    """Compute covariates of the hex-cells.
+
+    The area of each hex-cell is expected to be given as property (`area`). SHDI
+    values of hex-cells which do not intersect with the SHDI geometries are None (See
+    `fill_missing_shdi`).
+    """
+    covariates = get_raster_covariates(hex_cells)
+    covariates["shdi"] = await get_shdi(hex_cells)
+    return covariates
+
+
+def get_raster_covariates(hex_cells: FeatureCollection) -> dict:
+    """Compute the covariates of the hex-cells derived from raster datasets."""
+    ghs_pop = raster_client.get_zonal_stats(
+        hex_cells,
+        get_raster_dataset("GHS_POP_R2019A"),
+        stats=["sum"],
+    )
+    vnl = raster_client.get_zonal_stats(
+        hex_cells,
+        get_raster_dataset("VNL"),
+        stats=["sum"],
+    )
+    covariates = {}
+    covariates["vnl"] = [i["sum"] for i in vnl]
+    covariates["ghs_pop"] = [i["sum"] or 0 for i in ghs_pop]
+    covariates["ghs_pop_density"] = [
+        pop / cell["properties"]["area"]
+        for pop, cell in zip(covariates["ghs_pop"], hex_cells["features"])
+    ]
+    covariates.update(get_smod_class_share(hex_cells))
+    return covariates
+
+
+async def get_shdi(featurecollection: FeatureCollection) -> List[Optional[float]]:
     """Get SHDI values for each feature.
 
-    If feature does not intersect with the SHDI geometry take the mean of all present
-    SHDI values.
+    If feature does not intersect with the SHDI geometry the value is None. Computed
+    in-process if the SHDI index is enabled (See `shdi_index`).
     """
-    records = await db_client.get_shdi(featurecollection)
-    if len(records) == len(featurecollection):
-        return [r["shdi"] for r in records]
-    else:
-        # Not every feature has a SHDI value
-        default = np.mean([r["shdi"] for r in records])  # Default value
-        shdi = [default for _ in featurecollection.features]  # List of default values
-        for r in records:
-            shdi[r["rownumber"] - 1] = r["shdi"]  # Overwrite default values
+    records = await shdi_index.get_shdi(featurecollection)
+    shdi = [None for _ in featurecollection["features"]]
+    for r in records:
+        shdi[r["rownumber"] - 1] = r["shdi"]
+    return shdi
+
+
+def fill_missing_shdi(shdi: List[Optional[float]]) -> List[float]:
+    """Replace missing SHDI values by the mean of all present SHDI values."""
+    present = [value for value in shdi if value is not None]
+    if len(present) == len(shdi):
         return shdi
+    default = np.mean(present)
+    return [default if value is None else value for value in shdi]
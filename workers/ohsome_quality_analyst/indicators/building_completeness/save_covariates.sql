@@ -0,0 +1,5 @@
+INSERT INTO hexcells_covariates (geohash_id, shdi, vnl, ghs_pop, ghs_pop_density, water, very_low_density_rural, low_density_rural, rural_cluster, suburban_or_peri_urban, semi_dense_urban_cluster, dense_urban_cluster, urban_centre)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+ON CONFLICT (geohash_id)
+    DO UPDATE SET
+        (shdi, vnl, ghs_pop, ghs_pop_density, water, very_low_density_rural, low_density_rural, rural_cluster, suburban_or_peri_urban, semi_dense_urban_cluster, dense_urban_cluster, urban_centre, timestamp) = (excluded.shdi, excluded.vnl, excluded.ghs_pop, excluded.ghs_pop_density, excluded.water, excluded.very_low_density_rural, excluded.low_density_rural, excluded.rural_cluster, excluded.suburban_or_peri_urban, excluded.semi_dense_urban_cluster, excluded.dense_urban_cluster, excluded.urban_centre, now());
@@ -0,0 +1,34 @@
+WITH bpoly AS (
+    SELECT
+        ST_Setsrid (public.ST_GeomFromGeoJSON ($1), 4326) AS geom
+)
+SELECT
+    row_to_json(feature_collection)
+FROM (
+    SELECT
+        'FeatureCollection' AS "type",
+        array_to_json(array_agg(feature)) AS "features"
+    FROM (
+        SELECT
+            'Feature' AS "type",
+            /* Make sure to conform with RFC7946 by using WGS84 lon, lat*/
+            ST_AsGeoJSON (ST_Transform (hexcells.wkb_geometry, 4326), 6)::json AS "geometry",
+            hexcells.geohash_id AS "id",
+            (
+                SELECT
+                    json_strip_nulls (row_to_json(t))
+                FROM (
+                    SELECT
+                        ST_Area (hexcells.wkb_geometry::geography) AS area,
+                        /* Precomputed covariates or null if not computed yet */
+                        CASE WHEN covariates.geohash_id IS NULL THEN
+                            NULL
+                        ELSE
+                            json_build_object('shdi', covariates.shdi, 'vnl', covariates.vnl, 'ghs_pop', covariates.ghs_pop, 'ghs_pop_density', covariates.ghs_pop_density, 'water', covariates.water, 'very_low_density_rural', covariates.very_low_density_rural, 'low_density_rural', covariates.low_density_rural, 'rural_cluster', covariates.rural_cluster, 'suburban_or_peri_urban', covariates.suburban_or_peri_urban, 'semi_dense_urban_cluster', covariates.semi_dense_urban_cluster, 'dense_urban_cluster', covariates.dense_urban_cluster, 'urban_centre', covariates.urban_centre)
+                        END AS covariates) AS t) AS "properties"
+            FROM
+                hexcells
+            LEFT JOIN hexcells_covariates AS covariates ON covariates.geohash_id = hexcells.geohash_id,
+            bpoly
+        WHERE
+            ST_Intersects (hexcells.wkb_geometry, bpoly.geom)) AS feature) AS feature_collection;
@@ -1,6 +1,7 @@
 import logging
 from io import StringIO
 from string import Template
+from typing import Dict
 
 import dateutil.parser
 import geojson
@@ -8,6 +9,7 @@ import matplotlib.pyplot as plt
 
 from ohsome_quality_analyst.base.indicator import BaseIndicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
+from ohsome_quality_analyst.base.requirement import OhsomeQuery, Requirement
 from ohsome_quality_analyst.ohsome import client as ohsome_client
 
 
@@ -47,8 +49,7 @@ class Currentness(BaseIndicator):
         self.end = None
         self.low_contributions_threshold = 0
 
-    async def preprocess(self) -> None:
-        """Get absolute number of contributions for each year since given start date"""
+    async def requirements(self) -> Dict[str, Requirement]:
         latest_ohsome_stamp = await ohsome_client.get_latest_ohsome_timestamp()
         self.end = latest_ohsome_stamp.strftime("%Y-%m-%d")
         past_years_interval = "{0}/{1}/{2}".format(self.start, self.end, "P1Y")
@@ -56,26 +57,33 @@ class Currentness(BaseIndicator):
             "{0}-01-01".format(latest_ohsome_stamp.year),
             self.end,
         )
-        # Fetch number of features
-        response = await ohsome_client.query(self.layer, self.feature)
+        return {
+            # Number of features
+            "count": OhsomeQuery(self.layer),
+            # All contributions of past years
+            "contributions_yearly": OhsomeQuery(
+                self.layer,
+                time=past_years_interval,
+                count_latest_contributions=True,
+            ),
+            # Contributions of current year
+            "contributions_current_year": OhsomeQuery(
+                self.layer,
+                time=current_year_interval,
+                count_latest_contributions=True,
+            ),
+        }
+
+    async def preprocess(self) -> None:
+        """Get absolute number of contributions for each year since given start date"""
+        inputs = await self.get_inputs()
+        response = inputs["count"]
         self.element_count = response["result"][0]["value"]
         self.result.timestamp_osm = dateutil.parser.isoparse(
             response["result"][0]["timestamp"]
         )
-        # Fetch all contributions of past years
-        contributions_yearly = await ohsome_client.query(
-            self.layer,
-            self.feature,
-            time=past_years_interval,
-            count_latest_contributions=True,
-        )
-        # Fetch contributions of current year
-        contributions_current_year = await ohsome_client.query(
-            self.layer,
-            self.feature,
-            time=current_year_interval,
-            count_latest_contributions=True,
-        )
+        contributions_yearly = inputs["contributions_yearly"]
+        contributions_current_year = inputs["contributions_current_year"]
         # Merge contributions
         contributions = (
             contributions_yearly["result"] + contributions_current_year["result"]
@@ -1,6 +1,7 @@
 import logging
 from io import StringIO
 from string import Template
+from typing import Dict
 
 import dateutil.parser
 import matplotlib.pyplot as plt
@@ -9,10 +10,13 @@ from geojson import Feature
 
 from ohsome_quality_analyst.base.indicator import BaseIndicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
-from ohsome_quality_analyst.definitions import get_attribution, get_raster_dataset
-from ohsome_quality_analyst.geodatabase.client import get_area_of_bpolys
-from ohsome_quality_analyst.ohsome import client as ohsome_client
-from ohsome_quality_analyst.raster.client import get_zonal_stats
+from ohsome_quality_analyst.base.requirement import (
+    Area,
+    OhsomeQuery,
+    Requirement,
+    ZonalStats,
+)
+from ohsome_quality_analyst.definitions import get_attribution
 
 
 class GhsPopComparisonRoads(BaseIndicator):
@@ -44,16 +48,23 @@ class GhsPopComparisonRoads(BaseIndicator):
         else:
             return 5
 
+    async def requirements(self) -> Dict[str, Requirement]:
+        return {
+            "pop_count": ZonalStats("GHS_POP_R2019A", ("sum",)),
+            "area": Area(),
+            "length": OhsomeQuery(self.layer),
+        }
+
     async def preprocess(self) -> None:
-        raster = get_raster_dataset("GHS_POP_R2019A")
-        pop_count = get_zonal_stats(self.feature, raster, stats="sum")[0]["sum"]
-        area = await get_area_of_bpolys(self.feature.geometry)
+        inputs = await self.get_inputs()
+        pop_count = inputs["pop_count"][0]["sum"]
+        area = inputs["area"]
         if pop_count is None:
             pop_count = 0
         self.area = area
         self.pop_count = pop_count
 
-        query_results = await ohsome_client.query(self.layer, self.feature)
+        query_results = inputs["length"]
         # results in meter, we need km
         self.feature_length = query_results["result"][0]["value"] / 1000
         timestamp = query_results["result"][0]["timestamp"]
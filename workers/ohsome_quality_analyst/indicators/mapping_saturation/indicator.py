@@ -1,7 +1,7 @@
 import logging
 from io import StringIO
 from string import Template
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -11,8 +11,8 @@ from rpy2.rinterface_lib.embedded import RRuntimeError
 
 from ohsome_quality_analyst.base.indicator import BaseIndicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
+from ohsome_quality_analyst.base.requirement import OhsomeQuery, Requirement
 from ohsome_quality_analyst.indicators.mapping_saturation import models
-from ohsome_quality_analyst.ohsome import client as ohsome_client
 
 
 class MappingSaturation(BaseIndicator):
@@ -60,12 +60,11 @@ class MappingSaturation(BaseIndicator):
         self.best_fit: Optional[models.BaseStatModel] = None
         self.fitted_models: List[models.BaseStatModel] = []
 
+    async def requirements(self) -> Dict[str, Requirement]:
+        return {"series": OhsomeQuery(self.layer, time=self.time_range, series=True)}
+
     async def preprocess(self) -> None:
-        query_results = await ohsome_client.query(
-            self.layer,
-            self.feature,
-            time=self.time_range,
-        )
+        query_results = (await self.get_inputs())["series"]
         for item in query_results["result"]:
             self.values.append(item["value"])
             self.timestamps.append(isoparse(item["timestamp"]))
@@ -1,12 +1,13 @@
 """An Indicator for testing purposes."""
 from string import Template
+from typing import Dict
 
 import dateutil.parser
 from geojson import Feature
 
 from ohsome_quality_analyst.base.indicator import BaseIndicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
-from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.base.requirement import OhsomeQuery, Requirement
 
 
 class Minimal(BaseIndicator):
@@ -14,8 +15,11 @@ class Minimal(BaseIndicator):
         super().__init__(layer=layer, feature=feature)
         self.count = 0
 
+    async def requirements(self) -> Dict[str, Requirement]:
+        return {"count": OhsomeQuery(self.layer)}
+
     async def preprocess(self) -> None:
-        query_results = await ohsome_client.query(self.layer, self.feature)
+        query_results = (await self.get_inputs())["count"]
         self.count = query_results["result"][0]["value"]
         self.result.timestamp_osm = dateutil.parser.isoparse(
             query_results["result"][0]["timestamp"]
@@ -1,6 +1,7 @@
 import logging
 from io import StringIO
 from string import Template
+from typing import Dict
 
 import dateutil.parser
 import matplotlib.pyplot as plt
@@ -9,8 +10,7 @@ from geojson import Feature
 
 from ohsome_quality_analyst.base.indicator import BaseIndicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
-from ohsome_quality_analyst.geodatabase.client import get_area_of_bpolys
-from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.base.requirement import Area, OhsomeQuery, Requirement
 
 # threshold values defining the color of the traffic light
 # derived directly from sketchmap_fitness repo
@@ -30,9 +30,13 @@ class PoiDensity(BaseIndicator):
     def yellow_threshold_function(self, area):
         return self.threshold_red * area
 
+    async def requirements(self) -> Dict[str, Requirement]:
+        return {"count": OhsomeQuery(self.layer), "area": Area()}
+
     async def preprocess(self) -> None:
-        query_results_count = await ohsome_client.query(self.layer, self.feature)
-        self.area_sqkm = await get_area_of_bpolys(self.feature.geometry)
+        inputs = await self.get_inputs()
+        query_results_count = inputs["count"]
+        self.area_sqkm = inputs["area"]
         self.count = query_results_count["result"][0]["value"]
         timestamp = query_results_count["result"][0]["timestamp"]
         self.result.timestamp_osm = dateutil.parser.isoparse(timestamp)
@@ -1,6 +1,7 @@
 import logging
 from io import StringIO
 from string import Template
+from typing import Dict
 
 import dateutil.parser
 import matplotlib.patches as mpatches
@@ -9,7 +10,7 @@ from geojson import Feature
 
 from ohsome_quality_analyst.base.indicator import BaseIndicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
-from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.base.requirement import OhsomeQuery, Requirement
 
 
 class TagsRatio(BaseIndicator):
@@ -20,12 +21,11 @@ class TagsRatio(BaseIndicator):
         self.count_all = None
         self.count_match = None
 
+    async def requirements(self) -> Dict[str, Requirement]:
+        return {"ratio": OhsomeQuery(self.layer, ratio=True)}
+
     async def preprocess(self) -> None:
-        query_results_count = await ohsome_client.query(
-            self.layer,
-            self.feature,
-            ratio=True,
-        )
+        query_results_count = (await self.get_inputs())["ratio"]
         self.result.value = query_results_count["ratioResult"][0]["ratio"]
         self.count_all = query_results_count["ratioResult"][0]["value"]
         self.count_match = query_results_count["ratioResult"][0]["value2"]
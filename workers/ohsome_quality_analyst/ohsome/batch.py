@@ -0,0 +1,131 @@
+"""Batch identical queries for different bounding polygons into one request.
+
+Indicators created for the features of a FeatureCollection issue the same queries
+(same endpoint, filter and time) for different bounding polygons. Inside of a batch
+those queries are collected and send as one "group by boundary" request to the ohsome
+API. The result of each boundary is handed back to the respective caller in the
+format of a query without grouping.
+
+Only queries of absolute values are batched. Ratio queries and queries of the latest
+contributions are sent as they are (See `client.query`).
+"""
+
+import asyncio
+import json
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from geojson import Feature, FeatureCollection
+
+from ohsome_quality_analyst.utils.exceptions import OhsomeApiError
+
+current_batch: ContextVar[Optional["QueryBatch"]] = ContextVar(
+    "current_batch", default=None
+)
+
+
+class _Group:
+    def __init__(self, url: str, data: dict) -> None:
+        self.url = url
+        self.data = data
+        self.members: List[Tuple[Feature, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class QueryBatch:
+    """Collect queries and execute them as "group by boundary" requests.
+
+    A group of queries is executed once the number of queries equals the size of the
+    batch (E.g. number of features) or when the time window has passed since the first
+    query of the group has been added.
+
+    Args:
+        size: Expected number of queries per group (Number of bounding polygons).
+        window: Time in seconds to wait for the group to be complete.
+        execute: Coroutine function executing and validating a query given URL,
+            data dictionary and group by boundary (keyword) arguments.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        window: float,
+        execute: Callable[..., Awaitable[dict]],
+    ) -> None:
+        self.size = size
+        self.window = window
+        self.execute = execute
+        self._groups: Dict[str, _Group] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def query(self, url: str, data: dict, bpolys: Feature) -> dict:
+        """Add query to the batch and await the result for the bounding polygon."""
+        group_data = {k: v for k, v in data.items() if k != "bpolys"}
+        key = json.dumps([url, group_data], sort_keys=True)
+        group = self._groups.get(key)
+        if group is None:
+            group = _Group(url, group_data)
+            self._groups[key] = group
+            group.timer = asyncio.get_running_loop().call_later(
+                self.window, self._flush, key
+            )
+        future = asyncio.get_running_loop().create_future()
+        group.members.append((bpolys, future))
+        if len(group.members) >= self.size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: str) -> None:
+        group = self._groups.pop(key, None)
+        if group is None:
+            return  # Group has already been flushed
+        group.timer.cancel()
+        task = asyncio.create_task(self._execute(group))
+        # Keep a reference to the task to avoid garbage collection
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, group: _Group) -> None:
+        futures = [future for _, future in group.members]
+        try:
+            if len(group.members) == 1:
+                bpolys = FeatureCollection([group.members[0][0]])
+                data = {**group.data, "bpolys": json.dumps(bpolys)}
+                results = [await self.execute(group.url, data, group_by_boundary=False)]
+            else:
+                # Boundaries are identified by their index in the batch
+                bpolys = FeatureCollection(
+                    [
+                        Feature(id=str(i), geometry=feature["geometry"])
+                        for i, (feature, _) in enumerate(group.members)
+                    ]
+                )
+                data = {**group.data, "bpolys": json.dumps(bpolys)}
+                response = await self.execute(
+                    group.url + "/groupBy/boundary", data, group_by_boundary=True
+                )
+                results = [None] * len(futures)
+                for result in split_group_by_result(response):
+                    results[int(result.pop("groupByObject"))] = result
+        except Exception as error:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, result in zip(futures, results):
+            if future.done():
+                continue  # Caller has been cancelled
+            if result is None:
+                future.set_exception(
+                    OhsomeApiError("Result for boundary is missing in ohsome response.")
+                )
+            else:
+                future.set_result(result)
+
+
+def split_group_by_result(response: dict) -> List[dict]:
+    """Split a "group by boundary" response into one response per boundary."""
+    return [
+        {"groupByObject": item["groupByObject"], "result": item["result"]}
+        for item in response["groupByResult"]
+    ]
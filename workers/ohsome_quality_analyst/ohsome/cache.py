@@ -0,0 +1,206 @@
+"""Cache for responses of the ohsome API.
+
+Responses of the ohsome API can only change if the data snapshot of the ohsome API
+(`toTimestamp` of the `/metadata` endpoint) advances. All cache entries belong to the
+snapshot which was current when they have been stored. Once a new snapshot is reported
+all entries are invalidated (See `metadata.MetadataService`).
+
+The cache consists of two tiers:
+    1. An in-process LRU cache (size is configurable)
+    2. An optional on-disk store (enabled by configuring a cache directory)
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+from collections import Counter, OrderedDict
+from copy import deepcopy
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from ohsome_quality_analyst.config import get_config_value
+
+
+class LRUCache:
+    """In-process least recently used (LRU) cache."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.stats: Counter = Counter()
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return deepcopy(value)
+
+    def set(self, key: str, value: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = deepcopy(value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def delete(self, key: str) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        self.stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+
+    def keys(self) -> List[str]:
+        return list(self._entries.keys())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """On-disk cache. Entries are stored as JSON files in one directory per snapshot."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.stats: Counter = Counter()
+
+    def _path(self, snapshot: str, key: str) -> str:
+        return os.path.join(self.directory, snapshot, key + ".json")
+
+    def get(self, snapshot: str, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(snapshot, key), "r") as file:
+                value = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, snapshot: str, key: str, value: dict) -> None:
+        path = self._path(snapshot, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to temporary file first to never expose incomplete entries
+        tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        with open(tmp_path, "w") as file:
+            json.dump(value, file)
+        os.replace(tmp_path, path)
+
+    def clear(self, keep: Optional[str] = None) -> None:
+        """Remove all snapshot directories except the one to keep."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name != keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+                self.stats["invalidations"] += 1
+
+
+class ResponseCache:
+    """Tiered cache of ohsome API responses bound to the current data snapshot."""
+
+    def __init__(self, maxsize: int, directory: Optional[str] = None) -> None:
+        self.memory = LRUCache(maxsize)
+        self.disk = DiskCache(directory) if directory else None
+        self.snapshot: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory.maxsize > 0 or self.disk is not None
+
+    def set_snapshot(self, timestamp: datetime.datetime) -> None:
+        """Set the current data snapshot. Invalidate all entries if it has changed."""
+        snapshot = timestamp.strftime("%Y%m%dT%H%M")
+        if snapshot == self.snapshot:
+            return
+        if self.snapshot is not None:
+            logging.info(
+                "New ohsome API data snapshot ({0}). Invalidate cache.".format(snapshot)
+            )
+        self.snapshot = snapshot
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear(keep=snapshot)
+
+    async def get(self, url: str, data: dict) -> Optional[dict]:
+        if self.snapshot is None:
+            return None
+        key = build_cache_key(url, data)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            loop = asyncio.get_running_loop()
+            value = await loop.run_in_executor(None, self.disk.get, self.snapshot, key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    async def set(
+        self, url: str, data: dict, value: dict, snapshot: Optional[str]
+    ) -> None:
+        """Store a response under the snapshot which was current before requesting it.
+
+        The response is dropped if the snapshot has changed in the meantime. It might
+        belong to either snapshot.
+        """
+        if snapshot is None or snapshot != self.snapshot:
+            return
+        key = build_cache_key(url, data)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.disk.set, snapshot, key, value)
+
+    def get_stats(self) -> dict:
+        stats = {
+            "snapshot": self.snapshot,
+            "size": len(self.memory),
+            "maxsize": self.memory.maxsize,
+            "memory": dict(self.memory.stats),
+        }
+        if self.disk is not None:
+            stats["disk"] = dict(self.disk.stats)
+        return stats
+
+
+def build_cache_key(url: str, data: dict) -> str:
+    """Build a cache key from endpoint, filter, filter2, bpolys and time.
+
+    The bounding polygons are normalized (sorted keys, no whitespace) before hashing.
+    """
+    bpolys = json.dumps(
+        json.loads(data["bpolys"]),
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    key = {
+        "endpoint": urlparse(url).path,
+        "filter": data.get("filter"),
+        "filter2": data.get("filter2"),
+        "bpolys": hashlib.sha256(bpolys.encode()).hexdigest(),
+        "time": data.get("time"),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> ResponseCache:
+    """Get the process-wide response cache. It is created on first usage."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            maxsize=int(get_config_value("ohsome_cache_size")),
+            directory=get_config_value("ohsome_cache_dir") or None,
+        )
+    return _cache
@@ -1,24 +1,48 @@
+import asyncio
 import datetime
 import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
 from functools import singledispatch
-from typing import Optional, Union
+from typing import Any, AsyncIterator, List, Optional, Tuple, Union
 
-import geojson
 import httpx
 from dateutil.parser import isoparse
 from geojson import Feature, FeatureCollection
 from schema import Or, Schema, SchemaError, Use
 
-# `geojson` uses `simplejson` if it is installed
-try:
-    from simplejson import JSONDecodeError
-except ImportError:
-    from json import JSONDecodeError
-
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
 from ohsome_quality_analyst.base.layer import LayerData, LayerDefinition
-from ohsome_quality_analyst.config import get_config_value
+from ohsome_quality_analyst.config import get_config_flag, get_config_value
+from ohsome_quality_analyst.ohsome import (
+    batch,
+    cache,
+    controller,
+    metadata,
+    series,
+    shard,
+    stream,
+    tile,
+    transport,
+)
+from ohsome_quality_analyst.ohsome.single_flight import SingleFlight
 from ohsome_quality_analyst.utils.exceptions import LayerDataSchemaError, OhsomeApiError
+from ohsome_quality_analyst.utils.geometry import get_area
+
+# A single HTTP client (connection pool) is shared by all requests to the ohsome API.
+# It is bound to the event loop it has been created in.
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_transport: Optional[transport.PoolTransport] = None
+_pool_stats: Counter = Counter()
+# Identical requests in flight are coalesced
+single_flight = SingleFlight()
+_controller: Optional[controller.Controller] = None
+_controller_loop: Optional[asyncio.AbstractEventLoop] = None
+# Latency of time-series queries is observed to split long time ranges
+latency_model = shard.LatencyModel()
 
 
 @singledispatch
@@ -53,9 +77,136 @@ async def _(
             OSM data.
     """
     url = build_url(layer, ratio, group_by_boundary, count_latest_contributions)
+    tiles = plan_tiles(layer, bpolys, group_by_boundary, count_latest_contributions)
+    if len(tiles) > 1:
+        # Query tiles concurrently as separate requests (not as part of a batch) and
+        # sum up their results
+        token = batch.current_batch.set(None)
+        try:
+            responses = await asyncio.gather(
+                *(query_time_series(url, layer, t, time, ratio, False) for t in tiles)
+            )
+        finally:
+            batch.current_batch.reset(token)
+        return tile.merge_responses(responses, ratio)
+    # The ohsome API has no "group by boundary" endpoint for the latest contributions.
+    # Ratio queries are not batched because their "group by boundary" response has a
+    # different format.
+    batchable = not ratio and not count_latest_contributions
+    return await query_time_series(
+        url, layer, bpolys, time, ratio, group_by_boundary, batchable
+    )
+
+
+async def query_time_series(
+    url: str,
+    layer: LayerDefinition,
+    bpolys: Union[Feature, FeatureCollection],
+    time: Optional[str],
+    ratio: bool,
+    group_by_boundary: bool,
+    batchable: bool = True,
+) -> dict:
+    time_ranges, cost = await plan_time_shards(bpolys, time)
+    if len(time_ranges) > 1:
+        # Query sub-ranges concurrently and merge them into one series
+        cost /= len(time_ranges)
+        responses = await asyncio.gather(
+            *(
+                _query(
+                    url,
+                    layer,
+                    bpolys,
+                    time_range,
+                    ratio,
+                    group_by_boundary,
+                    cost,
+                    batchable,
+                )
+                for time_range in time_ranges
+            )
+        )
+        return shard.merge_responses(responses)
+    return await _query(
+        url, layer, bpolys, time, ratio, group_by_boundary, cost, batchable
+    )
+
+
+async def _query(
+    url: str,
+    layer: LayerDefinition,
+    bpolys: Union[Feature, FeatureCollection],
+    time: Optional[str],
+    ratio: bool,
+    group_by_boundary: bool,
+    cost: Optional[float] = None,
+    batchable: bool = True,
+) -> dict:
     data = build_data_dict(layer, bpolys, time, ratio)
-    response = await query_ohsome_api(url, data)
-    return validate_query_results(response, ratio, group_by_boundary)
+    query_batch = batch.current_batch.get()
+    batchable = batchable and not group_by_boundary and isinstance(bpolys, Feature)
+    if query_batch is not None and batchable:
+        return await query_batch.query(url, data, bpolys)
+    return await execute_query(url, data, ratio, group_by_boundary, cost)
+
+
+def plan_tiles(
+    layer: LayerDefinition,
+    bpolys: Union[Feature, FeatureCollection],
+    group_by_boundary: bool,
+    count_latest_contributions: bool,
+) -> List[Union[Feature, FeatureCollection]]:
+    """Cut a large AOI into tiles to be queried concurrently.
+
+    Only queries of additive measures (count, length, area) for a single bounding
+    polygon are tiled (See `tile`).
+    """
+    tile_size = int(get_config_value("ohsome_tile_size"))
+    if (
+        tile_size <= 0
+        or group_by_boundary
+        or not isinstance(bpolys, Feature)
+        or not tile.is_additive(layer, count_latest_contributions)
+    ):
+        return [bpolys]
+    tiles = tile.get_tiles(bpolys, tile_size)
+    if len(tiles) > 1:
+        logging.info("Split bounding polygon into {0} tiles".format(len(tiles)))
+    return tiles
+
+
+async def plan_time_shards(
+    bpolys: Union[Feature, FeatureCollection],
+    time: Optional[str],
+) -> Tuple[List[str], Optional[float]]:
+    """Split a long time range into sub-ranges to be queried concurrently.
+
+    The number of sub-ranges depends on the estimated duration of the query given the
+    area of the AOI and the latency of past queries (See `shard`).
+
+    Returns:
+        Time ranges and cost of the query (`None` if time is not a range with period).
+    """
+    max_shards = int(get_config_value("ohsome_max_shards"))
+    if time is None or max_shards <= 1:
+        return [time], None
+    # Approximate number of timestamps first to fetch the latest timestamp only if
+    # a time range might be split.
+    timestamps = shard.get_timestamps(time, datetime.datetime.utcnow())
+    if timestamps is None:
+        return [time], None
+    area = get_area(bpolys)
+    duration = latency_model.estimate(len(timestamps) * area)
+    target = int(get_config_value("ohsome_shard_duration"))
+    shards = shard.get_shard_count(duration, target, max_shards, len(timestamps))
+    if shards > 1:
+        latest = await metadata_service.get_latest_timestamp()
+        timestamps = shard.get_timestamps(time, latest)
+        shards = shard.get_shard_count(duration, target, max_shards, len(timestamps))
+    cost = len(timestamps) * area
+    if shards > 1:
+        logging.info("Split time range {0} into {1} sub-ranges".format(time, shards))
+    return shard.split_time_range(time, timestamps, shards), cost
 
 
 @query.register
@@ -89,8 +240,304 @@ async def _(
         )
 
 
-async def query_ohsome_api(url: str, data: dict) -> dict:
-    """Query the ohsome API.
+async def query_series(
+    layer: Layer,
+    bpolys: Union[Feature, FeatureCollection],
+    time: str,
+) -> dict:
+    """Query a time series with an open end (E.g. `2008-01-01//P1M`).
+
+    If a series store is configured the stored series is reused. Only timestamps after
+    the last stored timestamp are queried and appended (See `series`). In all other
+    cases this is the same as `query`.
+    """
+    store = series.get_store()
+    parts = time.split("/")
+    if (
+        store is None
+        or not isinstance(layer, LayerDefinition)
+        or len(parts) != 3
+        or parts[1] != ""
+        or shard.parse_period(parts[2]) is None
+    ):
+        return await query(layer, bpolys, time=time)
+    key = series.build_series_key(build_url(layer), layer, bpolys, time)
+    stored = await store.get(key)
+    if stored is None:
+        response = await query(layer, bpolys, time=time)
+        await store.set(key, {"result": response["result"]})
+        return response
+    items = stored["result"]
+    latest = await metadata_service.get_latest_timestamp()
+    last = isoparse(items[-1]["timestamp"]).replace(tzinfo=None)
+    start = last + shard.parse_period(parts[2])
+    if start > latest:
+        return {"result": items}
+    sub_range = "{0}//{1}".format(shard.format_timestamp(start), parts[2])
+    logging.info("Append {0} to stored time series".format(sub_range))
+    response = await query(layer, bpolys, time=sub_range)
+    items = shard.merge_items([items, response["result"]])
+    await store.set(key, {"result": items})
+    store.stats["appends"] += 1
+    return {**response, "result": items}
+
+
+async def execute_query(
+    url: str,
+    data: dict,
+    ratio: bool = False,
+    group_by_boundary: bool = False,
+    cost: Optional[float] = None,
+) -> dict:
+    """Execute query and validate the response.
+
+    Responses are served from the cache if possible. Identical queries in flight are
+    coalesced. Only validated responses are cached. Concurrency and retries of requests
+    to the ohsome API are controlled adaptively (See `controller.Controller`).
+
+    If the cost of a time-series query is given its latency is observed to estimate
+    the duration of future queries (See `shard.LatencyModel`).
+    """
+    response_cache = cache.get_cache()
+    if response_cache.enabled:
+        # Make sure the data snapshot of the ohsome API is known to the cache
+        await metadata_service.get_latest_timestamp()
+    response = await response_cache.get(url, data)
+    if response is not None:
+        return response
+
+    async def _execute_query() -> dict:
+        snapshot = response_cache.snapshot
+        started_at = time.monotonic()
+        response = await get_controller().call(
+            query_ohsome_api, url, data, ratio, group_by_boundary
+        )
+        if cost is not None:
+            latency_model.observe(cost, time.monotonic() - started_at)
+        await response_cache.set(url, data, response, snapshot)
+        return response
+
+    key = cache.build_cache_key(url, data)
+    return await single_flight.do(key, _execute_query)
+
+
+@contextmanager
+def batch_queries(size: int):
+    """Batch queries for different bounding polygons into "group by boundary" requests.
+
+    All queries issued inside of this context (including tasks created inside of it)
+    for a single bounding polygon are batched (See `batch.QueryBatch`).
+
+    Args:
+        size: Number of bounding polygons expected to be queried concurrently.
+    """
+    query_batch = batch.QueryBatch(
+        size=size,
+        window=int(get_config_value("ohsome_batch_window")) / 1000,
+        execute=execute_query,
+    )
+    token = batch.current_batch.set(query_batch)
+    try:
+        yield query_batch
+    finally:
+        batch.current_batch.reset(token)
+
+
+async def startup() -> None:
+    """Create the shared HTTP client and start the ohsome API metadata service."""
+    get_client()
+    await metadata_service.start()
+
+
+async def shutdown() -> None:
+    """Stop the metadata service and close the shared HTTP client."""
+    global _client, _client_loop, _transport
+    await metadata_service.stop()
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _transport = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for the ohsome API.
+
+    The client is created on first usage. Connections are kept alive and reused by
+    subsequent requests. Responses are requested gzip compressed (`httpx` default).
+
+    The client is re-created if it has been closed or if it has been created inside of
+    another event loop (E.g. consecutive calls of `asyncio.run`).
+    """
+    global _client, _client_loop, _transport
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        limits = httpx.Limits(
+            max_connections=int(get_config_value("ohsome_api_max_connections")),
+            max_keepalive_connections=int(
+                get_config_value("ohsome_api_max_keepalive_connections")
+            ),
+            keepalive_expiry=int(get_config_value("ohsome_api_keepalive_expiry")),
+        )
+        http2 = get_config_flag("ohsome_api_http2")
+        logging.debug("Create HTTP client for the ohsome API (HTTP/2: %s)", http2)
+        # Transport owns the connection pool and keeps statistics of it
+        _transport = transport.PoolTransport(limits, http2, stats=_pool_stats)
+        # 660s timeout for reading, and a 300s timeout elsewhere.
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(300, read=660),
+            transport=_transport,
+            headers={"user-agent": get_config_value("user_agent")},
+        )
+        _client_loop = loop
+    return _client
+
+
+def get_controller() -> controller.Controller:
+    """Get the controller of concurrency and retries of requests to the ohsome API.
+
+    The limit of concurrent requests starts at the configured value and is adjusted
+    between one and the maximal number of connections of the HTTP client.
+
+    Waiting requests are futures of the event loop. A controller is created per
+    event loop.
+    """
+    global _controller, _controller_loop
+    loop = asyncio.get_running_loop()
+    if _controller is None or _controller_loop is not loop:
+        limiter = controller.AdaptiveLimiter(
+            limit=int(get_config_value("ohsome_concurrency_limit")),
+            max_limit=int(get_config_value("ohsome_api_max_connections")),
+            latency_target=int(get_config_value("ohsome_latency_target")) / 1000,
+        )
+        _controller = controller.Controller(
+            limiter,
+            retry_budget=int(get_config_value("ohsome_retry_budget")),
+        )
+        _controller_loop = loop
+    return _controller
+
+
+def get_pool_stats() -> dict:
+    """Get statistics of the connection pool of the shared HTTP client.
+
+    Returns:
+        Number of open and idle connections, requests in flight, total number of
+        requests and number of requests which had to wait for a free connection (See
+        `transport.PoolTransport`).
+    """
+    if _transport is None:
+        return {
+            "connections": 0,
+            "idle_connections": 0,
+            "in_flight": _pool_stats["in_flight"],
+            "requests": _pool_stats["requests"],
+            "waits": _pool_stats["waits"],
+        }
+    return _transport.get_stats()
+
+
+async def query_ohsome_api(
+    url: str,
+    data: dict,
+    ratio: bool = False,
+    group_by_boundary: bool = False,
+) -> dict:
+    """Query the ohsome API and validate the response while it is streamed.
+
+    Each result item is validated as soon as it has been received and is reduced to
+    its values and timestamps (See `stream.compact_item`).
+
+    Raises:
+        OhsomeApiError: In case of any response except 2xx status codes or invalid
+            response due to timeout during streaming.
+        SchemaError: In case of an invalid result item or an empty result.
+    """
+    response_key = get_response_key(ratio, group_by_boundary)
+    schema = Schema(
+        get_result_item_schema(ratio, group_by_boundary),
+        ignore_extra_keys=True,
+    )
+    result_key = get_response_key(ratio)
+    results = []
+    parser = stream.ResponseParser()
+    async for key, item in stream_ohsome_api(url, data, parser):
+        if key != response_key:
+            parser.members[key].append(item)
+            continue
+        schema.validate(item)
+        if group_by_boundary:
+            item = {
+                "groupByObject": item["groupByObject"],
+                result_key: [stream.compact_item(i) for i in item[result_key]],
+            }
+        else:
+            item = stream.compact_item(item)
+        results.append(item)
+    if response_key not in parser.members:
+        raise SchemaError("Missing key: {0!r}".format(response_key))
+    if not results:
+        raise SchemaError("Empty result field")
+    return {**parser.members, response_key: results}
+
+
+async def query_arrays(
+    layer: LayerDefinition,
+    bpolys: Union[Feature, FeatureCollection],
+    time: Optional[str] = None,
+    ratio: Optional[bool] = False,
+    group_by_boundary: Optional[bool] = False,
+) -> AsyncIterator[stream.ResultArrays]:
+    """Query ohsome API and yield the result of each boundary as NumPy arrays.
+
+    The result of a boundary is yielded as soon as it has been received. Contrary to
+    `query` the response is neither cached nor held in memory as a whole.
+    The values are ratios if `ratio` is set.
+
+    Raises:
+        OhsomeApiError: See `query_ohsome_api`.
+        SchemaError: In case of an invalid result item or an empty result.
+    """
+    url = build_url(layer, ratio, group_by_boundary)
+    data = build_data_dict(layer, bpolys, time, ratio)
+    response_key = get_response_key(ratio, group_by_boundary)
+    schema = Schema(
+        get_result_item_schema(ratio, group_by_boundary),
+        ignore_extra_keys=True,
+    )
+    result_key = get_response_key(ratio)
+    value_key = "ratio" if ratio else "value"
+    count = 0
+    items = []  # Items of a single boundary (Not grouped by boundary)
+    # Results are yielded while streaming. Therefore, the request is not retried.
+    async with get_controller().slot():
+        parser = stream.ResponseParser()
+        async for key, item in stream_ohsome_api(url, data, parser):
+            if key != response_key:
+                continue
+            schema.validate(item)
+            count += 1
+            if group_by_boundary:
+                yield stream.to_arrays(
+                    item[result_key], item["groupByObject"], value_key
+                )
+            else:
+                items.append(stream.compact_item(item))
+    if count == 0:
+        raise SchemaError("Empty result field")
+    if not group_by_boundary:
+        yield stream.to_arrays(items, value_key=value_key)
+
+
+async def stream_ohsome_api(
+    url: str,
+    data: dict,
+    parser: stream.ResponseParser,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Query the ohsome API and yield result items as soon as they are received.
+
+    The response body is fed to the given parser chunk by chunk. All other members of
+    the response are available as `parser.members` once all items have been yielded.
 
     A custom connection timeout is set since the ohsome API can take a long time to
     send an answer (< 10 minutes).
@@ -100,34 +547,59 @@ async def query_ohsome_api(url: str, data: dict) -> dict:
             response due to timeout during streaming.
     """
     headers = {"user-agent": get_config_value("user_agent")}
-    # 660s timeout for reading, and a 300s timeout elsewhere.
-    async with httpx.AsyncClient(timeout=httpx.Timeout(300, read=660)) as client:
-        resp = await client.post(url, data=data, headers=headers)
-    try:
-        resp.raise_for_status()
-    except httpx.HTTPStatusError as error:
-        raise OhsomeApiError(
-            "Querying the ohsome API failed! " + error.response.json()["message"]
-        ) from error
-    try:
-        return geojson.loads(resp.content)
-    except JSONDecodeError as error:
-        raise OhsomeApiError(
-            "Ohsome API returned invalid GeoJSON after streaming of the response. "
-            + "The reason is a timeout of the ohsome API."
-        ) from error
+    async with get_client().stream("POST", url, data=data, headers=headers) as resp:
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as error:
+            await resp.aread()
+            try:
+                message = resp.json()["message"]
+            except (json.JSONDecodeError, KeyError):
+                # E.g. error page of a proxy
+                message = resp.reason_phrase
+            raise OhsomeApiError(
+                "Querying the ohsome API failed! " + message,
+                status_code=resp.status_code,
+            ) from error
+        try:
+            async for chunk in resp.aiter_bytes():
+                for key, item in parser.feed(chunk):
+                    yield key, item
+            for key, item in parser.close():
+                yield key, item
+        except json.JSONDecodeError as error:
+            raise OhsomeApiError(
+                "Ohsome API returned invalid GeoJSON after streaming of the "
+                + "response. The reason is a timeout of the ohsome API."
+            ) from error
 
 
 async def get_latest_ohsome_timestamp() -> datetime.datetime:
-    """Get latest unix timestamp from the ohsome API."""
+    """Get latest unix timestamp from the ohsome API.
+
+    The timestamp is served by the metadata service. It will be fetched only if it is
+    not known yet or has not been refreshed in the background.
+    """
+    return await metadata_service.get_latest_timestamp()
+
+
+async def fetch_latest_ohsome_timestamp() -> datetime.datetime:
+    """Fetch latest unix timestamp from the metadata endpoint of the ohsome API."""
     url = get_config_value("ohsome_api").rstrip("/") + "/metadata"
     headers = {"user-agent": get_config_value("user_agent")}
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url=url, headers=headers)
+    resp = await get_client().get(url=url, headers=headers)
     strtime = resp.json()["extractRegion"]["temporalExtent"]["toTimestamp"]
     return datetime.datetime.strptime(strtime, "%Y-%m-%dT%H:%MZ")
 
 
+metadata_service = metadata.MetadataService(
+    fetch=fetch_latest_ohsome_timestamp,
+    refresh_interval=lambda: int(get_config_value("ohsome_metadata_refresh_interval")),
+)
+# Invalidate cached responses on new data snapshot
+metadata_service.subscribe(lambda timestamp: cache.get_cache().set_snapshot(timestamp))
+
+
 def build_url(
     layer: Layer,
     ratio: bool = False,
@@ -171,6 +643,35 @@ def build_data_dict(
     return data
 
 
+def get_response_key(ratio: bool = False, group_by_boundary: bool = False) -> str:
+    """Get the key of the result array of an ohsome API response."""
+    if group_by_boundary:
+        return "groupByResult"
+    if ratio:
+        return "ratioResult"
+    return "result"
+
+
+def get_result_item_schema(
+    ratio: bool = False,
+    group_by_boundary: bool = False,
+) -> dict:
+    """Get the schema of a single item of the result array."""
+    schema = {
+        "value": Or(float, int),
+        Or("timestamp", "fromTimestamp", "toTimestamp"): Use(lambda t: isoparse(t)),
+    }
+    if ratio:
+        schema["value2"] = Or(float, int)
+        schema["ratio"] = Or(float, int, "NaN")
+    if group_by_boundary:
+        schema = {
+            get_response_key(ratio): [schema],
+            "groupByObject": Or(int, str),
+        }
+    return schema
+
+
 def validate_query_results(
     response: dict,
     ratio: bool = False,
@@ -181,39 +682,8 @@ def validate_query_results(
     Raises:
         SchemaError: Error during Schema validation.
     """
-    response_key = "result"
-    schema = {
-        "result": [
-            {
-                "value": Or(float, int),
-                Or("timestamp", "fromTimestamp", "toTimestamp"): Use(
-                    lambda t: isoparse(t)
-                ),
-            }
-        ]
-    }
-    if ratio:
-        schema = {
-            "ratioResult": [
-                {
-                    "value": Or(float, int),
-                    "value2": Or(float, int),
-                    "ratio": Or(float, int, "NaN"),
-                    Or("timestamp", "fromTimestamp", "toTimestamp"): Use(
-                        lambda t: isoparse(t)
-                    ),
-                }
-            ]
-        }
-        response_key = "ratioResult"
-    if group_by_boundary:
-        schema = {
-            "groupByResult": [
-                schema,
-            ],
-        }
-        schema["groupByResult"][0]["groupByObject"] = Or(int, str)
-        response_key = "groupByResult"
+    response_key = get_response_key(ratio, group_by_boundary)
+    schema = {response_key: [get_result_item_schema(ratio, group_by_boundary)]}
     Schema(
         schema,
         ignore_extra_keys=True,
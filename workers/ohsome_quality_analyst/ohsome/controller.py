@@ -0,0 +1,212 @@
+"""Adaptive concurrency and retry controller for requests to the ohsome API.
+
+The number of requests in flight is limited. The limit is adjusted to the observed
+behavior of the ohsome API (Additive increase, multiplicative decrease - AIMD):
+
+    - Each successful request with a latency below the target increases the limit
+      by about one per round trip of all requests in flight. A successful request
+      with a latency above the target keeps the limit. The latency depends on the
+      cost of a query (AOI size, time range) and is no overload signal by itself.
+    - A rate limit (429), an unavailable ohsome API (502, 503, 504) or a timeout
+      halves the limit.
+
+Failed requests are retried with exponential backoff and full jitter as long as the
+time budget for the request is not exhausted. All queries to the ohsome API are read
+only and therefore idempotent.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Optional
+
+import httpx
+
+from ohsome_quality_analyst.utils.exceptions import OhsomeApiError
+
+OVERLOAD_STATUS_CODES = (429, 502, 503, 504)
+RETRY_STATUS_CODES = OVERLOAD_STATUS_CODES + (500,)
+BACKOFF_BASE = 1  # seconds
+BACKOFF_CAP = 30  # seconds
+
+
+class AdaptiveLimiter:
+    """Limit the number of concurrent requests with an adaptive limit (AIMD).
+
+    Args:
+        limit: Initial limit.
+        max_limit: Upper bound of the limit.
+        latency_target: Latency in seconds above which the limit is not increased.
+        min_limit: Lower bound of the limit.
+        decrease_factor: Factor applied to the limit on decrease.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_limit: int,
+        latency_target: float,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(limit, min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.stats: Counter = Counter()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._decreased_at = float("-inf")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Wait for a free slot and hold it while inside of the context."""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        self.stats["waits"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # Slot has been handed over already
+            else:
+                self._waiters.remove(future)
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def on_success(self, started_at: float) -> None:
+        """Adjust the limit after a successful request started at given time."""
+        latency = time.monotonic() - started_at
+        if latency > self.latency_target:
+            return
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake_up()
+
+    def on_overload(self, started_at: float) -> None:
+        """Decrease the limit after an overload signal of a request started at time.
+
+        Requests started before the last decrease belong to the same overload episode
+        and do not decrease the limit again.
+        """
+        if started_at < self._decreased_at:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._decreased_at = time.monotonic()
+        self.stats["decreases"] += 1
+        logging.info(
+            "Decrease limit of concurrent ohsome API requests: {0:.1f}".format(
+                self.limit
+            )
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "waits": self.stats["waits"],
+            "decreases": self.stats["decreases"],
+        }
+
+
+class Controller:
+    """Execute requests with adaptive concurrency and retries.
+
+    Args:
+        limiter: Adaptive limiter of concurrent requests.
+        retry_budget: Total time in seconds a request may take including retries.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, retry_budget: float) -> None:
+        self.limiter = limiter
+        self.retry_budget = retry_budget
+        self.stats: Counter = Counter()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Execute a request inside of the context without retries."""
+        async with self.limiter.acquire():
+            started_at = time.monotonic()
+            try:
+                yield
+            except Exception as error:
+                if is_overload(error):
+                    self.limiter.on_overload(started_at)
+                raise
+            self.limiter.on_success(started_at)
+
+    async def call(self, function: Callable[..., Awaitable], *args) -> Any:
+        """Execute coroutine function and retry it on failure within the time budget."""
+        deadline = time.monotonic() + self.retry_budget
+        attempt = 0
+        while True:
+            try:
+                async with self.slot():
+                    return await function(*args)
+            except Exception as error:
+                if not is_retryable(error):
+                    raise
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+                if time.monotonic() + delay > deadline:
+                    self.stats["retries_exhausted"] += 1
+                    raise
+                logging.warning(
+                    "Request to the ohsome API failed. Retry in {0:.1f}s: {1}".format(
+                        delay, repr(error)
+                    )
+                )
+                self.stats["retries"] += 1
+                attempt += 1
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.limiter.get_stats(),
+            "retries": self.stats["retries"],
+            "retries_exhausted": self.stats["retries_exhausted"],
+        }
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    if isinstance(error, OhsomeApiError):
+        return error.status_code
+    return None
+
+
+def is_overload(error: Exception) -> bool:
+    """Does the error indicate that the ohsome API is overloaded?"""
+    return isinstance(error, httpx.TimeoutException) or (
+        get_status_code(error) in OVERLOAD_STATUS_CODES
+    )
+
+
+def is_retryable(error: Exception) -> bool:
+    """Can the request be retried? Timeouts while streaming are not retried."""
+    return isinstance(error, httpx.TransportError) or (
+        get_status_code(error) in RETRY_STATUS_CODES
+    )
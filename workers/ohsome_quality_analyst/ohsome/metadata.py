@@ -0,0 +1,108 @@
+"""Process-wide service for the metadata of the ohsome API.
+
+The latest timestamp of the ohsome API data (data snapshot) is fetched once and
+refreshed in the background. Subscribers are notified if the snapshot changes.
+"""
+
+import asyncio
+import datetime
+import inspect
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+Subscriber = Callable[[datetime.datetime], Optional[Awaitable[None]]]
+
+
+class MetadataService:
+    """Serve the latest timestamp of the ohsome API data.
+
+    Args:
+        fetch: Coroutine function fetching the latest timestamp from the ohsome API.
+        refresh_interval: Function returning the refresh interval in seconds.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[datetime.datetime]],
+        refresh_interval: Callable[[], int],
+    ) -> None:
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.timestamp: Optional[datetime.datetime] = None
+        self.subscribers: List[Subscriber] = []
+        self._fetched_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Call subscriber with the new timestamp whenever the snapshot changes."""
+        self.subscribers.append(subscriber)
+
+    @property
+    def expired(self) -> bool:
+        return (
+            self._fetched_at is None
+            or time.monotonic() - self._fetched_at > self.refresh_interval()
+        )
+
+    async def get_latest_timestamp(self) -> datetime.datetime:
+        """Get the latest timestamp. Fetch it only if unknown or expired.
+
+        If the background refresh is running the timestamp is always served
+        immediately once it has been fetched initially.
+        """
+        if self.timestamp is None or (self._task is None and self.expired):
+            await self.refresh()
+        return self.timestamp
+
+    async def refresh(self) -> None:
+        """Fetch the latest timestamp and notify subscribers if it has changed."""
+        # Lock needs to be created inside of the event loop
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        fetched_at = self._fetched_at
+        async with self._lock:
+            if self._fetched_at != fetched_at:
+                return  # Has been refreshed by a concurrent call in the meantime
+            timestamp = await self.fetch()
+            self._fetched_at = time.monotonic()
+            if timestamp == self.timestamp:
+                return
+            logging.info("ohsome API data snapshot: {0}".format(timestamp))
+            self.timestamp = timestamp
+            for subscriber in self.subscribers:
+                result = subscriber(timestamp)
+                if inspect.isawaitable(result):
+                    await result
+
+    async def start(self) -> None:
+        """Start refreshing the timestamp in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """Stop refreshing the timestamp in the background."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                # Keep serving the last known timestamp
+                logging.warning(
+                    "Refreshing ohsome API metadata failed: {0}".format(repr(error))
+                )
+            await asyncio.sleep(self.refresh_interval())
@@ -0,0 +1,104 @@
+"""Persistent store of time series queried from the ohsome API.
+
+Values of a time series (E.g. monthly number of buildings since 2008) for timestamps
+up to the latest data snapshot of the ohsome API do not change anymore. A time series
+with an open end (E.g. `2008-01-01//P1M`) is stored per endpoint, filter and AOI
+(fingerprint of the geometry). On a new data snapshot only the timestamps after the
+last stored timestamp are queried and appended to the stored series.
+
+Stored series are JSON files in a configurable directory. The store is disabled if
+no directory is configured.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Optional, Union
+from urllib.parse import urlparse
+
+from geojson import Feature, FeatureCollection
+
+from ohsome_quality_analyst.base.layer import LayerDefinition
+from ohsome_quality_analyst.config import get_config_value
+
+
+class SeriesStore:
+    """On-disk store of time series. Each series is stored as one JSON file."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.stats: Counter = Counter()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _set(self, key: str, value: dict) -> None:
+        path = self._path(key)
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to temporary file first to never expose incomplete series
+        tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        with open(tmp_path, "w") as file:
+            json.dump(value, file)
+        os.replace(tmp_path, path)
+
+    async def get(self, key: str) -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        value = await loop.run_in_executor(None, self._get, key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: dict) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._set, key, value)
+
+    def get_stats(self) -> dict:
+        return {"directory": self.directory, **self.stats}
+
+
+def build_series_key(
+    url: str,
+    layer: LayerDefinition,
+    bpolys: Union[Feature, FeatureCollection],
+    time: str,
+) -> str:
+    """Build key of a time series from endpoint, filter, AOI fingerprint and time."""
+    key = {
+        "endpoint": urlparse(url).path,
+        "filter": layer.filter_,
+        "bpolys": get_fingerprint(bpolys),
+        "time": time,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def get_fingerprint(bpolys: Union[Feature, FeatureCollection]) -> str:
+    """Get fingerprint of the geometry (Properties and IDs are ignored)."""
+    if bpolys.get("type") == "FeatureCollection":
+        geometry = [feature["geometry"] for feature in bpolys["features"]]
+    else:
+        geometry = bpolys.get("geometry", bpolys)
+    normalized = json.dumps(geometry, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+_store: Optional[SeriesStore] = None
+
+
+def get_store() -> Optional[SeriesStore]:
+    """Get the process-wide series store. `None` if no directory is configured."""
+    global _store
+    directory = get_config_value("ohsome_series_dir") or None
+    if directory is None:
+        return None
+    if _store is None or _store.directory != directory:
+        _store = SeriesStore(directory)
+    return _store
@@ -0,0 +1,160 @@
+"""Temporal sharding of long time-series queries.
+
+A query for a long time range with a period (E.g. `2008-01-01//P1M`) can run into the
+read timeout for large or dense AOIs. Such a time range is split into sub-ranges which
+are queried concurrently and merged into one ordered series.
+
+The number of sub-ranges (shards) is chosen by the estimated duration of the query.
+The duration is estimated from the cost of the query (Number of timestamps times area
+of the AOI) and the latency observed for past queries (See `LatencyModel`).
+"""
+
+import datetime
+import math
+import re
+from typing import Dict, List, Optional, Union
+
+from dateutil.parser import isoparse
+from dateutil.relativedelta import relativedelta
+
+PERIOD_PATTERN = re.compile(r"^P(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)W)?(?:(\d+)D)?$")
+# Minimal number of timestamps per shard
+MIN_TIMESTAMPS = 12
+# Initial estimate of seconds per timestamp per km²
+DEFAULT_RATE = 0.001
+
+
+class LatencyModel:
+    """Estimate the duration of a query from its cost.
+
+    The rate (seconds per unit of cost) is the exponentially weighted moving average
+    of the rates observed for past queries.
+
+    Args:
+        rate: Initial rate.
+        alpha: Weight of a new observation.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, alpha: float = 0.2) -> None:
+        self.rate = rate
+        self.alpha = alpha
+        self.observations = 0
+
+    def estimate(self, cost: float) -> float:
+        return self.rate * cost
+
+    def observe(self, cost: float, duration: float) -> None:
+        if cost <= 0:
+            return
+        self.rate = (1 - self.alpha) * self.rate + self.alpha * duration / cost
+        self.observations += 1
+
+
+def get_timestamps(
+    time: str,
+    latest: datetime.datetime,
+) -> Optional[List[datetime.datetime]]:
+    """Get timestamps of a time range with period (`start/end/period`).
+
+    If no end is given the latest timestamp is used. Return `None` for all other
+    time strings (E.g. a list of timestamps or periods of less than a day).
+    """
+    parts = time.split("/")
+    if "," in time or len(parts) != 3:
+        return None
+    start, end, period = parts
+    step = parse_period(period)
+    if step is None:
+        return None
+    start = isoparse(start).replace(tzinfo=None)
+    end = isoparse(end).replace(tzinfo=None) if end else latest.replace(tzinfo=None)
+    timestamps = []
+    while start + len(timestamps) * step <= end:
+        timestamps.append(start + len(timestamps) * step)
+    return timestamps
+
+
+def parse_period(period: str) -> Optional[relativedelta]:
+    """Parse ISO-8601 period of years, months, weeks or days (E.g. `P1M`)."""
+    match = PERIOD_PATTERN.match(period)
+    if match is None or not any(match.groups()):
+        return None
+    years, months, weeks, days = (int(g or 0) for g in match.groups())
+    return relativedelta(years=years, months=months, weeks=weeks, days=days)
+
+
+def get_shard_count(duration: float, target: float, max_shards: int, size: int) -> int:
+    """Get number of shards for a query of given estimated duration and size.
+
+    Args:
+        duration: Estimated duration of the query in seconds.
+        target: Targeted duration of a single shard in seconds.
+        max_shards: Maximal number of shards.
+        size: Number of timestamps of the query.
+    """
+    shards = math.ceil(duration / target) if target > 0 else 1
+    return max(1, min(shards, max_shards, size // MIN_TIMESTAMPS))
+
+
+def split_time_range(
+    time: str,
+    timestamps: List[datetime.datetime],
+    shards: int,
+) -> List[str]:
+    """Split time range into sub-ranges of about the same number of timestamps.
+
+    Consecutive sub-ranges overlap by one timestamp. This way intervals between
+    timestamps (E.g. of contributions) are covered as well. The last sub-range keeps
+    the original end.
+    """
+    if shards <= 1:
+        return [time]
+    _, end, period = time.split("/")
+    bounds = [round(i * len(timestamps) / shards) for i in range(shards)]
+    time_ranges = []
+    for i, bound in enumerate(bounds):
+        if i + 1 < len(bounds):
+            sub_end = format_timestamp(timestamps[bounds[i + 1]])
+        else:
+            sub_end = end
+        time_ranges.append(
+            "{0}/{1}/{2}".format(format_timestamp(timestamps[bound]), sub_end, period)
+        )
+    return time_ranges
+
+
+def merge_responses(responses: List[dict]) -> dict:
+    """Merge responses of sub-ranges into one response with an ordered series.
+
+    Items of overlapping timestamps are only included once.
+    """
+    merged = dict(responses[0])
+    if "groupByResult" in merged:
+        result_key = next(k for k in merged["groupByResult"][0] if k != "groupByObject")
+        groups: Dict[Union[int, str], List[List[dict]]] = {}
+        for response in responses:
+            for group in response["groupByResult"]:
+                groups.setdefault(group["groupByObject"], []).append(group[result_key])
+        merged["groupByResult"] = [
+            {"groupByObject": key, result_key: merge_items(results)}
+            for key, results in groups.items()
+        ]
+    else:
+        result_key = "ratioResult" if "ratioResult" in merged else "result"
+        merged[result_key] = merge_items([r[result_key] for r in responses])
+    return merged
+
+
+def merge_items(results: List[List[dict]]) -> List[dict]:
+    items = {}
+    for result in results:
+        for item in result:
+            key = item.get("timestamp") or item.get("fromTimestamp")
+            items.setdefault(key, item)
+    return [items[key] for key in sorted(items)]
+
+
+def format_timestamp(timestamp: datetime.datetime) -> str:
+    if timestamp.time() == datetime.time(0):
+        return timestamp.strftime("%Y-%m-%d")
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
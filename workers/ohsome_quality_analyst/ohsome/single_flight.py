@@ -0,0 +1,62 @@
+"""Coalesce identical concurrent requests (single-flight).
+
+If a request with the same key is already in flight, the result of this request is
+awaited instead of executing the request a second time.
+"""
+
+import asyncio
+from collections import Counter
+from copy import deepcopy
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self.stats: Counter = Counter()
+        self._calls: Dict[str, _Call] = {}
+
+    async def do(self, key: str, function: Callable[..., Awaitable], *args) -> Any:
+        """Execute coroutine function or await the result of an identical call.
+
+        The call is executed in its own task. A cancelled caller does not cancel the
+        call for the other callers. The call is only cancelled once all of its
+        callers are cancelled.
+
+        Every caller gets its own copy of the result. Exceptions are propagated to
+        all callers.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            self.stats["executed"] += 1
+            task = asyncio.get_running_loop().create_task(function(*args))
+            call = _Call(task)
+            self._calls[key] = call
+            task.add_done_callback(lambda _: self._remove(key, call))
+        else:
+            self.stats["coalesced"] += 1
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # All callers have been cancelled
+                call.task.cancel()
+        return deepcopy(result)
+
+    def _remove(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.stats["executed"],
+            "coalesced": self.stats["coalesced"],
+        }
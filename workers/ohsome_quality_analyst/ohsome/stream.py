@@ -0,0 +1,198 @@
+"""Incremental parsing of (large) responses of the ohsome API.
+
+The body of a response is parsed while it is streamed. Items of result arrays
+(`result`, `ratioResult` and `groupByResult`) are decoded one at a time as soon as they
+are complete. This way each item can be validated and reduced to the values needed
+before the next item arrives, instead of holding the whole response in memory twice.
+
+The ohsome API streams its responses. If a timeout occurs during streaming an error
+object is appended to the partial response and the body ends prematurely. Such a
+response is detected as invalid JSON.
+"""
+
+import codecs
+import json
+from json import JSONDecodeError
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from dateutil.parser import isoparse
+
+RESULT_KEYS = ("result", "ratioResult", "groupByResult")
+TIMESTAMP_KEYS = ("timestamp", "fromTimestamp", "toTimestamp")
+WHITESPACE = " \t\n\r"
+
+# Parser states
+_OBJECT_START = "object_start"
+_KEY = "key"
+_COLON = "colon"
+_VALUE = "value"
+_ITEMS_START = "items_start"
+_ITEM = "item"
+_AFTER_ITEM = "after_item"
+_AFTER_VALUE = "after_value"
+_END = "end"
+# Returned by the decoder if a value is not complete yet
+_INCOMPLETE = object()
+
+
+class ResultArrays(NamedTuple):
+    """Compact result of a single boundary as NumPy arrays."""
+
+    group_by_object: Optional[Union[int, str]]
+    timestamps: np.ndarray  # datetime64[s]
+    values: np.ndarray  # float64
+
+
+class ResponseParser:
+    """Incremental parser for a JSON object with result arrays as members.
+
+    Feed the parser with chunks of the body and iterate over the result items yielded.
+    Members which are not result arrays (E.g. `attribution` or `metadata`) are
+    decoded as a whole and are available as `members` after closing the parser.
+
+    Raises:
+        JSONDecodeError: If the body is invalid or incomplete JSON.
+    """
+
+    def __init__(self) -> None:
+        self.members: dict = {}
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _OBJECT_START
+        self._key: Optional[str] = None
+        # Decoding of an incomplete value is only retried once the buffer has doubled
+        # to avoid decoding large values over and over again.
+        self._retry_at = 0
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[str, Any]]:
+        """Feed a chunk of the body and yield tuples of result key and item."""
+        self._buffer = self._buffer[self._pos :] + self._text_decoder.decode(chunk)
+        self._pos = 0
+        if len(self._buffer) < self._retry_at:
+            return
+        self._retry_at = 0
+        yield from self._parse(final=False)
+
+    def close(self) -> Iterator[Tuple[str, Any]]:
+        """Parse the remaining body and yield the remaining result items."""
+        self._buffer = self._buffer[self._pos :] + self._text_decoder.decode(
+            b"", final=True
+        )
+        self._pos = 0
+        yield from self._parse(final=True)
+        if self._state != _END:
+            raise JSONDecodeError("Unexpected end of body", self._buffer, self._pos)
+
+    def _parse(self, final: bool) -> Iterator[Tuple[str, Any]]:
+        while True:
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                return
+            char = self._buffer[self._pos]
+            if self._state == _OBJECT_START:
+                self._expect(char, "{")
+                self._state = _KEY
+            elif self._state == _KEY:
+                if char == "}" and not self.members:
+                    self._pos += 1
+                    self._state = _END
+                    continue
+                key = self._decode(final)
+                if key is _INCOMPLETE:
+                    return
+                if not isinstance(key, str):
+                    self._error("Expecting property name")
+                self._key = key
+                self._state = _COLON
+            elif self._state == _COLON:
+                self._expect(char, ":")
+                self._state = _VALUE
+            elif self._state == _VALUE:
+                if self._key in RESULT_KEYS and char == "[":
+                    self._pos += 1
+                    self.members[self._key] = []
+                    self._state = _ITEMS_START
+                    continue
+                value = self._decode(final)
+                if value is _INCOMPLETE:
+                    return
+                self.members[self._key] = value
+                self._state = _AFTER_VALUE
+            elif self._state == _ITEMS_START:
+                if char == "]":
+                    self._pos += 1
+                    self._state = _AFTER_VALUE
+                else:
+                    self._state = _ITEM
+            elif self._state == _ITEM:
+                item = self._decode(final)
+                if item is _INCOMPLETE:
+                    return
+                self._state = _AFTER_ITEM
+                yield self._key, item
+            elif self._state == _AFTER_ITEM:
+                # A timeout error object appended to the result items ends up here
+                self._expect(char, ",]")
+                self._state = _ITEM if char == "," else _AFTER_VALUE
+            elif self._state == _AFTER_VALUE:
+                self._expect(char, ",}")
+                self._state = _KEY if char == "," else _END
+            else:
+                self._error("Extra data")
+
+    def _decode(self, final: bool) -> Any:
+        """Decode value at current position. Return `_INCOMPLETE` if incomplete."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except JSONDecodeError:
+            if final:
+                raise
+            self._retry_at = 2 * (len(self._buffer) - self._pos)
+            return _INCOMPLETE
+        if end >= len(self._buffer) and not final:
+            # A number at the end of the buffer might be continued by the next chunk
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+    def _skip_whitespace(self) -> None:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+            self._pos += 1
+
+    def _expect(self, char: str, expected: str) -> None:
+        if char not in expected:
+            self._error("Expecting one of '{0}'".format(expected))
+        self._pos += 1
+
+    def _error(self, message: str) -> None:
+        raise JSONDecodeError(message, self._buffer, self._pos)
+
+
+def compact_item(item: dict) -> dict:
+    """Reduce a result item to its values and timestamps."""
+    return {
+        key: value
+        for key, value in item.items()
+        if key in TIMESTAMP_KEYS or key in ("value", "value2", "ratio")
+    }
+
+
+def to_arrays(
+    items: List[dict],
+    group_by_object: Optional[Union[int, str]] = None,
+    value_key: str = "value",
+) -> ResultArrays:
+    """Convert result items of a single boundary to compact NumPy arrays.
+
+    `NaN` ratios (Returned as string by the ohsome API) are converted to `np.nan`.
+    """
+    timestamps = np.empty(len(items), dtype="datetime64[s]")
+    values = np.empty(len(items), dtype=np.float64)
+    for i, item in enumerate(items):
+        timestamp = next(item[key] for key in TIMESTAMP_KEYS if key in item)
+        timestamps[i] = np.datetime64(isoparse(timestamp).replace(tzinfo=None), "s")
+        values[i] = float(item[value_key])
+    return ResultArrays(group_by_object, timestamps, values)
@@ -0,0 +1,114 @@
+"""Spatial tiling of large AOIs for additive ohsome API queries.
+
+Lengths and areas of OSM elements are additive: The value for an AOI is the sum of
+the values for disjoint parts of the AOI since the ohsome API clips geometries to the
+bounding polygon. A large AOI is cut into a grid of tiles clipped to the AOI. The tiles
+are queried concurrently and the results are summed up per timestamp.
+
+Note:
+    Counts and perimeters are not additive and therefore not tiled: Elements crossing
+    the border of two tiles would be counted once per tile and perimeters of clipped
+    polygons include the border of the tile.
+"""
+
+import math
+from typing import Dict, List, Optional, Union
+
+from geojson import Feature
+from shapely.geometry import MultiPolygon, Polygon, box, mapping, shape
+
+from ohsome_quality_analyst.base.layer import LayerDefinition
+from ohsome_quality_analyst.utils.geometry import geod, get_area
+
+ADDITIVE_ENDPOINTS = (
+    "elements/length",
+    "elements/area",
+)
+
+
+def is_additive(layer: LayerDefinition, count_latest_contributions: bool) -> bool:
+    return not count_latest_contributions and layer.endpoint in ADDITIVE_ENDPOINTS
+
+
+def get_tiles(bpolys: Feature, tile_size: float) -> List[Feature]:
+    """Cut bounding polygon into a grid of tiles clipped to the bounding polygon.
+
+    The grid is laid over the bounding box. Each tile covers at most about the given
+    size. Empty tiles are dropped.
+
+    Args:
+        bpolys: Bounding (multi)polygon.
+        tile_size: Maximal size of a tile in km².
+
+    Returns:
+        Tiles as Features. A single tile (The bounding polygon) if the bounding box
+        is smaller than the tile size.
+    """
+    geometry = shape(bpolys["geometry"])
+    min_x, min_y, max_x, max_y = geometry.bounds
+    bbox_area = get_area(mapping(box(*geometry.bounds)))
+    if tile_size <= 0 or bbox_area <= tile_size:
+        return [bpolys]
+    center_x = (min_x + max_x) / 2
+    center_y = (min_y + max_y) / 2
+    width = geod.inv(min_x, center_y, max_x, center_y)[2]
+    height = geod.inv(center_x, min_y, center_x, max_y)[2]
+    count = math.ceil(bbox_area / tile_size)
+    columns = max(1, round(math.sqrt(count * width / height)))
+    rows = math.ceil(count / columns)
+    step_x = (max_x - min_x) / columns
+    step_y = (max_y - min_y) / rows
+    tiles = []
+    for row in range(rows):
+        for column in range(columns):
+            cell = box(
+                min_x + column * step_x,
+                min_y + row * step_y,
+                min_x + (column + 1) * step_x,
+                min_y + (row + 1) * step_y,
+            )
+            tile = get_polygonal(geometry.intersection(cell))
+            if tile is not None:
+                tiles.append(Feature(id=len(tiles), geometry=mapping(tile)))
+    return tiles
+
+
+def get_polygonal(geometry) -> Optional[Union[Polygon, MultiPolygon]]:
+    """Get polygonal part of a geometry (E.g. of an intersection)."""
+    if isinstance(geometry, Polygon):
+        parts = [geometry]
+    else:
+        parts = list(getattr(geometry, "geoms", []))
+    polygons = []
+    for part in parts:
+        if isinstance(part, Polygon):
+            polygons.append(part)
+        elif isinstance(part, MultiPolygon):
+            polygons.extend(part.geoms)
+    polygons = [p for p in polygons if not p.is_empty and p.area > 0]
+    if not polygons:
+        return None
+    if len(polygons) == 1:
+        return polygons[0]
+    return MultiPolygon(polygons)
+
+
+def merge_responses(responses: List[dict], ratio: bool = False) -> dict:
+    """Merge responses of tiles by summing up the values per timestamp."""
+    result_key = "ratioResult" if ratio else "result"
+    merged = dict(responses[0])
+    items: Dict[str, dict] = {}
+    for response in responses:
+        for item in response[result_key]:
+            key = item["timestamp"]
+            if key not in items:
+                items[key] = dict(item)
+                continue
+            items[key]["value"] += item["value"]
+            if ratio:
+                items[key]["value2"] += item["value2"]
+    if ratio:
+        for item in items.values():
+            item["ratio"] = item["value2"] / item["value"] if item["value"] else "NaN"
+    merged[result_key] = [items[key] for key in sorted(items)]
+    return merged
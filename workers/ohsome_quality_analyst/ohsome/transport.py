@@ -0,0 +1,163 @@
+"""Transport of the HTTP client for the ohsome API with statistics of its pool.
+
+The transport owns the connection pool (`httpcore.AsyncConnectionPool`) of the shared
+HTTP client. Statistics are read from the pool itself: open and idle connections and
+whether a request has to wait for a connection. Under HTTP/2 a connection serves
+multiple requests at once. A request waits only if the pool is full and none of its
+connections can take another request. Under HTTP/1.1 a request also waits if all
+connections are held by requests in flight.
+
+A request is in flight from sending it until its response has been closed. All
+requests of the client pass the transport (Queries and metadata requests).
+"""
+
+from collections import Counter
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+
+import httpcore
+import httpx
+
+# Exceptions of `httpcore` and their public counterparts of `httpx`
+EXCEPTIONS = {
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.ProtocolError: httpx.ProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+}
+
+
+def map_exception(error: Exception) -> Exception:
+    """Get the `httpx` exception of the most specific matching `httpcore` exception."""
+    for cls in type(error).__mro__:
+        if cls in EXCEPTIONS:
+            return EXCEPTIONS[cls](str(error))
+    return error
+
+
+class PoolTransport(httpx.AsyncBaseTransport):
+    """Transport of a connection pool which keeps statistics of its usage.
+
+    Args:
+        limits: Limits of the connection pool.
+        http2: Use HTTP/2 if supported by the server.
+        stats: Counter of `requests`, `in_flight` and `waits`. Can be shared between
+            transports of consecutive clients.
+        pool: Connection pool. Created from the limits if not given.
+    """
+
+    def __init__(
+        self,
+        limits: httpx.Limits,
+        http2: bool,
+        stats: Counter,
+        pool: Optional[httpcore.AsyncConnectionPool] = None,
+    ) -> None:
+        self.max_connections = limits.max_connections
+        self.http2 = http2
+        self.stats = stats
+        if pool is None:
+            pool = httpcore.AsyncConnectionPool(
+                ssl_context=httpx.create_ssl_context(),
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+                http2=http2,
+            )
+        self.pool = pool
+
+    def is_saturated(self) -> bool:
+        """Has a new request to wait for a connection?"""
+        if self.max_connections is None:
+            return False
+        connections = self.pool.connections
+        if any(c.is_available() for c in connections):
+            return False
+        if len(connections) >= self.max_connections:
+            return True
+        # Under HTTP/1.1 each request in flight holds a connection, including
+        # connections still being opened which are not part of the pool yet.
+        return not self.http2 and self.stats["in_flight"] >= self.max_connections
+
+    def get_stats(self) -> dict:
+        connections = self.pool.connections
+        return {
+            "connections": len(connections),
+            "idle_connections": len([c for c in connections if c.is_idle()]),
+            "in_flight": self.stats["in_flight"],
+            "requests": self.stats["requests"],
+            "waits": self.stats["waits"],
+        }
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats["requests"] += 1
+        if self.is_saturated():
+            self.stats["waits"] += 1
+        self.stats["in_flight"] += 1
+        try:
+            response = await self.pool.handle_async_request(
+                httpcore.Request(
+                    method=request.method,
+                    url=httpcore.URL(
+                        scheme=request.url.raw_scheme,
+                        host=request.url.raw_host,
+                        port=request.url.port,
+                        target=request.url.raw_path,
+                    ),
+                    headers=request.headers.raw,
+                    content=request.stream,
+                    extensions=request.extensions,
+                )
+            )
+        except Exception as error:
+            self.stats["in_flight"] -= 1
+            raise map_exception(error) from error
+        except BaseException:
+            self.stats["in_flight"] -= 1
+            raise
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=ResponseStream(response.stream, self._release),
+            extensions=response.extensions,
+        )
+
+    def _release(self) -> None:
+        self.stats["in_flight"] -= 1
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+
+class ResponseStream(httpx.AsyncByteStream):
+    """Response body of the connection pool which calls back once it is closed."""
+
+    def __init__(self, stream: AsyncIterable[bytes], on_close: Callable) -> None:
+        self.stream = stream
+        self.on_close = on_close
+        self.closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self.stream:
+                yield chunk
+        except Exception as error:
+            raise map_exception(error) from error
+
+    async def aclose(self) -> None:
+        try:
+            if hasattr(self.stream, "aclose"):
+                await self.stream.aclose()
+        finally:
+            if not self.closed:
+                self.closed = True
+                self.on_close()
@@ -3,12 +3,14 @@
 Functions are triggered by the CLI and API.
 """
 import asyncio
+import json
 import logging
+from datetime import datetime, timezone
 from functools import singledispatch
-from typing import Coroutine, List, Optional, Union
+from typing import Coroutine, Dict, List, Optional, Tuple, Union
 
 from asyncpg.exceptions import UndefinedTableError
-from geojson import Feature, FeatureCollection, MultiPolygon, Polygon
+from geojson import Feature, FeatureCollection
 
 import ohsome_quality_analyst.geodatabase.client as db_client
 from ohsome_quality_analyst.api.request_models import (
@@ -21,22 +23,46 @@ from ohsome_quality_analyst.api.request_models import (
 from ohsome_quality_analyst.base.indicator import BaseIndicator as Indicator
 from ohsome_quality_analyst.base.layer import BaseLayer as Layer
 from ohsome_quality_analyst.base.report import BaseReport as Report
-from ohsome_quality_analyst.config import get_config_value
+from ohsome_quality_analyst.base.requirement import Requirement
+from ohsome_quality_analyst.config import get_config_flag, get_config_value
 from ohsome_quality_analyst.definitions import (
     INDICATOR_LAYER,
     get_layer_definition,
     get_valid_indicators,
     get_valid_layers,
 )
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.ohsome.series import get_fingerprint
 from ohsome_quality_analyst.utils.exceptions import (
     EmptyRecordError,
     SizeRestrictionError,
 )
-from ohsome_quality_analyst.utils.helper import loads_geojson, name_to_class
+from ohsome_quality_analyst.utils.geometry import get_areas
+from ohsome_quality_analyst.utils.helper import chunks, loads_geojson, name_to_class
 from ohsome_quality_analyst.utils.helper_asyncio import (
     filter_exceptions,
     gather_with_semaphore,
 )
+from ohsome_quality_analyst.utils.revalidation import Revalidator
+
+# Recomputes outdated results of the database in the background
+revalidator = Revalidator()
+
+
+async def startup() -> None:
+    """Set up resources shared during the lifetime of the process.
+
+    Called on startup of the API and on each CLI command.
+    """
+    await ohsome_client.startup()
+    await db_client.startup()
+
+
+async def shutdown() -> None:
+    """Release resources shared during the lifetime of the process."""
+    await revalidator.stop()
+    await ohsome_client.shutdown()
+    await db_client.shutdown()
 
 
 @singledispatch
@@ -56,21 +82,35 @@ async def _(
 ) -> Union[Feature, FeatureCollection]:
     """Create an indicator or multiple indicators as GeoJSON object.
 
-    Indicators for a FeatureCollection are created asynchronously utilizing semaphores.
+    Indicators for a FeatureCollection are created asynchronously in batches. Their
+    requirements are deduplicated and their queries to the ohsome API are batched into
+    "group by boundary" requests (See `run_batched`).
 
     Returns:
         Depending on the input a single indicator as GeoJSON Feature will be returned
         or multiple indicators as GeoJSON FeatureCollection will be returned.
     """
-    tasks: List[Coroutine] = []
-    for i, feature in enumerate(loads_geojson(parameters.bpolys)):
+    features = list(loads_geojson(parameters.bpolys))
+    # Only enforce size limit if ohsome API data is not provided
+    if size_restriction and isinstance(parameters, IndicatorBpolys):
+        check_area_size(features)
+    for i, feature in enumerate(features):
         if "id" not in feature.keys():
             feature["id"] = i
-        # Only enforce size limit if ohsome API data is not provided
-        if size_restriction and isinstance(parameters, IndicatorBpolys):
-            await check_area_size(feature.geometry)
-        tasks.append(create_indicator(parameters.copy(update={"bpolys": feature})))
-    indicators = await gather_with_semaphore(tasks)
+    if isinstance(parameters, IndicatorBpolys) and len(features) > 1:
+        indicators = await run_batched(
+            [
+                init_indicator(parameters.copy(update={"bpolys": feature}))
+                for feature in features
+            ]
+        )
+    else:
+        indicators = await gather_with_semaphore(
+            [
+                create_indicator(parameters.copy(update={"bpolys": feature}))
+                for feature in features
+            ]
+        )
     features = [
         i.as_feature(parameters.flatten, parameters.include_data) for i in indicators
     ]
@@ -103,22 +143,25 @@ async def create_report_as_geojson(
         or multiple reports as GeoJSON FeatureCollection will be returned.
     """
     if isinstance(parameters, ReportBpolys):
-        features = []
-        for i, feature in enumerate(loads_geojson(parameters.bpolys)):
+        features = list(loads_geojson(parameters.bpolys))
+        if size_restriction:
+            check_area_size(features)
+        tasks: List[Coroutine] = []
+        for i, feature in enumerate(features):
             if "id" not in feature.keys():
                 feature["id"] = i
-            if size_restriction:
-                await check_area_size(feature.geometry)
-            # Reports for a FeatureCollection are not created asynchronously (as it is
-            # the case with indicators), because indicators of a report are created
-            # asynchronously
-            report = await create_report(
-                parameters.copy(update={"bpolys": feature}),
-                force,
-            )
-            features.append(
-                report.as_feature(parameters.flatten, parameters.include_data)
+            tasks.append(
+                create_report(parameters.copy(update={"bpolys": feature}), force)
             )
+        # Reports of a batch are created concurrently so that identical queries of
+        # their indicators for different features can be batched
+        if len(tasks) > 1:
+            reports = await gather_batched(tasks)
+        else:
+            reports = [await tasks[0]]
+        features = [
+            r.as_feature(parameters.flatten, parameters.include_data) for r in reports
+        ]
         if len(features) == 1:
             return features[0]
         else:
@@ -148,6 +191,9 @@ async def _(
 
     In case fetching the Indicator results from the database fails, the Indicator is
     created from scratch and then those results are saved to the database.
+
+    Outdated results are served but recomputed in the background if configured
+    (See `revalidate_outdated`).
     """
     name = parameters.name.value
     layer: Layer = get_layer_definition(parameters.layer_key.value)
@@ -175,6 +221,8 @@ async def _(
             indicator_raw,
             dataset,
             feature_id,
+            # Figure is part of the HTML snippet
+            include_svg=parameters.include_svg or parameters.include_html,
         )
     except (UndefinedTableError, EmptyRecordError):
         failure = True
@@ -187,6 +235,8 @@ async def _(
             )
         )
         await db_client.save_indicator_results(indicator, dataset, feature_id)
+    else:
+        await revalidate_outdated([indicator], dataset, feature_id)
     indicator.create_html()
     return indicator
 
@@ -197,6 +247,11 @@ async def _(
     *_args,
 ) -> Indicator:
     """Create an indicator from scratch."""
+    return await run_indicator(init_indicator(parameters))
+
+
+def init_indicator(parameters: IndicatorBpolys) -> Indicator:
+    """Initialize an indicator for a custom AOI without running it."""
     name = parameters.name.value
     layer: Layer = get_layer_definition(parameters.layer_key.value)
     feature = parameters.bpolys
@@ -207,17 +262,7 @@ async def _(
     logging.info("Layer name:     {0:4}".format(layer.name))
 
     indicator_class = name_to_class(class_type="indicator", name=name)
-    indicator = indicator_class(layer, feature)
-
-    logging.info("Run preprocessing")
-    await indicator.preprocess()
-    logging.info("Run calculation")
-    indicator.calculate()
-    logging.info("Run figure creation")
-    indicator.create_figure()
-    indicator.create_html()
-
-    return indicator
+    return indicator_class(layer, feature)
 
 
 @create_indicator.register
@@ -237,7 +282,17 @@ async def _(
 
     indicator_class = name_to_class(class_type="indicator", name=name)
     indicator = indicator_class(layer, feature)
+    return await run_indicator(indicator)
+
+
+async def run_indicator(indicator: Indicator) -> Indicator:
+    """Run preprocessing, calculation and figure creation of an indicator.
 
+    The data snapshot of the ohsome API the indicator is computed on is written to the
+    result. It is used to detect outdated results (See `revalidate_outdated`) even if
+    those are recomputed only after saving (`stale_while_revalidate`).
+    """
+    indicator.result.timestamp_snapshot = await get_snapshot()
     logging.info("Run preprocessing")
     await indicator.preprocess()
     logging.info("Run calculation")
@@ -245,10 +300,38 @@ async def _(
     logging.info("Run figure creation")
     indicator.create_figure()
     indicator.create_html()
-
     return indicator
 
 
+async def fetch_inputs(indicators: List[Indicator]) -> None:
+    """Fetch the data required by the indicators and hand each indicator its inputs.
+
+    Requirements declared by the indicators are deduplicated: Identical requirements
+    for the same feature (E.g. the same query of two indicators of a report) are
+    fetched only once. All distinct requirements are fetched concurrently.
+    """
+    declared = await asyncio.gather(*(i.requirements() for i in indicators))
+    fetches: Dict[Tuple[str, str], Tuple[Requirement, Feature]] = {}
+    keys: List[Dict[str, Tuple[str, str]]] = []
+    for indicator, requirements in zip(indicators, declared):
+        fingerprint = get_fingerprint(indicator.feature)
+        names = {}
+        for name, requirement in requirements.items():
+            key = (fingerprint, requirement.key)
+            fetches.setdefault(key, (requirement, indicator.feature))
+            names[name] = key
+        keys.append(names)
+    logging.info(
+        "Fetch {0} distinct of {1} requirements".format(
+            len(fetches), sum(len(names) for names in keys)
+        )
+    )
+    values = await asyncio.gather(*(r.fetch(f) for r, f in fetches.values()))
+    inputs = dict(zip(fetches.keys(), values))
+    for indicator, names in zip(indicators, keys):
+        indicator.inputs = {name: inputs[key] for name, key in names.items()}
+
+
 @singledispatch
 async def create_report(parameters) -> Report:
     """Create a Report."""
@@ -261,7 +344,9 @@ async def create_report(parameters) -> Report:
 async def _(parameters: ReportDatabase, force: bool = False) -> Report:
     """Create a Report.
 
-    Fetches indicator results form the database.
+    Fetches indicator results form the database with one query. Only indicators
+    without results (or all indicators if `force`) are created from scratch and their
+    results are saved to the database.
     Aggregates all indicator results and calculates an overall quality score.
 
     Indicators for a Report are created asynchronously utilizing semaphores.
@@ -286,20 +371,34 @@ async def _(parameters: ReportDatabase, force: bool = False) -> Report:
     report_class = name_to_class(class_type="report", name=name)
     report = report_class(feature=feature)
 
-    tasks: List[Coroutine] = []
+    indicators: List[Indicator] = []
     for indicator_name, layer_key in report.indicator_layer:
-        tasks.append(
-            create_indicator(
-                IndicatorDatabase(
-                    name=indicator_name,
-                    layerKey=layer_key,
-                    dataset=dataset,
-                    featureId=feature_id,
-                ),
-                force=force,
+        indicator_class = name_to_class(class_type="indicator", name=indicator_name)
+        indicators.append(indicator_class(get_layer_definition(layer_key), feature))
+    missing = indicators
+    if not force:
+        try:
+            missing = await db_client.load_indicator_results_batch(
+                indicators,
+                dataset,
+                feature_id,
+                # Figures are part of the HTML snippets
+                include_svg=parameters.include_svg or parameters.include_html,
             )
+        except UndefinedTableError:
+            pass
+    loaded = [indicator for indicator in indicators if indicator not in missing]
+    await revalidate_outdated(loaded, dataset, feature_id)
+    for indicator in loaded:
+        indicator.create_html()
+    if missing:
+        logging.info("Create {0} missing indicators".format(len(missing)))
+        await fetch_inputs(missing)
+        await gather_with_semaphore([run_indicator(i) for i in missing])
+        await asyncio.gather(
+            *(db_client.save_indicator_results(i, dataset, feature_id) for i in missing)
         )
-    report.indicators = await gather_with_semaphore(tasks)
+    report.indicators = indicators
     report.combine_indicators()
     report.create_html()
     return report
@@ -325,18 +424,15 @@ async def _(parameters: ReportBpolys, *_args) -> Report:
     report_class = name_to_class(class_type="report", name=name)
     report = report_class(feature=feature)
 
-    tasks: List[Coroutine] = []
+    indicators: List[Indicator] = []
     for indicator_name, layer_key in report.indicator_layer:
-        tasks.append(
-            create_indicator(
-                IndicatorBpolys(
-                    name=indicator_name,
-                    layerKey=layer_key,
-                    bpolys=feature,
-                )
-            )
-        )
-    report.indicators = await gather_with_semaphore(tasks)
+        indicator_class = name_to_class(class_type="indicator", name=indicator_name)
+        indicators.append(indicator_class(get_layer_definition(layer_key), feature))
+    # Requirements shared by indicators of the report are fetched only once
+    await fetch_inputs(indicators)
+    report.indicators = await gather_with_semaphore(
+        [run_indicator(indicator) for indicator in indicators]
+    )
     report.combine_indicators()
     report.create_html()
     return report
@@ -352,6 +448,7 @@ async def create_all_indicators(
 
     Possible Indicator/Layer combinations are defined in `definitions.py`.
     This functions executes `create_indicator()` function up to four times concurrently.
+    Results are saved to the database in batches (See `db_client.buffered_writes`).
     """
     if indicator_name is not None and layer_key is None:
         layers = get_valid_layers(indicator_name)
@@ -379,14 +476,152 @@ async def create_all_indicators(
                     force=force,
                 )
             )
-    # Do no raise exceptions. Filter out exceptions from result list and log them.
-    results = await gather_with_semaphore(tasks, return_exceptions=True)
+    # Results are saved in batches instead of one by one
+    async with db_client.buffered_writes():
+        # Do no raise exceptions. Filter out exceptions from result list and log them.
+        results = await gather_with_semaphore(tasks, return_exceptions=True)
     exceptions = filter_exceptions(results)
     for exception in exceptions:
         message = getattr(exception, "message", repr(exception))
         logging.warning("Ignoring error: {0}".format(message))
 
 
-async def check_area_size(geom: Union[Polygon, MultiPolygon]):
-    if await db_client.get_area_of_bpolys(geom) > get_config_value("geom_size_limit"):
-        raise SizeRestrictionError(get_config_value("geom_size_limit"))
+async def revalidate_outdated(
+    indicators: List[Indicator],
+    dataset: str,
+    feature_id: str,
+) -> None:
+    """Flag outdated results of the database and recompute them in the background.
+
+    A result is outdated if the ohsome API provides a more recent data snapshot than
+    the one the result has been computed on (stale-while-revalidate). Only if
+    configured (`stale_while_revalidate`).
+    """
+    if not get_config_flag("stale_while_revalidate") or not indicators:
+        return
+    try:
+        latest = await ohsome_client.get_latest_ohsome_timestamp()
+    except Exception as error:
+        logging.warning("Could not check results for updates: {0}".format(repr(error)))
+        return
+    for indicator in indicators:
+        # Results saved without data snapshot are checked by their OSM data. The
+        # timestamp of the OSM data can be older than the snapshot (E.g. last month of
+        # a time series). Those results are outdated until they have been recomputed.
+        timestamp = (
+            indicator.result.timestamp_snapshot or indicator.result.timestamp_osm
+        )
+        if not is_outdated(timestamp, latest):
+            continue
+        indicator.result.stale = True
+        name = type(indicator).__name__
+        key = json.dumps([name, indicator.layer.key, dataset, feature_id])
+        revalidator.schedule(
+            key,
+            recreate_indicator,
+            name,
+            indicator.layer,
+            indicator.feature,
+            dataset,
+            feature_id,
+        )
+
+
+def is_outdated(timestamp: Optional[datetime], latest: datetime) -> bool:
+    """Check if a result based on data of the given timestamp is outdated."""
+    if timestamp is None:
+        return False
+    if timestamp.tzinfo is not None:
+        # Latest timestamp of the ohsome API is naive (UTC)
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp < latest
+
+
+async def get_snapshot() -> Optional[datetime]:
+    """Get the latest timestamp of the ohsome API data as timezone aware datetime."""
+    try:
+        latest = await ohsome_client.get_latest_ohsome_timestamp()
+    except Exception as error:
+        logging.warning("Could not get data snapshot: {0}".format(repr(error)))
+        return None
+    return latest.replace(tzinfo=timezone.utc)
+
+
+async def recreate_indicator(
+    name: str,
+    layer: Layer,
+    feature: Feature,
+    dataset: str,
+    feature_id: str,
+) -> None:
+    """Create an Indicator from scratch and save its results to the database."""
+    logging.info("Recreate outdated Indicator {0} ({1})".format(name, feature_id))
+    indicator_class = name_to_class(class_type="indicator", name=name)
+    indicator = await run_indicator(indicator_class(layer, feature))
+    await db_client.save_indicator_results(indicator, dataset, feature_id)
+
+
+async def gather_batched(tasks: List[Coroutine]) -> list:
+    """Run indicator or report creations for multiple features in batches.
+
+    All tasks of a batch run concurrently. Their identical queries to the ohsome API
+    for different features are send as one "group by boundary" request (See
+    `ohsome.client.batch_queries`). The batch size is configurable.
+
+    The number of tasks running at a time is limited (`concurrent_computations`).
+    Therefore, at most this number of queries is expected per "group by boundary"
+    request.
+    """
+    batch_size = int(get_config_value("ohsome_batch_size"))
+    if batch_size <= 1:
+        return await gather_with_semaphore(tasks)
+    limit = int(get_config_value("concurrent_computations"))
+    results = []
+    for i, chunk in enumerate(chunks(tasks, batch_size)):
+        try:
+            with ohsome_client.batch_queries(min(len(chunk), limit)):
+                results += await gather_with_semaphore(chunk)
+        except Exception:
+            # Close coroutines of remaining batches which will never be awaited
+            for task in tasks[(i + 1) * batch_size :]:
+                task.close()
+            raise
+    return results
+
+
+async def run_batched(indicators: List[Indicator]) -> List[Indicator]:
+    """Run indicators for multiple features in batches.
+
+    Requirements of the indicators of a batch are fetched at once (See
+    `fetch_inputs`). Identical requirements (E.g. of duplicated features) are fetched
+    only once. Identical queries to the ohsome API for different features are send as
+    one "group by boundary" request (See `ohsome.client.batch_queries`). The batch
+    size is configurable. Without batching of queries the number of features fetched
+    at a time is limited (`concurrent_computations`).
+    """
+    batch_size = int(get_config_value("ohsome_batch_size"))
+    limit = int(get_config_value("concurrent_computations"))
+    results: List[Indicator] = []
+    if batch_size <= 1:
+        for chunk in chunks(indicators, limit):
+            await fetch_inputs(chunk)
+            results += await gather_with_semaphore([run_indicator(i) for i in chunk])
+        return results
+    for chunk in chunks(indicators, batch_size):
+        # Requirements of all features of the batch are fetched concurrently
+        with ohsome_client.batch_queries(len(chunk)):
+            await fetch_inputs(chunk)
+        with ohsome_client.batch_queries(min(len(chunk), limit)):
+            results += await gather_with_semaphore([run_indicator(i) for i in chunk])
+    return results
+
+
+def check_area_size(features: List[Feature]):
+    """Check the geodesic area of each feature against the size limit.
+
+    Raises:
+        SizeRestrictionError: If the area of a feature exceeds the size limit.
+    """
+    size_limit = get_config_value("geom_size_limit")
+    if any(area > size_limit for area in get_areas(features)):
+        raise SizeRestrictionError(size_limit)
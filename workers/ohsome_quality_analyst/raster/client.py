@@ -1,16 +1,111 @@
-"""A client to raster datasets existing as files on disk."""
+"""A client to raster datasets existing as files on disk.
 
+Raster files are opened once per process and kept open (See `get_dataset`). Zonal
+statistics are computed on the window of the raster covering the features which is
+read from the open dataset.
+"""
+
+import math
 import os
+import threading
+from collections import OrderedDict
 from copy import deepcopy
+from dataclasses import dataclass, field
+from numbers import Number
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import geojson
+import numpy as np
+import rasterio
+from affine import Affine
 from pyproj import Transformer
+from rasterio.windows import Window
 from rasterstats import zonal_stats
+from rasterstats.io import read_features
+from shapely.geometry import shape
 
 from ohsome_quality_analyst.config import get_config_value
 from ohsome_quality_analyst.definitions import RasterDataset
+from ohsome_quality_analyst.ohsome.series import get_fingerprint
 from ohsome_quality_analyst.utils.exceptions import RasterDatasetNotFoundError
 
+# Features are read at once if the window covering all of them is at most this large.
+# Otherwise the window covering each feature is read one by one.
+MAX_WINDOW_SIZE = 4096 * 4096  # Pixels
+# Number of geometries of which the projected coordinates are kept (See `transform`)
+MAX_PROJECTED = 256
+# Members of GeoJSON objects which contain positions
+GEOJSON_NESTED = ("features", "geometry", "geometries", "coordinates")
+
+
+@dataclass
+class DatasetHandle:
+    """An open raster dataset and its metadata.
+
+    Attributes:
+        dataset: Open dataset. Reads have to hold the lock.
+        pid: Id of the process which has opened the dataset.
+        stat: Modification time and size of the file when it has been opened.
+        transform, shape, nodata: Metadata of the first band read once on opening.
+    """
+
+    dataset: rasterio.DatasetReader
+    pid: int
+    stat: Tuple[int, int]
+    transform: Affine
+    shape: Tuple[int, int]
+    nodata: Optional[float]
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_datasets: Dict[str, DatasetHandle] = {}
+_datasets_lock = threading.Lock()
+
+
+def get_dataset(path: str) -> DatasetHandle:
+    """Get the open dataset of a raster file. It is opened on first usage.
+
+    The dataset is reopened if the file on disk has changed (modification time or
+    size) or if the current process is a fork of the process which opened it.
+    Datasets opened by the parent process are not closed in the child process.
+    """
+    st = os.stat(path)
+    stat = (st.st_mtime_ns, st.st_size)
+    pid = os.getpid()
+    with _datasets_lock:
+        handle = _datasets.get(path)
+        if handle is not None and handle.pid != pid:
+            # Forked: Do not touch handles shared with the parent process
+            _datasets.clear()
+            handle = None
+        if handle is not None and handle.stat != stat:
+            # Wait for reads of other threads from the outdated dataset
+            with handle.lock:
+                handle.dataset.close()
+            handle = None
+        if handle is None:
+            dataset = rasterio.open(path)
+            handle = DatasetHandle(
+                dataset=dataset,
+                pid=pid,
+                stat=stat,
+                transform=dataset.transform,
+                shape=dataset.shape,
+                nodata=dataset.nodata,
+            )
+            _datasets[path] = handle
+        return handle
+
+
+def close_datasets() -> None:
+    """Close all open datasets of the current process."""
+    with _datasets_lock:
+        for handle in _datasets.values():
+            if handle.pid == os.getpid():
+                with handle.lock:
+                    handle.dataset.close()
+        _datasets.clear()
+
 
 def get_zonal_stats(
     feature: geojson.Feature,
@@ -25,28 +120,151 @@ def get_zonal_stats(
     The only difference is that the arguments `vectors` and `raster` of `zonal_stats`
     are expected to be a `geojson.Feature` object and a member of the `RasterDataset`
     class respectively.
+
+    Instead of the path of the raster file the window covering the features is passed
+    to `zonal_stats`. It is read from the dataset kept open (See `get_dataset`).
     """
-    return zonal_stats(
-        transform(feature, raster),
-        get_raster_path(raster),
-        *args,
-        nodata=raster.nodata,
-        **kwargs,
-    )
+    handle = get_dataset(get_raster_path(raster))
+    nodata = raster.nodata if raster.nodata is not None else handle.nodata
+    features = list(read_features(transform(feature, raster)))
+    if not features:
+        return []
+    bounds = [shape(f["geometry"]).bounds for f in features]
+    window = get_window(handle, get_union_bounds(bounds))
+    if window.width * window.height <= MAX_WINDOW_SIZE:
+        groups = [(features, window)]
+    else:
+        groups = [([f], get_window(handle, b)) for f, b in zip(features, bounds)]
+    results = []
+    for group, window in groups:
+        with handle.lock:
+            array = handle.dataset.read(
+                1,
+                window=window,
+                boundless=True,
+                fill_value=nodata,
+            )
+        results.extend(
+            zonal_stats(
+                group,
+                array,
+                *args,
+                affine=handle.dataset.window_transform(window),
+                nodata=nodata,
+                **kwargs,
+            )
+        )
+    return results
+
+
+def get_union_bounds(bounds: List[Tuple[float, float, float, float]]) -> tuple:
+    bounds = np.asarray(bounds)
+    return (*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0))
+
+
+def get_window(handle: DatasetHandle, bounds: tuple) -> Window:
+    """Get the window of whole pixels covering the bounds with a margin of one pixel.
+
+    The window can exceed the extent of the raster (boundless).
+    """
+    left, bottom, right, top = bounds
+    xs, ys = (~handle.transform) * (np.array([left, right]), np.array([top, bottom]))
+    col_start, col_stop = math.floor(min(xs)) - 1, math.ceil(max(xs)) + 1
+    row_start, row_stop = math.floor(min(ys)) - 1, math.ceil(max(ys)) + 1
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
 
 
 def transform(feature: geojson.Feature, raster: RasterDataset):
     """Convert Feature to RasterDataset CRS.
 
-    GeoJSON Feature CRS/SRID is expected to be EPSG:4326.
+    GeoJSON Feature CRS/SRID is expected to be EPSG:4326. Features, FeatureCollections
+    and geometries are supported. The input is not modified and a new object is
+    returned on every call.
+
+    All coordinates are transformed at once. Projected coordinates of the most
+    recently used geometries are kept by fingerprint of the geometry and CRS.
+    Repeated calls with the same geometry (E.g. zonal statistics of multiple rasters
+    for the hex-cells of an AOI) project it only once per CRS.
     """
     if raster.crs == "EPSG:4326":
         return feature
-    transformer = Transformer.from_crs("EPSG:4326", raster.crs, always_xy=True)
-    return geojson.utils.map_tuples(
-        lambda coordinates: transformer.transform(coordinates[0], coordinates[1]),
-        deepcopy(feature),
-    )
+    key = (get_fingerprint(feature), raster.crs)
+    with _projected_lock:
+        positions = _projected.get(key)
+        if positions is not None:
+            _projected.move_to_end(key)
+    if positions is None:
+        transformer = get_transformer("EPSG:4326", raster.crs)
+        positions = transform_positions(feature, transformer)
+        with _projected_lock:
+            _projected[key] = positions
+            while len(_projected) > MAX_PROJECTED:
+                _projected.popitem(last=False)
+    return replace_positions(feature, iter(positions))
+
+
+# Projected positions by fingerprint of the geometry and CRS (See `transform`)
+_projected: OrderedDict = OrderedDict()
+_projected_lock = threading.Lock()
+# Transformer are not safe to be shared between threads
+_transformers = threading.local()
+
+
+def get_transformer(crs_from: str, crs_to: str) -> Transformer:
+    """Get a transformer between two CRS. Created once per thread."""
+    cache = _transformers.__dict__.setdefault("cache", {})
+    transformer = cache.get((crs_from, crs_to))
+    if transformer is None:
+        transformer = Transformer.from_crs(crs_from, crs_to, always_xy=True)
+        cache[(crs_from, crs_to)] = transformer
+    return transformer
+
+
+def transform_geojson(obj: dict, transformer: Transformer) -> dict:
+    """Transform all coordinates of a GeoJSON object with one call of the transformer.
+
+    A new object is returned. Positions of the new object are tuples.
+    """
+    return replace_positions(obj, iter(transform_positions(obj, transformer)))
+
+
+def transform_positions(obj: dict, transformer: Transformer) -> List[tuple]:
+    """Transform all positions of a GeoJSON object with one call of the transformer."""
+    positions = []
+    collect_positions(obj, positions)
+    if not positions:
+        return []
+    array = np.asarray(positions, dtype=float)
+    xs, ys = transformer.transform(array[:, 0], array[:, 1])
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def collect_positions(obj: Union[dict, list], positions: list) -> None:
+    if isinstance(obj, dict):
+        for key in GEOJSON_NESTED:
+            if obj.get(key) is not None:
+                collect_positions(obj[key], positions)
+    elif obj and isinstance(obj[0], Number):
+        positions.append(obj[:2])
+    else:
+        for item in obj:
+            collect_positions(item, positions)
+
+
+def replace_positions(obj: Union[dict, list], positions: Iterator[tuple]):
+    """Build a new GeoJSON object with the given positions. Nothing is shared."""
+    if isinstance(obj, dict):
+        new = {}
+        for key, value in obj.items():
+            if key in GEOJSON_NESTED and value is not None:
+                new[key] = replace_positions(value, positions)
+            else:
+                new[key] = deepcopy(value)
+        return new
+    elif obj and isinstance(obj[0], Number):
+        return next(positions)
+    else:
+        return [replace_positions(item, positions) for item in obj]
 
 
 def get_raster_path(raster: RasterDataset) -> str:
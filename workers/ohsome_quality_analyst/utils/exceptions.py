@@ -5,9 +5,10 @@ from schema import SchemaError
 class OhsomeApiError(Exception):
     """Request to ohsome API failed."""
 
-    def __init__(self, message):
+    def __init__(self, message, status_code=None):
         self.name = "OhsomeApiError"
         self.message = message
+        self.status_code = status_code
 
 
 class SizeRestrictionError(ValueError):
@@ -0,0 +1,75 @@
+"""Geodesic computations on GeoJSON geometries.
+
+Computed in-process on the WGS84 ellipsoid using pyproj (GeographicLib). Results match
+the ones of PostGIS (`ST_Area` of a geography) which relies on the same algorithm.
+"""
+
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+from geojson import Feature, FeatureCollection
+from pyproj import Geod
+
+geod = Geod(ellps="WGS84")
+
+
+def get_area(bpolys: Union[Feature, FeatureCollection]) -> float:
+    """Get geodesic area of a (Multi)Polygon Feature or FeatureCollection in km².
+
+    Geometries can also be given without Feature.
+    """
+    if bpolys.get("type") == "FeatureCollection":
+        return sum(get_areas(bpolys["features"]))
+    return get_areas([bpolys])[0]
+
+
+def get_areas(features: Iterable[Feature]) -> List[float]:
+    """Get geodesic area of each (Multi)Polygon Feature in km².
+
+    The vertices of all rings of all features are converted into a single array at
+    once. GeographicLib computes the area of one ring per call. Each ring is passed as
+    view of that array. Ring areas are summed up per feature with holes subtracted.
+    """
+    rings, features_of_rings, signs = [], [], []
+    count = 0
+    for i, feature in enumerate(features):
+        count += 1
+        for j, ring in iterate_rings(feature.get("geometry", feature)):
+            rings.append(ring)
+            features_of_rings.append(i)
+            signs.append(1.0 if j == 0 else -1.0)  # Holes
+    if not rings:
+        return [0.0] * count
+    lengths = [len(ring) for ring in rings]
+    vertices = np.asarray([v[:2] for ring in rings for v in ring], dtype=float)
+    lons, lats = vertices[:, 0], vertices[:, 1]
+    offsets = np.cumsum([0] + lengths)
+    ring_areas = np.fromiter(
+        (
+            abs(geod.polygon_area_perimeter(lons[a:b], lats[a:b])[0])
+            for a, b in zip(offsets[:-1], offsets[1:])
+        ),
+        dtype=float,
+        count=len(rings),
+    )
+    areas = np.bincount(
+        features_of_rings,
+        weights=ring_areas * np.asarray(signs),
+        minlength=count,
+    )
+    return (areas / 1e6).tolist()
+
+
+def iterate_rings(geometry: dict) -> Iterator[Tuple[int, list]]:
+    """Yield index and coordinates of each ring of each polygon of a geometry.
+
+    The index of the exterior ring of a polygon is 0. Other geometries have no rings.
+    """
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return
+    for polygon in polygons:
+        yield from enumerate(polygon)
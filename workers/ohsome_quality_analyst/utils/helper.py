@@ -8,7 +8,7 @@ import pkgutil
 import re
 from datetime import date, datetime
 from pathlib import Path
-from typing import Generator, Union
+from typing import Generator, List, Sequence, Union
 
 import geojson
 import numpy as np
@@ -167,6 +167,12 @@ def flatten_sequence(input_seq: Union[dict, list, tuple, set]) -> list:
     return output
 
 
+def chunks(sequence: Sequence, size: int) -> Generator[List, None, None]:
+    """Split sequence into lists of given size. The last list can be shorter."""
+    for i in range(0, len(sequence), size):
+        yield list(sequence[i : i + size])
+
+
 def get_project_root() -> Path:
     """Get root of the Python project."""
     return Path(__file__).resolve().parent.parent.parent.resolve()
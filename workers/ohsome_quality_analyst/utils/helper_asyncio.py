@@ -2,11 +2,17 @@
 import asyncio
 from typing import Coroutine, List
 
+from ohsome_quality_analyst.config import get_config_value
+
 
 async def gather_with_semaphore(tasks: list, *args, **kwargs) -> Coroutine:
-    """A wrapper around `gather` to limit the number of tasks executed at a time."""
+    """A wrapper around `gather` to limit the number of tasks executed at a time.
+
+    The limit is configurable (`concurrent_computations`). Requests to the ohsome API
+    made by the tasks are limited adaptively (See `ohsome.controller`).
+    """
     # Semaphore needs to initiated inside of the event loop
-    semaphore = asyncio.Semaphore(4)
+    semaphore = asyncio.Semaphore(int(get_config_value("concurrent_computations")))
 
     async def sem_task(task):
         async with semaphore:
@@ -0,0 +1,75 @@
+"""Recompute outdated results in the background (stale-while-revalidate).
+
+An outdated result is served immediately while its recomputation is queued. A
+recomputation which is already queued or running is not queued a second time.
+Recomputations run one at a time to not compete with requests for resources.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class Revalidator:
+    def __init__(self) -> None:
+        self.stats: Counter = Counter()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def schedule(self, key: str, function: Callable[..., Awaitable], *args) -> bool:
+        """Queue the coroutine function unless a call with the same key is queued.
+
+        Returns:
+            True if the call has been queued.
+        """
+        if key in self._tasks:
+            self.stats["deduplicated"] += 1
+            return False
+        self.stats["queued"] += 1
+        loop = asyncio.get_running_loop()
+        self._tasks[key] = loop.create_task(self._run(key, function, *args))
+        return True
+
+    async def _run(self, key: str, function: Callable[..., Awaitable], *args) -> None:
+        try:
+            async with self._get_semaphore():
+                await function(*args)
+            self.stats["completed"] += 1
+        except Exception as error:
+            self.stats["failed"] += 1
+            logging.warning("Revalidation failed: {0}".format(repr(error)))
+        finally:
+            self._tasks.pop(key, None)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphore needs to be created inside of the event loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(1)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def join(self) -> None:
+        """Wait for all queued recomputations."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Cancel all queued recomputations."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def get_stats(self) -> dict:
+        """Get number of queued, deduplicated, completed, failed and pending calls."""
+        return {
+            "queued": self.stats["queued"],
+            "deduplicated": self.stats["deduplicated"],
+            "completed": self.stats["completed"],
+            "failed": self.stats["failed"],
+            "pending": len(self._tasks),
+        }
@@ -0,0 +1,102 @@
+"""Micro-benchmark of saving and loading indicator results in the geodatabase.
+
+Compares the previous way of querying (SQL files read and results table created on
+every call, new statement on every call) with the current way (SQL loaded once on
+import, results table created once on creation of the pool, statements prepared once
+per pooled connection).
+
+Requires a running geodatabase (See `docs/development_setup.md`).
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from statistics import median
+
+import click
+
+import ohsome_quality_analyst.geodatabase.client as db_client
+
+DATA = (
+    "Benchmark",
+    "benchmark",
+    "benchmark",
+    "1",
+    datetime.now(timezone.utc),
+    datetime.now(timezone.utc),
+    datetime.now(timezone.utc),
+    1,
+    0.5,
+    "",
+    None,
+    json.dumps({}),
+)
+
+
+def read_sql(file_name: str) -> str:
+    with open(os.path.join(db_client.WORKING_DIR, file_name), "r") as file:
+        return file.read()
+
+
+async def save_previous(conn):
+    await conn.execute(read_sql("create_results_table.sql"))
+    await conn.execute(read_sql("save_results.sql"), *DATA)
+
+
+async def save_current(conn):
+    await conn.execute(db_client.SAVE_RESULTS, *DATA)
+
+
+async def load_previous(conn):
+    # Without statement cache the statement is prepared again on every call
+    statement = await conn.prepare(read_sql("load_results.sql"))
+    await statement.fetchrow(*DATA[:4])
+
+
+async def load_current(conn):
+    await conn.fetchrow(db_client.LOAD_RESULTS, *DATA[:4])
+
+
+async def measure(func, repeat: int) -> float:
+    """Median duration of a call in ms."""
+    durations = []
+    for _ in range(repeat):
+        async with db_client.get_connection() as conn:
+            started_at = time.perf_counter()
+            await func(conn)
+            durations.append((time.perf_counter() - started_at) * 1000)
+    return median(durations)
+
+
+async def benchmark(repeat: int):
+    await db_client.startup()
+    try:
+        for name, previous, current in (
+            ("save", save_previous, save_current),
+            ("load", load_previous, load_current),
+        ):
+            # Warm up
+            await measure(current, 1)
+            previous_ms = await measure(previous, repeat)
+            current_ms = await measure(current, repeat)
+            print(
+                "{0}: previous {1:.3f} ms, current {2:.3f} ms ({3:.1f}x)".format(
+                    name, previous_ms, current_ms, previous_ms / current_ms
+                )
+            )
+        async with db_client.get_connection() as conn:
+            await conn.execute("DELETE FROM results WHERE indicator_name = $1", DATA[0])
+    finally:
+        await db_client.shutdown()
+
+
+@click.command()
+@click.option("--repeat", default=1000, show_default=True, type=int)
+def run(repeat: int):
+    asyncio.run(benchmark(repeat))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,144 @@
+"""Precompute the covariates of the Building Completeness indicator per hex-cell.
+
+Covariates (SHDI, VNL, GHS-POP, GHS-POP density and shares of GHS-SMOD classes) are
+static per hex-cell. They are computed once for all hex-cells (table `hexcells`) and
+stored in the table `hexcells_covariates`. On request of the indicator they are
+selected together with the hex-cells (See `get_hex_cells`).
+
+Hex-cells are processed in batches. Covariates derived from raster datasets are
+computed by a pool of processes. Already computed hex-cells are skipped unless
+`--force` is given.
+
+Requires a running geodatabase (See `docs/development_setup.md`) and the raster
+datasets in the data directory (`data_dir`).
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import click
+import geojson
+from geojson import Feature, FeatureCollection
+
+import ohsome_quality_analyst.geodatabase.client as db_client
+from ohsome_quality_analyst.config import configure_logging
+from ohsome_quality_analyst.indicators.building_completeness.indicator import (
+    COVARIATES,
+    CREATE_COVARIATES_TABLE,
+    SAVE_COVARIATES,
+    get_raster_covariates,
+    get_shdi,
+)
+
+SELECT_HEX_CELLS = """
+SELECT
+    hexcells.geohash_id,
+    ST_AsGeoJSON (hexcells.wkb_geometry, 6),
+    ST_Area (hexcells.wkb_geometry::geography)
+FROM
+    hexcells
+WHERE
+    cast($1 AS boolean)
+    OR NOT EXISTS (
+        SELECT
+            1
+        FROM
+            hexcells_covariates
+        WHERE
+            hexcells_covariates.geohash_id = hexcells.geohash_id)
+"""
+
+
+async def iterate_batches(batch_size: int, force: bool):
+    """Stream hex-cells from the geodatabase as FeatureCollections."""
+    async with db_client.get_connection() as conn:
+        # Server-side cursors are only available inside of a transaction
+        async with conn.transaction():
+            batch = []
+            async for record in conn.cursor(SELECT_HEX_CELLS, force):
+                batch.append(
+                    Feature(
+                        id=record[0],
+                        geometry=geojson.loads(record[1]),
+                        properties={"area": record[2]},
+                    )
+                )
+                if len(batch) == batch_size:
+                    yield FeatureCollection(features=batch)
+                    batch = []
+            if batch:
+                yield FeatureCollection(features=batch)
+
+
+async def build_batch(hex_cells: FeatureCollection, executor) -> int:
+    loop = asyncio.get_running_loop()
+    covariates, shdi = await asyncio.gather(
+        loop.run_in_executor(executor, get_raster_covariates, hex_cells),
+        get_shdi(hex_cells),
+    )
+    # Missing SHDI values are stored as NULL and filled in on request
+    covariates["shdi"] = shdi
+    records = [
+        (cell["id"], *(covariates[name][i] for name in COVARIATES))
+        for i, cell in enumerate(hex_cells["features"])
+    ]
+    async with db_client.get_connection() as conn:
+        await conn.executemany(SAVE_COVARIATES, records)
+    return len(records)
+
+
+async def build(batch_size: int, processes: int, force: bool):
+    await db_client.startup()
+    try:
+        async with db_client.get_connection() as conn:
+            await conn.execute(CREATE_COVARIATES_TABLE)
+        started_at = time.monotonic()
+        count = 0
+        pending: List[asyncio.Task] = []
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            async for hex_cells in iterate_batches(batch_size, force):
+                pending.append(asyncio.create_task(build_batch(hex_cells, executor)))
+                # Keep every process busy without reading all hex-cells into memory
+                if len(pending) >= processes * 2:
+                    done, rest = await asyncio.wait(
+                        pending,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    count += sum(task.result() for task in done)
+                    pending = list(rest)
+                    logging.info("Covariates of {0} hex-cells saved".format(count))
+            count += sum(await asyncio.gather(*pending))
+        logging.info(
+            "Covariates of {0} hex-cells saved in {1:.0f} s".format(
+                count, time.monotonic() - started_at
+            )
+        )
+    finally:
+        await db_client.shutdown()
+
+
+@click.command()
+@click.option("--batch-size", default=1000, show_default=True, type=int)
+@click.option(
+    "--processes",
+    default=4,
+    show_default=True,
+    type=int,
+    help="Number of processes computing covariates derived from raster datasets.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Compute covariates of all hex-cells. Overwrite existing ones.",
+)
+def run(batch_size: int, processes: int, force: bool):
+    configure_logging()
+    asyncio.run(build(batch_size, processes, force))
+
+
+if __name__ == "__main__":
+    run()
@@ -43,9 +43,11 @@ async def query_ohsome_api(features, layers) -> list:
     results = []
     for feature in features:
         for layer in layers:
-            query_results = await ohsome_client.query(
+            # Only timestamps after the last stored ones are queried if a series
+            # store is configured (`ohsome_series_dir`)
+            query_results = await ohsome_client.query_series(
                 layer,
-                feature.geometry,
+                feature,
                 time=time_range,
             )
             results.append([item["value"] for item in query_results["result"]])
@@ -37,7 +37,7 @@ class TestApiReportIo(unittest.TestCase):
             "heidelberg-bahnstadt-bergheim-featurecollection.geojson"
         )
         with mock.patch(
-            "httpx.AsyncClient.post", new_callable=AsyncMock
+            "httpx.AsyncClient.send", new_callable=AsyncMock
         ) as mock_request:
             mock_request.return_value = httpx.Response(
                 200,
@@ -1,10 +1,15 @@
 import asyncio
+import json
+import os
 import unittest
+from unittest import mock
 
 import geojson
 
 import ohsome_quality_analyst.geodatabase.client as db_client
+from ohsome_quality_analyst.geodatabase import shdi_index
 from ohsome_quality_analyst.indicators.minimal.indicator import Minimal
+from ohsome_quality_analyst.utils.geometry import get_area
 
 from .utils import get_geojson_fixture, get_layer_fixture, oqt_vcr
 
@@ -47,7 +52,7 @@ class TestGeodatabase(unittest.TestCase):
             db_client.save_indicator_results(indicator, self.dataset, self.feature_id)
         )
         query = (
-            "SELECT feature "
+            "SELECT data "
             + "FROM results "
             + "WHERE indicator_name = 'Minimal' "
             + "AND layer_key = 'Minimal' "
@@ -55,7 +60,7 @@ class TestGeodatabase(unittest.TestCase):
             + "AND fid = '3';"
         )
         result = asyncio.run(_fetchval(query))
-        self.assertTrue(geojson.loads(result).is_valid)
+        self.assertIn("count", json.loads(result))
 
         # load
         indicator = Minimal(layer=self.layer, feature=self.feature)
@@ -71,6 +76,20 @@ class TestGeodatabase(unittest.TestCase):
         # Test if data attributes were set
         self.assertIsNotNone(indicator.count)
 
+        # load batch
+        indicators = [
+            Minimal(layer=self.layer, feature=self.feature),
+            Minimal(layer=get_layer_fixture("building_count"), feature=self.feature),
+        ]
+        missing = asyncio.run(
+            db_client.load_indicator_results_batch(
+                indicators, self.dataset, self.feature_id
+            )
+        )
+        self.assertEqual(missing, indicators[1:])
+        self.assertIsNotNone(indicators[0].result.value)
+        self.assertIsNotNone(indicators[0].count)
+
     def test_get_feature_ids(self):
         results = asyncio.run(db_client.get_feature_ids(self.dataset))
         self.assertIsInstance(results, list)
@@ -80,9 +99,17 @@ class TestGeodatabase(unittest.TestCase):
         with self.assertRaises(KeyError):
             asyncio.run(db_client.get_feature_ids("foo"))
 
-    def test_get_area_of_bpolys(self):
-        result = asyncio.run(db_client.get_area_of_bpolys(self.feature.geometry))
-        self.assertIsInstance(result, float)
+    def test_get_area_matches_postgis(self):
+        async def _fetchval(query, *args):
+            async with db_client.get_connection() as conn:
+                return await conn.fetchval(query, *args)
+
+        query = (
+            "SELECT ST_Area(ST_SetSRID(ST_GeomFromGeoJSON($1), 4326)::geography) "
+            + "/ (1000 * 1000)"
+        )
+        expected = asyncio.run(_fetchval(query, geojson.dumps(self.feature.geometry)))
+        self.assertAlmostEqual(get_area(self.feature) / expected, 1, places=6)
 
     # TODO: Add test for dataset which is not regions
     def test_get_feature_from_db(self):
@@ -151,6 +178,18 @@ class TestGeodatabase(unittest.TestCase):
         with self.assertRaises(TypeError):
             asyncio.run(db_client.get_shdi(self.feature.geometry))
 
+    def test_get_shdi_index_matches_postgis(self):
+        featurecollection = get_geojson_fixture(
+            "heidelberg-bahnstadt-bergheim-featurecollection.geojson"
+        )
+        expected = asyncio.run(db_client.get_shdi(featurecollection))
+        with mock.patch.dict(os.environ, {"OQT_SHDI_INDEX": "true"}):
+            result = asyncio.run(shdi_index.get_shdi(featurecollection))
+        self.assertEqual(len(result), len(expected))
+        for r, e in zip(result, expected):
+            self.assertEqual(r["rownumber"], e["rownumber"])
+            self.assertAlmostEqual(r["shdi"], e["shdi"], places=6)
+
     # Note: This test can only be executed if the whole SHDI is in the database.
     # def test_get_shdi_multiple_intersections(self):
     #     """Input geometry intersects with multiple SHDI-regions."""
@@ -1,12 +1,18 @@
 import asyncio
 from datetime import datetime
+from unittest import mock
 
 import pytest
-from geojson import FeatureCollection
+from geojson import Feature, FeatureCollection
 
 from ohsome_quality_analyst.indicators.building_completeness.indicator import (
+    COVARIATES,
     BuildingCompleteness,
+    compute_covariates,
+    fill_missing_shdi,
+    get_covariates,
     get_hex_cells,
+    get_precomputed_covariates,
     get_shdi,
     get_smod_class_share,
 )
@@ -98,3 +104,76 @@ def test_get_shdi(feature):
     result = asyncio.run(get_shdi(FeatureCollection(features=[feature])))
     assert isinstance(result, list)
     assert len(result) == 1
+
+
+def test_compute_covariates(mock_env_oqt_data_dir, feature):
+    hex_cells = asyncio.run(get_hex_cells(feature))
+    for cell in hex_cells["features"]:
+        cell["properties"].pop("covariates", None)
+    covariates = asyncio.run(compute_covariates(hex_cells))
+    assert set(covariates.keys()) == set(COVARIATES)
+    for values in covariates.values():
+        assert len(values) == len(hex_cells["features"])
+
+
+def test_get_covariates(mock_env_oqt_data_dir, feature):
+    hex_cells = asyncio.run(get_hex_cells(feature))
+    covariates = asyncio.run(get_covariates(hex_cells))
+    assert set(covariates.keys()) == set(COVARIATES)
+    for values in covariates.values():
+        assert len(values) == len(hex_cells["features"])
+
+
+def test_get_covariates_missing():
+    precomputed = {name: 0.5 for name in COVARIATES}
+    hex_cells = FeatureCollection(
+        features=[
+            Feature(id=1, properties={"area": 1, "covariates": precomputed}),
+            Feature(id=2, properties={"area": 1}),
+            Feature(id=3, properties={"area": 1, "covariates": precomputed}),
+        ]
+    )
+
+    async def compute(cells):
+        # Only the hex-cell without precomputed covariates is computed
+        assert [cell["id"] for cell in cells["features"]] == [2]
+        return {name: [0.2] for name in COVARIATES}
+
+    with mock.patch(
+        "ohsome_quality_analyst.indicators.building_completeness.indicator."
+        "compute_covariates",
+        new=compute,
+    ):
+        covariates = asyncio.run(get_covariates(hex_cells))
+    for name in COVARIATES:
+        assert covariates[name] == [0.5, 0.2, 0.5]
+
+
+def test_get_precomputed_covariates():
+    covariates = {name: 0.5 for name in COVARIATES}
+    hex_cells = FeatureCollection(
+        features=[
+            Feature(id=1, properties={"area": 1, "covariates": covariates}),
+            Feature(id=2, properties={"area": 1}),
+        ]
+    )
+    result = get_precomputed_covariates(hex_cells)
+    assert result == [covariates, None]
+    # Covariates are removed from the properties
+    assert hex_cells["features"][0]["properties"] == {"area": 1}
+
+
+def test_get_covariates_precomputed_null():
+    # Missing SHDI values are stored as NULL
+    covariates = {name: 0.5 for name in COVARIATES if name != "shdi"}
+    hex_cells = FeatureCollection(
+        features=[Feature(id=1, properties={"area": 1, "covariates": covariates})]
+    )
+    result = asyncio.run(get_covariates(hex_cells))
+    assert result["ghs_pop"] == [0.5]
+    assert result["shdi"] == [None]
+
+
+def test_fill_missing_shdi():
+    assert fill_missing_shdi([0.5, 0.7]) == [0.5, 0.7]
+    assert fill_missing_shdi([0.5, None, 0.7]) == pytest.approx([0.5, 0.6, 0.7])
@@ -166,7 +166,7 @@ class TestOqt(unittest.TestCase):
         with open(path, "r") as f:
             feature = geojson.load(f)
         with self.assertRaises(ValueError):
-            asyncio.run(oqt.check_area_size(feature.geometry))
+            oqt.check_area_size([feature])
 
     def test_create_indicator_as_geojson_size_limit_bpolys(self):
         path = os.path.join(
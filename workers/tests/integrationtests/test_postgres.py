@@ -16,7 +16,7 @@ async def get_connection_context_manager():
 class TestPostgres(unittest.TestCase):
     def test_connection(self):
         instance_type = asyncio.run(get_connection_context_manager())
-        self.assertEqual(instance_type, asyncpg.connection.Connection)
+        self.assertEqual(instance_type, asyncpg.pool.PoolConnectionProxy)
 
     @mock.patch(
         "ohsome_quality_analyst.config.get_config",
@@ -30,6 +30,8 @@ class TestPostgres(unittest.TestCase):
                 "postgres_db": "bar",
                 "postgres_user": "tis",
                 "postgres_password": "fas",
+                "postgres_pool_min_size": 1,
+                "postgres_pool_max_size": 10,
             }
         )
         with self.assertRaises(OSError):
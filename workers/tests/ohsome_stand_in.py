@@ -0,0 +1,389 @@
+"""Local stand-in for the ohsome API for offline load and throughput testing.
+
+Implements the endpoints of the ohsome API used by OQT:
+
+    - `/elements/{count|length|area|perimeter}` (and `/ratio`, `/groupBy/boundary`)
+    - `/contributions/latest/count`
+    - `/metadata`
+
+Like the ohsome API the results of ratio queries grouped by boundary are listed under
+the key `groupByBoundaryResult`. There is no "group by boundary" endpoint for the
+latest contributions.
+
+Responses are deterministic synthetic time series (logistic growth curves) derived
+from the bounding polygons and the filter of the request. Latency, error injection and
+response size are configurable (See `StandInConfig`).
+
+Run the stand-in from the `workers` directory and point OQT to it:
+
+    python -m tests.ohsome_stand_in --latency 200 --error-rate 0.01
+    OQT_OHSOME_API=http://127.0.0.1:8090 oqt create-report ...
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, fields
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import click
+import uvicorn
+from dateutil.parser import isoparse
+from dateutil.relativedelta import relativedelta
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MEASURES = ("count", "length", "area", "perimeter")
+ATTRIBUTION = {
+    "url": "https://ohsome.org/copyrights",
+    "text": "© OpenStreetMap contributors",
+}
+API_VERSION = "stand-in"
+PERIOD_PATTERN = re.compile(r"^P(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)W)?(?:(\d+)D)?$")
+# Measure of a bounding polygon with the size of one square degree
+SCALE = {"count": 1e6, "length": 1e8, "area": 1e10, "perimeter": 1e8}
+
+
+@dataclass
+class StandInConfig:
+    """Configuration of the ohsome API stand-in.
+
+    Attributes:
+        latency: Latency in milliseconds added to each request.
+        jitter: Maximal random latency in milliseconds added to the latency.
+        error_rate: Share of requests answered with an error (Between 0 and 1).
+        error_status: Status code of injected errors. A status code of 413 simulates
+            a timeout during streaming (An error object is appended to the response
+            with status code 200).
+        item_padding: Number of bytes added to each result item (Response size).
+        seed: Seed for latency jitter and error injection.
+        snapshot: Latest timestamp of the data (`toTimestamp` of `/metadata`).
+    """
+
+    latency: int = 0
+    jitter: int = 0
+    error_rate: float = 0.0
+    error_status: int = 503
+    item_padding: int = 0
+    seed: int = 0
+    snapshot: str = "2022-12-01T00:00Z"
+
+    @classmethod
+    def from_env(cls) -> "StandInConfig":
+        """Read configuration from `OHSOME_STAND_IN_*` environment variables."""
+        kwargs = {}
+        for field in fields(cls):
+            value = os.getenv("OHSOME_STAND_IN_" + field.name.upper())
+            if value is not None:
+                kwargs[field.name] = field.type(value)
+        return cls(**kwargs)
+
+
+def create_app(config: Optional[StandInConfig] = None) -> FastAPI:
+    """Create ASGI app of the ohsome API stand-in."""
+    config = config or StandInConfig.from_env()
+    rng = random.Random(config.seed)
+    stats: Counter = Counter()
+    app = FastAPI(title="ohsome API stand-in")
+    app.state.config = config
+    app.state.stats = stats
+
+    async def delay_or_fail(request: Request) -> Optional[JSONResponse]:
+        stats["requests"] += 1
+        latency = config.latency + rng.uniform(0, config.jitter)
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+        if config.error_status != 413 and rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return error_response(config.error_status, str(request.url))
+        return None
+
+    @app.get("/metadata")
+    async def metadata(request: Request):
+        response = await delay_or_fail(request)
+        if response is not None:
+            return response
+        return {
+            "attribution": ATTRIBUTION,
+            "apiVersion": API_VERSION,
+            "extractRegion": {
+                "temporalExtent": {
+                    "fromTimestamp": "2007-10-08T00:00:00Z",
+                    "toTimestamp": config.snapshot,
+                },
+            },
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.api_route("/elements/{measure}", methods=["GET", "POST"])
+    @app.api_route("/elements/{measure}/ratio", methods=["GET", "POST"])
+    @app.api_route("/elements/{measure}/groupBy/boundary", methods=["GET", "POST"])
+    @app.api_route(
+        "/elements/{measure}/ratio/groupBy/boundary", methods=["GET", "POST"]
+    )
+    @app.api_route("/contributions/latest/{measure}", methods=["GET", "POST"])
+    async def aggregation(request: Request, measure: str):
+        path = request.url.path
+        contributions = path.startswith("/contributions")
+        if measure not in MEASURES or (contributions and measure != "count"):
+            return error_response(404, str(request.url))
+        response = await delay_or_fail(request)
+        if response is not None:
+            return response
+        params = await get_params(request)
+        try:
+            features = json.loads(params["bpolys"])["features"]
+        except (KeyError, ValueError):
+            return error_response(400, str(request.url), "Invalid bpolys.")
+        try:
+            timestamps = parse_time(params.get("time"), isoparse(config.snapshot))
+        except ValueError:
+            return error_response(400, str(request.url), "Invalid time.")
+        ratio = "/ratio" in path
+        if ratio and "filter2" not in params:
+            return error_response(400, str(request.url), "Missing filter2.")
+        results = [
+            build_result(
+                feature,
+                measure,
+                params.get("filter", ""),
+                params.get("filter2") if ratio else None,
+                timestamps,
+                contributions,
+                config.item_padding,
+            )
+            for feature in features
+        ]
+        result_key = "ratioResult" if ratio else "result"
+        if "/groupBy/boundary" in path:
+            response_key = "groupByBoundaryResult" if ratio else "groupByResult"
+            items = [
+                {
+                    "groupByObject": feature.get("id", "feature{0}".format(i + 1)),
+                    result_key: result,
+                }
+                for i, (feature, result) in enumerate(zip(features, results))
+            ]
+        else:
+            response_key = result_key
+            items = results[0] if results else []
+        timeout = config.error_status == 413 and rng.random() < config.error_rate
+        if timeout:
+            stats["errors"] += 1
+        stream = stream_response(response_key, items, str(request.url), timeout)
+        return StreamingResponse(stream, media_type="application/json")
+
+    return app
+
+
+async def get_params(request: Request) -> Dict[str, str]:
+    """Get parameters from the query string and the form encoded body."""
+    params = dict(request.query_params)
+    if request.method == "POST":
+        body = (await request.body()).decode()
+        params.update({k: v[-1] for k, v in parse_qs(body).items()})
+    return params
+
+
+def error_response(
+    status: int,
+    url: str,
+    message: str = "Error injected by the ohsome API stand-in.",
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={
+            "timestamp": datetime.datetime.now().isoformat(),
+            "status": status,
+            "message": message,
+            "requestUrl": url,
+        },
+    )
+
+
+async def stream_response(
+    response_key: str,
+    items: List[dict],
+    url: str,
+    timeout: bool = False,
+) -> AsyncIterator[bytes]:
+    """Stream response item by item.
+
+    On timeout an error object is appended after half of the items (Like the ohsome
+    API does if a timeout occurs during streaming).
+    """
+    header = {"attribution": ATTRIBUTION, "apiVersion": API_VERSION}
+    yield (json.dumps(header)[:-1] + ', "{0}": ['.format(response_key)).encode()
+    for i, item in enumerate(items):
+        if timeout and i >= len(items) // 2:
+            error = {
+                "timestamp": datetime.datetime.now().isoformat(),
+                "status": 413,
+                "message": "The given query is too large in respect to the given "
+                + "timeout. Please use a smaller region and/or coarser time period.",
+                "requestUrl": url,
+            }
+            yield json.dumps(error).encode()
+            return
+        yield ((", " if i else "") + json.dumps(item)).encode()
+        await asyncio.sleep(0)
+    yield b"]}"
+
+
+def build_result(
+    feature: dict,
+    measure: str,
+    filter_: str,
+    filter2: Optional[str],
+    timestamps: List[datetime.datetime],
+    contributions: bool = False,
+    padding: int = 0,
+) -> List[dict]:
+    """Build synthetic time series for a single bounding polygon."""
+    geometry = json.dumps(feature.get("geometry"), sort_keys=True)
+    curve = Curve(geometry + filter_, SCALE[measure] * get_bbox_area(feature))
+    round_ = round if measure == "count" or contributions else float
+    items = []
+    if contributions:
+        for start, end in zip(timestamps, timestamps[1:]):
+            item = {
+                "fromTimestamp": format_timestamp(start),
+                "toTimestamp": format_timestamp(end),
+                # Contributions are growth plus (deterministic) edits of features
+                "value": round(abs(curve(end) - curve(start)) + 0.1 * curve(end)),
+            }
+            items.append(item)
+    else:
+        for timestamp in timestamps:
+            value = round_(curve(timestamp))
+            item = {"timestamp": format_timestamp(timestamp), "value": value}
+            if filter2 is not None:
+                share = Curve(geometry + filter2, 1).share
+                item["value2"] = round_(value * share)
+                item["ratio"] = item["value2"] / value if value else "NaN"
+            items.append(item)
+    if padding > 0:
+        for item in items:
+            item["padding"] = "x" * padding
+    return items
+
+
+class Curve:
+    """Deterministic logistic growth curve seeded by given string."""
+
+    def __init__(self, seed: str, scale: float) -> None:
+        digest = hashlib.sha256(seed.encode()).digest()
+        rng = random.Random(digest)
+        self.asymptote = max(scale, 1) * rng.uniform(0.5, 1.5)
+        self.midpoint = 2012 + rng.uniform(-3, 3)  # Year
+        self.steepness = rng.uniform(0.5, 1.5)
+        self.share = rng.uniform(0.1, 0.9)
+
+    def __call__(self, timestamp: datetime.datetime) -> float:
+        year = timestamp.year + (timestamp.timetuple().tm_yday - 1) / 365.25
+        return self.asymptote / (1 + math.exp(-self.steepness * (year - self.midpoint)))
+
+
+def get_bbox_area(feature: dict) -> float:
+    """Get area of the bounding box of a GeoJSON Feature in square degrees."""
+    coordinates = list(iter_coordinates(feature.get("geometry", {}).get("coordinates")))
+    if not coordinates:
+        return 0
+    xs, ys = zip(*coordinates)
+    return (max(xs) - min(xs)) * (max(ys) - min(ys))
+
+
+def iter_coordinates(coordinates):
+    if not coordinates:
+        return
+    if isinstance(coordinates[0], (int, float)):
+        yield coordinates[0], coordinates[1]
+        return
+    for item in coordinates:
+        yield from iter_coordinates(item)
+
+
+def parse_time(
+    time: Optional[str],
+    latest: datetime.datetime,
+) -> List[datetime.datetime]:
+    """Parse ISO-8601 conform timestrings as accepted by the ohsome API.
+
+    Supported are lists of timestamps (`2014-01-01,2015-01-01`) and intervals with
+    optional period (`2008-01-01/2014-01-01/P1M`). If no end is given the latest
+    timestamp is used (`2008-01-01//P1M`).
+    """
+    if not time:
+        return [latest]
+    timestamps = []
+    for part in time.split(","):
+        if "/" not in part:
+            timestamps.append(parse_timestamp(part, latest))
+            continue
+        start, end, *period = part.split("/")
+        start = parse_timestamp(start, latest)
+        end = parse_timestamp(end, latest) if end else latest
+        if not period or not period[0]:
+            timestamps += [start, end]
+            continue
+        match = PERIOD_PATTERN.match(period[0])
+        if match is None or not any(match.groups()):
+            raise ValueError("Unsupported period: " + period[0])
+        years, months, weeks, days = (int(g or 0) for g in match.groups())
+        step = relativedelta(years=years, months=months, weeks=weeks, days=days)
+        i = 0
+        while start + i * step <= end:
+            timestamps.append(start + i * step)
+            i += 1
+    return timestamps
+
+
+def parse_timestamp(timestamp: str, latest: datetime.datetime) -> datetime.datetime:
+    return isoparse(timestamp).replace(tzinfo=latest.tzinfo)
+
+
+def format_timestamp(timestamp: datetime.datetime) -> str:
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, type=str)
+@click.option("--port", default=8090, show_default=True, type=int)
+@click.option("--latency", default=0, show_default=True, help="Milliseconds")
+@click.option("--jitter", default=0, show_default=True, help="Milliseconds")
+@click.option(
+    "--error-rate",
+    default=0.0,
+    show_default=True,
+    help="Share of requests answered with an error",
+)
+@click.option(
+    "--error-status",
+    default=503,
+    show_default=True,
+    help="Status code of injected errors (413 simulates a timeout during streaming)",
+)
+@click.option(
+    "--item-padding",
+    default=0,
+    show_default=True,
+    help="Bytes added to each result item",
+)
+@click.option("--seed", default=0, show_default=True)
+@click.option("--snapshot", default="2022-12-01T00:00Z", show_default=True)
+def run(host: str, port: int, **kwargs):
+    uvicorn.run(create_app(StandInConfig(**kwargs)), host=host, port=port)
+
+
+if __name__ == "__main__":
+    run()
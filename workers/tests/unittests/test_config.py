@@ -14,11 +14,34 @@ class TestConfig(unittest.TestCase):
             "postgres_db",
             "postgres_user",
             "postgres_password",
+            "postgres_pool_min_size",
+            "postgres_pool_max_size",
+            "postgres_write_batch_size",
+            "postgres_write_flush_interval",
+            "postgres_results_cache_size",
             "data_dir",
             "geom_size_limit",
             "log_level",
             "ohsome_api",
+            "ohsome_api_max_connections",
+            "ohsome_api_max_keepalive_connections",
+            "ohsome_api_keepalive_expiry",
+            "ohsome_api_http2",
+            "ohsome_cache_size",
+            "ohsome_cache_dir",
+            "ohsome_series_dir",
+            "ohsome_metadata_refresh_interval",
+            "ohsome_batch_size",
+            "ohsome_batch_window",
+            "ohsome_concurrency_limit",
+            "ohsome_latency_target",
+            "ohsome_retry_budget",
+            "ohsome_max_shards",
+            "ohsome_shard_duration",
+            "ohsome_tile_size",
             "concurrent_computations",
+            "stale_while_revalidate",
+            "shdi_index",
             "user_agent",
             "datasets",
         }
@@ -97,6 +120,19 @@ class TestConfig(unittest.TestCase):
             val = config.get_config_value(key)
             assert isinstance(val, int) or isinstance(val, str) or isinstance(val, dict)
 
+    def test_get_config_flag(self):
+        for value, expected in (
+            ("true", True),
+            ("True", True),
+            ("1", True),
+            ("false", False),
+            ("0", False),
+        ):
+            with mock.patch.dict("os.environ", {"OQT_SHDI_INDEX": value}):
+                self.assertIs(config.get_config_flag("shdi_index"), expected)
+        with mock.patch.dict("os.environ", {}, clear=True):
+            self.assertFalse(config.get_config_flag("shdi_index"))
+
     @mock.patch.dict(
         "os.environ",
         {"OQT_CONFIG": ""},
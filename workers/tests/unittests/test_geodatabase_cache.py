@@ -0,0 +1,280 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from unittest import TestCase
+from unittest.mock import patch
+
+from ohsome_quality_analyst.geodatabase import client as db_client
+from ohsome_quality_analyst.indicators.minimal.indicator import Minimal
+from ohsome_quality_analyst.ohsome.cache import LRUCache
+
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class FakeConnection:
+    """Stand-in for a connection to a geodatabase with one stored result."""
+
+    def __init__(self, record: dict, figures: dict) -> None:
+        self.record = record
+        self.figures = figures
+        self.queries = []
+        self.arguments = []
+        self.notifications = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query: str, *args) -> None:
+        self.queries.append(query)
+        if query == db_client.NOTIFY:
+            self.notifications.append(json.loads(args[1]))
+
+    async def fetchrow(self, query: str, *_args):
+        self.queries.append(query)
+        return self.record
+
+    async def fetch(self, query: str, *args):
+        self.queries.append(query)
+        self.arguments.append((query, args))
+        if query == db_client.LOAD_FIGURES:
+            return [
+                {"figure_id": i, "svg": self.figures[i]}
+                for i in args[0]
+                if i in self.figures
+            ]
+        return [self.record]
+
+
+class FakeListener:
+    def __init__(self) -> None:
+        self.closed = False
+        self.listeners = {}
+        self.termination_listeners = []
+
+    async def add_listener(self, channel, callback) -> None:
+        self.listeners[channel] = callback
+
+    def add_termination_listener(self, callback) -> None:
+        self.termination_listeners.append(callback)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestResultsCache(TestCase):
+    def setUp(self):
+        self.feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+        indicator = Minimal(self.layer, self.feature)
+        indicator.count = 42
+        indicator.result.svg = "<svg>foo</svg>"
+        self.record = dict(
+            zip(
+                db_client.RESULTS_COLUMNS,
+                db_client.get_results_record(indicator, "regions", "3"),
+            )
+        )
+        self.conn = FakeConnection(
+            self.record,
+            db_client.get_figure_records(indicator),
+        )
+        self.key = db_client.get_results_key("Minimal", self.layer.name, "regions", "3")
+
+        @asynccontextmanager
+        async def get_connection():
+            yield self.conn
+
+        for patcher in (
+            patch.object(db_client, "get_connection", get_connection),
+            patch.object(db_client, "is_listening", lambda: True),
+            patch.object(db_client, "_results_cache", LRUCache(10)),
+            patch.object(db_client, "_catalog", {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def load(self, include_svg: bool = True) -> Minimal:
+        indicator = Minimal(self.layer, self.feature)
+        asyncio.run(
+            db_client.load_indicator_results(
+                indicator, "regions", "3", include_svg=include_svg
+            )
+        )
+        return indicator
+
+    def notify(self, payload: dict) -> None:
+        db_client.on_notification(
+            None, 0, db_client.NOTIFY_CHANNEL, json.dumps(payload)
+        )
+
+    def test_load_cached(self):
+        self.load()
+        indicator = self.load()
+        self.assertEqual(self.conn.queries.count(db_client.LOAD_RESULTS), 1)
+        self.assertEqual(indicator.count, 42)
+        self.assertEqual(indicator.result.svg, "<svg>foo</svg>")
+
+    def test_load_not_listening(self):
+        with patch.object(db_client, "is_listening", lambda: False):
+            self.load()
+            self.load()
+        self.assertEqual(self.conn.queries.count(db_client.LOAD_RESULTS), 2)
+
+    def test_load_cached_without_svg(self):
+        self.load(include_svg=False)
+        self.load(include_svg=False)
+        self.assertEqual(self.conn.queries.count(db_client.LOAD_RESULTS), 1)
+        # Figure has not been cached
+        indicator = self.load()
+        self.assertEqual(self.conn.queries.count(db_client.LOAD_RESULTS), 2)
+        self.assertEqual(indicator.result.svg, "<svg>foo</svg>")
+
+    def test_load_batch_cached(self):
+        self.record["indicator_name"] = "Minimal"
+        self.record["layer_key"] = self.layer.name
+        self.load()
+        other_layer = get_layer_fixture("major_roads_length")
+        indicators = [
+            Minimal(self.layer, self.feature),
+            Minimal(other_layer, self.feature),
+        ]
+        missing = asyncio.run(
+            db_client.load_indicator_results_batch(indicators, "regions", "3")
+        )
+        self.assertEqual(missing, indicators[1:])
+        self.assertEqual(indicators[0].count, 42)
+        # Only the uncached indicator has been queried
+        query_data = ("regions", "3", ["Minimal"], [other_layer.name])
+        self.assertIn((db_client.LOAD_RESULTS_BATCH, query_data), self.conn.arguments)
+
+    def test_notification_results(self):
+        self.load()
+        self.notify({"results": ["Minimal", "major_roads_length", "regions", "3"]})
+        self.assertEqual(len(db_client.get_results_cache()), 1)
+        self.notify({"results": ["Minimal", self.layer.name, "regions", "3"]})
+        self.assertEqual(len(db_client.get_results_cache()), 0)
+        self.load()
+        self.assertEqual(self.conn.queries.count(db_client.LOAD_RESULTS), 2)
+
+    def test_notification_dataset(self):
+        schema = db_client.DatasetSchema("regions", "ogc_fid", (), {})
+        db_client._catalog["regions"] = schema
+        self.load()
+        other = db_client.get_results_key("Minimal", self.layer.name, "other", "3")
+        db_client.get_results_cache().set(other, {})
+        self.notify({"dataset": "regions"})
+        self.assertEqual(db_client.get_results_cache().keys(), [other])
+        self.assertNotIn("regions", db_client._catalog)
+
+    def test_notification_invalid(self):
+        with self.assertLogs(level="WARNING"):
+            db_client.on_notification(None, 0, db_client.NOTIFY_CHANNEL, "foo")
+
+    def test_eviction_while_loading(self):
+        fetchrow = self.conn.fetchrow
+
+        async def evict_while_fetching(*args):
+            self.notify({"results": ["Minimal", self.layer.name, "regions", "3"]})
+            return await fetchrow(*args)
+
+        self.conn.fetchrow = evict_while_fetching
+        self.load()
+        # Loaded result might be outdated already
+        self.assertEqual(len(db_client.get_results_cache()), 0)
+
+    def test_save_indicator_results(self):
+        self.load()
+        indicator = Minimal(self.layer, self.feature)
+        asyncio.run(db_client.save_indicator_results(indicator, "regions", "3"))
+        self.assertEqual(
+            self.conn.notifications,
+            [{"results": ["Minimal", self.layer.name, "regions", "3"]}],
+        )
+        # Evicted without waiting for the notification
+        self.assertEqual(len(db_client.get_results_cache()), 0)
+
+    def test_refresh_dataset(self):
+        async def refresh_catalog():
+            return {}
+
+        self.load()
+        with patch.object(db_client, "refresh_catalog", refresh_catalog):
+            asyncio.run(db_client.refresh_dataset("regions"))
+        self.assertEqual(self.conn.notifications, [{"dataset": "regions"}])
+        self.assertEqual(len(db_client.get_results_cache()), 0)
+        with self.assertRaises(ValueError):
+            asyncio.run(db_client.refresh_dataset("foo"))
+
+
+class TestListener(TestCase):
+    def setUp(self):
+        self.listeners = []
+
+        async def connect(*_args):
+            listener = FakeListener()
+            self.listeners.append(listener)
+            return listener
+
+        for patcher in (
+            patch("asyncpg.connect", connect),
+            patch.object(db_client, "_listener", None),
+            patch.object(db_client, "_listener_loop", None),
+            patch.object(db_client, "_listener_task", None),
+            patch.object(db_client, "_results_cache", LRUCache(10)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_start_stop(self):
+        async def main():
+            await db_client.start_listener()
+            self.assertTrue(db_client.is_listening())
+            await db_client.stop_listener()
+            self.assertFalse(db_client.is_listening())
+
+        asyncio.run(main())
+        self.assertIn(db_client.NOTIFY_CHANNEL, self.listeners[0].listeners)
+        self.assertTrue(self.listeners[0].closed)
+
+    def test_start_failure(self):
+        async def fail(*_args):
+            raise OSError("Connection refused")
+
+        async def main():
+            with patch("asyncpg.connect", fail):
+                with self.assertLogs(level="WARNING"):
+                    await db_client.start_listener()
+            return db_client.is_listening()
+
+        self.assertFalse(asyncio.run(main()))
+
+    def test_new_event_loop(self):
+        asyncio.run(db_client.start_listener())
+        self.assertFalse(asyncio.run(self.is_listening()))
+
+    def test_terminated(self):
+        async def main():
+            await db_client.start_listener()
+            db_client.get_results_cache().set("foo", {})
+            listener = self.listeners[0]
+            listener.closed = True
+            with self.assertLogs(level="WARNING"):
+                listener.termination_listeners[0](listener)
+            self.assertEqual(len(db_client.get_results_cache()), 0)
+            # Listen again. Task is kept until it is done.
+            task = db_client._listener_task
+            self.assertIsNotNone(task)
+            await task
+            await asyncio.sleep(0)
+            self.assertIsNone(db_client._listener_task)
+            return db_client.is_listening()
+
+        self.assertTrue(asyncio.run(main()))
+        self.assertEqual(len(self.listeners), 2)
+
+    async def is_listening(self) -> bool:
+        return db_client.is_listening()
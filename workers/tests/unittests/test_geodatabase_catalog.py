@@ -0,0 +1,105 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from unittest import TestCase
+from unittest.mock import patch
+
+from ohsome_quality_analyst.geodatabase import client as db_client
+
+COLUMNS = [
+    {"table_name": "regions", "column_name": "ogc_fid", "data_type": "integer"},
+    {"table_name": "regions", "column_name": "name", "data_type": "text"},
+    {"table_name": "regions", "column_name": "geom", "data_type": "USER-DEFINED"},
+]
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.fetch_count = 0
+        self.fetchrow_args = []
+        self.row = ['{"type": "Point", "coordinates": [0, 0]}']
+
+    async def fetch(self, _query: str, tables: list) -> list:
+        self.fetch_count += 1
+        return [c for c in COLUMNS if c["table_name"] in tables]
+
+    async def fetchrow(self, _query: str, *args) -> list:
+        self.fetchrow_args.append(args)
+        return self.row
+
+
+class TestCatalog(TestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+
+        @asynccontextmanager
+        async def get_connection():
+            yield self.conn
+
+        for patcher in (
+            patch.object(db_client, "get_connection", get_connection),
+            patch.object(db_client, "_catalog", {}),
+            patch.object(db_client, "_missing_tables", {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_refresh_catalog(self):
+        catalog = asyncio.run(db_client.refresh_catalog())
+        schema = catalog["regions"]
+        self.assertEqual(schema.default, "ogc_fid")
+        self.assertEqual(schema.other, ("name",))
+        self.assertEqual(schema.column_types["ogc_fid"], "integer")
+        self.assertTrue(schema.is_fid_field("name"))
+        self.assertFalse(schema.is_fid_field("geom"))
+
+    def test_get_dataset_schema_invalid(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(db_client.get_dataset_schema("foo"))
+        self.assertEqual(self.conn.fetch_count, 0)
+
+    def test_type_of(self):
+        self.assertEqual(asyncio.run(db_client.type_of("regions", "name")), "text")
+
+    def test_type_of_unknown_column(self):
+        with self.assertRaisesRegex(ValueError, "foo"):
+            asyncio.run(db_client.type_of("regions", "foo"))
+
+    def test_get_feature_from_db(self):
+        async def main():
+            for _ in range(3):
+                await db_client.get_feature_from_db("regions", "3")
+
+        asyncio.run(main())
+        # Catalog is loaded once and the feature id is cast to integer
+        self.assertEqual(self.conn.fetch_count, 1)
+        self.assertEqual(self.conn.fetchrow_args, [(3,)] * 3)
+
+    def test_map_fid_to_uid(self):
+        self.conn.row = [3]
+        uid = asyncio.run(db_client.map_fid_to_uid("regions", "Heidelberg", "name"))
+        self.assertEqual(uid, "3")
+        self.assertEqual(self.conn.fetchrow_args, [("Heidelberg",)])
+        with self.assertRaises(ValueError):
+            asyncio.run(db_client.map_fid_to_uid("regions", "Heidelberg", "geom"))
+
+    def test_refresh_missing_table(self):
+        async def fetch(*_args) -> list:
+            return []
+
+        with patch.object(FakeConnection, "fetch", fetch):
+            asyncio.run(db_client.refresh_catalog())
+        self.assertEqual(db_client._catalog["regions"].column_types, {})
+        # Table has been missing recently: Not looked up again
+        schema = asyncio.run(db_client.get_dataset_schema("regions"))
+        self.assertEqual(schema.column_types, {})
+        self.assertEqual(self.conn.fetch_count, 0)
+        # Table has been missing for a while: Refreshed on demand
+        with patch(
+            "time.monotonic",
+            return_value=time.monotonic() + db_client.MISSING_TABLE_TTL,
+        ):
+            schema = asyncio.run(db_client.get_dataset_schema("regions"))
+        self.assertEqual(schema.column_types["ogc_fid"], "integer")
+        self.assertEqual(self.conn.fetch_count, 1)
+        self.assertFalse(db_client.is_missing_table("regions"))
@@ -0,0 +1,162 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest import TestCase
+from unittest.mock import patch
+
+import asyncpg
+
+from ohsome_quality_analyst.geodatabase import client as db_client
+
+
+class FakeConnection:
+    def __init__(self, executed: list) -> None:
+        self.executed = executed
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query: str, *_args) -> None:
+        self.executed.append(query)
+
+    async def fetchval(self, query: str, *_args) -> bool:
+        self.executed.append(query)
+        return False
+
+    async def fetch(self, query: str, *_args) -> list:
+        self.executed.append(query)
+        return []
+
+
+class FakePool:
+    """Stand-in for `asyncpg.Pool` with a limited number of connections."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.in_use = 0
+        self.closed = False
+        self.semaphore = asyncio.Semaphore(max_size)
+        self.executed = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self.semaphore:
+            self.in_use += 1
+            try:
+                yield FakeConnection(self.executed)
+            finally:
+                self.in_use -= 1
+
+    def get_size(self) -> int:
+        return self.max_size
+
+    def get_idle_size(self) -> int:
+        return self.max_size - self.in_use
+
+    def get_max_size(self) -> int:
+        return self.max_size
+
+    def is_closing(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestPool(TestCase):
+    def setUp(self):
+        self.created = 0
+
+        async def create_pool(*_args, **kwargs):
+            self.created += 1
+            await asyncio.sleep(0)
+            return FakePool(kwargs["max_size"])
+
+        async def start_listener():
+            pass
+
+        for patcher in (
+            patch("asyncpg.create_pool", create_pool),
+            patch.object(db_client, "start_listener", start_listener),
+            patch.object(db_client, "_pool_task", None),
+            patch.object(db_client, "_pool_loop", None),
+            patch.object(db_client, "_pool_stats", db_client.Counter()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_get_pool_once(self):
+        async def main():
+            pools = await asyncio.gather(*(db_client.get_pool() for _ in range(5)))
+            self.assertTrue(all(pool is pools[0] for pool in pools))
+            await db_client.shutdown()
+            self.assertTrue(pools[0].closed)
+
+        asyncio.run(main())
+        self.assertEqual(self.created, 1)
+
+    def test_get_pool_new_event_loop(self):
+        asyncio.run(db_client.get_pool())
+        asyncio.run(db_client.get_pool())
+        self.assertEqual(self.created, 2)
+
+    def test_get_pool_after_shutdown(self):
+        async def main():
+            await db_client.startup()
+            await db_client.shutdown()
+            await db_client.get_pool()
+
+        asyncio.run(main())
+        self.assertEqual(self.created, 2)
+
+    def test_get_pool_retry_after_failure(self):
+        async def fail(*_args, **_kwargs):
+            raise OSError("Connection refused")
+
+        async def main():
+            with patch("asyncpg.create_pool", fail):
+                # Failure is logged on startup
+                await db_client.startup()
+                with self.assertRaises(OSError):
+                    await db_client.get_pool()
+            return await db_client.get_pool()
+
+        self.assertIsInstance(asyncio.run(main()), FakePool)
+
+    def test_bootstrap_schema_once(self):
+        async def save():
+            async with db_client.get_connection() as conn:
+                await conn.execute(db_client.SAVE_RESULTS)
+
+        async def main():
+            await asyncio.gather(*(save() for _ in range(3)))
+            return await db_client.get_pool()
+
+        pool = asyncio.run(main())
+        self.assertEqual(pool.executed.count(db_client.CREATE_RESULTS_TABLE), 1)
+        self.assertEqual(pool.executed.count(db_client.SAVE_RESULTS), 3)
+
+    def test_bootstrap_schema_failure(self):
+        async def execute(*_args):
+            raise asyncpg.InsufficientPrivilegeError("permission denied")
+
+        # A read-only user can still query the geodatabase
+        with patch.object(FakeConnection, "execute", execute):
+            self.assertIsInstance(asyncio.run(db_client.get_pool()), FakePool)
+
+    def test_pool_stats(self):
+        async def query():
+            async with db_client.get_connection():
+                await asyncio.sleep(0.01)
+
+        async def main():
+            with patch.dict("os.environ", {"POSTGRES_POOL_MAX_SIZE": "2"}):
+                await asyncio.gather(*(query() for _ in range(4)))
+            return db_client.get_pool_stats()
+
+        stats = asyncio.run(main())
+        self.assertEqual(stats["acquires"], 4)
+        self.assertEqual(stats["saturated"], 2)
+        self.assertEqual(stats["max_size"], 2)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertGreater(stats["max_acquire_wait_ms"], 5)
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import zlib
+from contextlib import asynccontextmanager
+from unittest import TestCase
+from unittest.mock import patch
+
+from ohsome_quality_analyst.geodatabase import client as db_client
+from ohsome_quality_analyst.indicators.minimal.indicator import Minimal
+
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class FakeConnection:
+    """Stand-in for a connection to a geodatabase with one stored result."""
+
+    def __init__(self, record: dict, figures: dict) -> None:
+        self.record = record
+        self.figures = figures
+        self.queries = []
+
+    async def fetchrow(self, query: str, *_args):
+        self.queries.append(query)
+        return self.record
+
+    async def fetch(self, query: str, *args):
+        self.queries.append(query)
+        if query == db_client.LOAD_FIGURES:
+            return [
+                {"figure_id": i, "svg": self.figures[i]}
+                for i in args[0]
+                if i in self.figures
+            ]
+        return [self.record]
+
+
+class TestResults(TestCase):
+    def setUp(self):
+        self.feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+        indicator = Minimal(self.layer, self.feature)
+        indicator.count = 42
+        indicator.result.svg = "<svg>foo</svg>"
+        self.record = dict(
+            zip(
+                db_client.RESULTS_COLUMNS,
+                db_client.get_results_record(indicator, "regions", "3"),
+            )
+        )
+        figures = db_client.get_figure_records(indicator)
+        self.conn = FakeConnection(self.record, figures)
+
+        @asynccontextmanager
+        async def get_connection():
+            yield self.conn
+
+        patcher = patch.object(db_client, "get_connection", get_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_results_record(self):
+        # Geometry and figure are not part of the stored data
+        self.assertEqual(json.loads(self.record["data"]), {"count": 42})
+        self.assertEqual(
+            self.record["figure_id"],
+            db_client.get_figure_id("<svg>foo</svg>"),
+        )
+
+    def test_figure_records(self):
+        indicator = Minimal(self.layer, self.feature)
+        indicator.result.svg = "<svg>foo</svg>"
+        figures = db_client.get_figure_records(indicator)
+        # Content addressed: Same figure same id
+        self.assertEqual(figures.keys(), self.conn.figures.keys())
+        compressed = figures[self.record["figure_id"]]
+        self.assertEqual(zlib.decompress(compressed).decode(), "<svg>foo</svg>")
+
+    def test_load_indicator_results(self):
+        indicator = Minimal(self.layer, self.feature)
+        asyncio.run(db_client.load_indicator_results(indicator, "regions", "3"))
+        self.assertEqual(indicator.count, 42)
+        self.assertEqual(indicator.result.svg, "<svg>foo</svg>")
+
+    def test_load_indicator_results_without_svg(self):
+        indicator = Minimal(self.layer, self.feature)
+        default_svg = indicator.result.svg
+        asyncio.run(
+            db_client.load_indicator_results(
+                indicator, "regions", "3", include_svg=False
+            )
+        )
+        self.assertEqual(indicator.count, 42)
+        self.assertEqual(indicator.result.svg, default_svg)
+        self.assertNotIn(db_client.LOAD_FIGURES, self.conn.queries)
+
+    def test_load_indicator_results_batch(self):
+        self.record["indicator_name"] = "Minimal"
+        self.record["layer_key"] = self.layer.name
+        indicators = [
+            Minimal(self.layer, self.feature),
+            Minimal(get_layer_fixture("major_roads_length"), self.feature),
+        ]
+        missing = asyncio.run(
+            db_client.load_indicator_results_batch(indicators, "regions", "3")
+        )
+        self.assertEqual(missing, indicators[1:])
+        self.assertEqual(indicators[0].result.svg, "<svg>foo</svg>")
+        self.assertEqual(self.conn.queries.count(db_client.LOAD_FIGURES), 1)
+
+
+class FakeCursor:
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    async def fetch(self, n: int) -> list:
+        rows, self.rows = self.rows[:n], self.rows[n:]
+        return rows
+
+
+class FakeMigrationConnection:
+    """Stand-in for a connection to a geodatabase with a legacy results table."""
+
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+        self.executed = []
+        self.copied = []
+
+    async def fetchval(self, _query: str) -> bool:
+        return True
+
+    async def cursor(self, query: str):
+        self.executed.append((query,))
+        return FakeCursor(self.rows)
+
+    async def execute(self, query: str, *args) -> None:
+        self.executed.append((query, *args))
+
+    async def copy_records_to_table(self, table: str, records: list, columns: tuple):
+        self.copied.append((table, [dict(zip(columns, r)) for r in records]))
+
+
+class TestMigrateLegacyResults(TestCase):
+    def setUp(self):
+        self.row = {
+            "indicator_name": "Minimal",
+            "layer_key": "Building Count",
+            "dataset_name": "regions",
+            "fid": "3",
+            "timestamp_oqt": None,
+            "timestamp_osm": None,
+            "result_class": 5,
+            "result_value": 1.0,
+            "result_description": "foo",
+            "result_svg": "<svg>foo</svg>",
+            "data": '{"count": 42}',
+        }
+
+    def test_migrate_legacy_results(self):
+        rows = [self.row, {**self.row, "fid": "4", "result_svg": None}]
+        conn = FakeMigrationConnection(rows)
+        with patch.object(db_client, "MIGRATION_BATCH_SIZE", 1):
+            asyncio.run(db_client.migrate_legacy_results(conn))
+        # One batch per row
+        self.assertEqual(len(conn.copied), 2)
+        table, records = conn.copied[0]
+        self.assertEqual(table, "results")
+        figure_id = db_client.get_figure_id("<svg>foo</svg>")
+        self.assertEqual(records[0]["figure_id"], figure_id)
+        self.assertEqual(records[0]["data"], '{"count": 42}')
+        self.assertIsNone(records[0]["timestamp_snapshot"])
+        self.assertIsNone(conn.copied[1][1][0]["figure_id"])
+        saved_figures = [q for q in conn.executed if q[0] == db_client.SAVE_FIGURES]
+        self.assertEqual(len(saved_figures), 1)
+        _, figure_ids, svgs = saved_figures[0]
+        self.assertEqual(figure_ids, [figure_id])
+        self.assertEqual(zlib.decompress(svgs[0]).decode(), "<svg>foo</svg>")
+        self.assertEqual(conn.executed[-1], ("DROP TABLE results_legacy",))
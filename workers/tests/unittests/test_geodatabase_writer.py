@@ -0,0 +1,167 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from unittest import TestCase, mock
+
+import asyncpg
+
+from ohsome_quality_analyst.geodatabase import client as db_client
+from ohsome_quality_analyst.indicators.minimal.indicator import Minimal
+
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.executed = []
+        self.copied = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query: str, *_args) -> None:
+        self.executed.append(query)
+
+    async def executemany(self, query: str, args) -> None:
+        self.executed.extend(query for _ in args)
+
+    async def copy_records_to_table(self, table_name: str, records, columns):
+        self.copied.append(list(records))
+
+
+def get_record(fid: str, value: float = 0.5) -> tuple:
+    return ("Minimal", "Building Count", "regions", fid, None, None, 1, value)
+
+
+class TestResultsWriter(TestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+
+        @asynccontextmanager
+        async def get_connection():
+            yield self.conn
+
+        env = {
+            "POSTGRES_WRITE_BATCH_SIZE": "3",
+            "POSTGRES_WRITE_FLUSH_INTERVAL": "60",
+        }
+        for patcher in (
+            mock.patch.dict(os.environ, env),
+            mock.patch.object(db_client, "get_connection", get_connection),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_batches(self):
+        async def main():
+            async with db_client.buffered_writes() as writer:
+                for fid in range(7):
+                    await writer.add(get_record(str(fid)))
+                self.assertEqual(len(self.conn.copied), 2)
+
+        asyncio.run(main())
+        # Remaining result is saved on exit
+        self.assertEqual([len(c) for c in self.conn.copied], [3, 3, 1])
+        self.assertEqual(
+            self.conn.executed.count(db_client.SAVE_RESULTS_STAGING),
+            3,
+        )
+        self.assertNotIn(db_client.SAVE_RESULTS, self.conn.executed)
+
+    def test_deduplicate(self):
+        async def main():
+            async with db_client.buffered_writes() as writer:
+                await writer.add(get_record("1", 0.1))
+                await writer.add(get_record("1", 0.2))
+
+        asyncio.run(main())
+        self.assertEqual(self.conn.copied, [[get_record("1", 0.2)]])
+
+    def test_flush_interval(self):
+        async def main():
+            with mock.patch.dict(os.environ, {"POSTGRES_WRITE_FLUSH_INTERVAL": "0"}):
+                async with db_client.buffered_writes() as writer:
+                    await writer.add(get_record("1"))
+                    await asyncio.sleep(0.01)
+                    self.assertEqual(self.conn.copied, [[get_record("1")]])
+
+        asyncio.run(main())
+
+    def test_flush_retry(self):
+        attempts = []
+
+        async def fail_once(conn, *args, **kwargs):
+            attempts.append(args)
+            if len(attempts) == 1:
+                raise asyncpg.PostgresError()
+            self.conn.copied.append(list(kwargs["records"]))
+
+        async def main():
+            writer = db_client.ResultsWriter(
+                batch_size=1, flush_interval=60, retry_delay=0
+            )
+            with mock.patch.object(FakeConnection, "copy_records_to_table", fail_once):
+                await writer.add(get_record("1"))
+
+        asyncio.run(main())
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(self.conn.copied, [[get_record("1")]])
+
+    def test_flush_failure(self):
+        attempts = []
+
+        async def fail(*args, **_kwargs):
+            attempts.append(args)
+            raise asyncpg.PostgresError()
+
+        async def main():
+            writer = db_client.ResultsWriter(
+                batch_size=1, flush_interval=60, retry_delay=0
+            )
+            with mock.patch.object(FakeConnection, "copy_records_to_table", fail):
+                with self.assertLogs(level="ERROR"):
+                    await writer.add(get_record("1"))
+            # Batch is dropped after the last attempt
+            self.assertEqual(writer.buffer, {})
+            await writer.add(get_record("2"))
+
+        asyncio.run(main())
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(self.conn.copied, [[get_record("2")]])
+
+    def test_save_indicator_results(self):
+        indicator = Minimal(
+            get_layer_fixture("building_count"),
+            get_geojson_fixture("heidelberg-altstadt-feature.geojson"),
+        )
+
+        async def main():
+            async with db_client.buffered_writes():
+                await db_client.save_indicator_results(indicator, "regions", "1")
+                await db_client.save_indicator_results(indicator, "regions", "2")
+                self.assertEqual(self.conn.executed, [])
+            # Without buffer
+            await db_client.save_indicator_results(indicator, "regions", "3")
+
+        asyncio.run(main())
+        self.assertEqual(len(self.conn.copied), 1)
+        self.assertEqual(len(self.conn.copied[0]), 2)
+        self.assertEqual(len(self.conn.copied[0][0]), len(db_client.RESULTS_COLUMNS))
+        self.assertEqual(
+            self.conn.executed[-2:],
+            [db_client.SAVE_RESULTS, db_client.NOTIFY],
+        )
+        # Listening processes are notified once per result
+        self.assertEqual(self.conn.executed.count(db_client.NOTIFY), 3)
+        # Figures are saved once per batch
+        self.assertEqual(self.conn.executed.count(db_client.SAVE_FIGURES), 2)
+
+    def test_disabled(self):
+        async def main():
+            with mock.patch.dict(os.environ, {"POSTGRES_WRITE_BATCH_SIZE": "0"}):
+                async with db_client.buffered_writes() as writer:
+                    self.assertIsNone(writer)
+                    self.assertIsNone(db_client.current_writer.get())
+
+        asyncio.run(main())
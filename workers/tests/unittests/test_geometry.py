@@ -0,0 +1,97 @@
+import math
+from unittest import TestCase
+
+from geojson import Feature, FeatureCollection, MultiPolygon, Polygon
+
+from ohsome_quality_analyst.utils import geometry
+
+from .utils import get_geojson_fixture
+
+
+def get_band_area(lat: float, lon: float) -> float:
+    """Area of a band between the equator and a latitude on the WGS84 ellipsoid."""
+    a, f = 6378137.0, 1 / 298.257223563
+    e, b = math.sqrt(f * (2 - f)), a * (1 - f)
+
+    def q(phi):
+        s = math.sin(math.radians(phi))
+        return s / (1 - e**2 * s**2) + math.log((1 + e * s) / (1 - e * s)) / (2 * e)
+
+    return math.pi * b**2 * (q(lat) - q(0)) * lon / 360 / 1e6
+
+
+class TestGeometry(TestCase):
+    def setUp(self):
+        self.square = Polygon([[(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]])
+
+    def test_get_area(self):
+        area = geometry.get_area(Feature(geometry=self.square))
+        self.assertAlmostEqual(area / get_band_area(1, 1), 1, places=3)
+
+    def test_get_area_orientation(self):
+        reversed_ = Polygon([self.square["coordinates"][0][::-1]])
+        self.assertAlmostEqual(
+            geometry.get_area(self.square),
+            geometry.get_area(reversed_),
+        )
+
+    def test_get_area_hole(self):
+        hole = [(0.25, 0.25), (0.25, 0.75), (0.75, 0.75), (0.75, 0.25), (0.25, 0.25)]
+        polygon = Polygon([self.square["coordinates"][0], hole])
+        self.assertAlmostEqual(
+            geometry.get_area(polygon),
+            geometry.get_area(self.square) - geometry.get_area(Polygon([hole])),
+        )
+
+    def test_get_area_multipolygon(self):
+        multipolygon = MultiPolygon(
+            [
+                self.square["coordinates"],
+                [[(2, 0), (3, 0), (3, 1), (2, 1), (2, 0)]],
+            ]
+        )
+        self.assertAlmostEqual(
+            geometry.get_area(multipolygon),
+            2 * geometry.get_area(self.square),
+        )
+
+    def test_get_area_feature_collection(self):
+        feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        area = geometry.get_area(feature)
+        self.assertGreater(area, 0.5)
+        self.assertLess(area, 5)
+        collection = FeatureCollection([feature, feature])
+        self.assertAlmostEqual(geometry.get_area(collection), 2 * area)
+
+    def test_get_areas(self):
+        features = [
+            get_geojson_fixture("heidelberg-altstadt-feature.geojson"),
+            Feature(geometry=self.square),
+            Feature(geometry={"type": "Point", "coordinates": [0, 0]}),
+        ]
+        areas = geometry.get_areas(features)
+        self.assertEqual(areas, [geometry.get_area(f) for f in features])
+        self.assertEqual(areas[2], 0)
+
+    def test_get_areas_rings(self):
+        # Rings of all features are computed together and summed up per feature
+        hole = [(0.25, 0.25), (0.25, 0.75), (0.75, 0.75), (0.75, 0.25), (0.25, 0.25)]
+        features = [
+            Feature(geometry=Polygon([self.square["coordinates"][0], hole])),
+            Feature(geometry={"type": "Point", "coordinates": [0, 0]}),
+            Feature(
+                geometry=MultiPolygon(
+                    [
+                        self.square["coordinates"],
+                        [[(2, 0), (3, 0), (3, 1), (2, 1), (2, 0)]],
+                    ]
+                )
+            ),
+        ]
+        band_area = get_band_area(1, 1)
+        areas = geometry.get_areas(features)
+        self.assertEqual(len(areas), 3)
+        self.assertAlmostEqual(areas[0] / band_area, 0.75, places=3)
+        self.assertEqual(areas[1], 0)
+        self.assertAlmostEqual(areas[2] / band_area, 2, places=3)
+        self.assertEqual(geometry.get_areas([]), [])
@@ -14,6 +14,7 @@ from ohsome_quality_analyst.indicators.minimal.indicator import (
 )
 from ohsome_quality_analyst.reports.minimal.report import Minimal as MinimalReport
 from ohsome_quality_analyst.utils.helper import (
+    chunks,
     flatten_dict,
     flatten_sequence,
     get_project_root,
@@ -191,6 +192,11 @@ class TestHelper(unittest.TestCase):
         result = get_project_root()
         self.assertEqual(expected, result)
 
+    def test_chunks(self):
+        self.assertEqual(list(chunks([1, 2, 3, 4, 5], 2)), [[1, 2], [3, 4], [5]])
+        self.assertEqual(list(chunks((1, 2), 5)), [[1, 2]])
+        self.assertEqual(list(chunks([], 2)), [])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from unittest import TestCase, mock
+
+from geojson import Feature, Point
+
+from ohsome_quality_analyst import oqt
+from ohsome_quality_analyst.ohsome import batch
+from ohsome_quality_analyst.utils.exceptions import OhsomeApiError
+
+
+class TestQueryBatch(TestCase):
+    def setUp(self):
+        self.url = "https://api.ohsome.org/v1/elements/count"
+        self.data = {"filter": "building=*", "time": "2020-01-01"}
+        self.features = [Feature(geometry=Point((i, i))) for i in range(3)]
+        self.requests = []
+
+    async def execute(self, url, data, group_by_boundary):
+        self.requests.append((url, data, group_by_boundary))
+        features = json.loads(data["bpolys"])["features"]
+        if not group_by_boundary:
+            return {"result": [{"value": 0, "timestamp": "2020-01-01T00:00:00Z"}]}
+        return {
+            "groupByResult": [
+                {
+                    "groupByObject": feature["id"],
+                    "result": [
+                        {
+                            "value": feature["geometry"]["coordinates"][0],
+                            "timestamp": "2020-01-01T00:00:00Z",
+                        }
+                    ],
+                }
+                for feature in features
+            ]
+        }
+
+    def query(self, query_batch, feature, data=None):
+        return query_batch.query(self.url, data or self.data, feature)
+
+    def test_batch(self):
+        async def run():
+            query_batch = batch.QueryBatch(3, 10, self.execute)
+            return await asyncio.gather(
+                *[self.query(query_batch, f) for f in self.features]
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual(len(self.requests), 1)
+        url, _, group_by_boundary = self.requests[0]
+        self.assertEqual(url, self.url + "/groupBy/boundary")
+        self.assertTrue(group_by_boundary)
+        self.assertEqual([r["result"][0]["value"] for r in results], [0, 1, 2])
+
+    def test_batch_window(self):
+        """Incomplete group is executed after time window has passed."""
+
+        async def run():
+            query_batch = batch.QueryBatch(3, 0.01, self.execute)
+            return await asyncio.gather(
+                *[self.query(query_batch, f) for f in self.features[:2]]
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual([r["result"][0]["value"] for r in results], [0, 1])
+
+    def test_batch_single(self):
+        async def run():
+            query_batch = batch.QueryBatch(3, 0.01, self.execute)
+            return await self.query(query_batch, self.features[0])
+
+        asyncio.run(run())
+        self.assertFalse(self.requests[0][2])
+        self.assertEqual(self.requests[0][0], self.url)
+
+    def test_batch_different_queries(self):
+        async def run():
+            query_batch = batch.QueryBatch(2, 0.01, self.execute)
+            return await asyncio.gather(
+                self.query(query_batch, self.features[0]),
+                self.query(query_batch, self.features[1], {"filter": "highway=*"}),
+            )
+
+        asyncio.run(run())
+        self.assertEqual(len(self.requests), 2)
+
+    def test_batch_exception(self):
+        async def execute(*_args, **_kwargs):
+            raise OhsomeApiError("Error")
+
+        async def run():
+            query_batch = batch.QueryBatch(2, 10, execute)
+            return await asyncio.gather(
+                *[self.query(query_batch, f) for f in self.features[:2]],
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        self.assertIsInstance(results[0], OhsomeApiError)
+        self.assertIsInstance(results[1], OhsomeApiError)
+
+
+class TestSplitGroupByResult(TestCase):
+    def test_split(self):
+        response = {
+            "attribution": {},
+            "groupByResult": [
+                {"groupByObject": "0", "result": [{"value": 1.0}]},
+                {"groupByObject": "1", "result": [{"value": 0.5}]},
+            ],
+        }
+        self.assertEqual(
+            batch.split_group_by_result(response),
+            [
+                {"groupByObject": "0", "result": [{"value": 1.0}]},
+                {"groupByObject": "1", "result": [{"value": 0.5}]},
+            ],
+        )
+
+
+class TestGatherBatched(TestCase):
+    @mock.patch.dict(
+        "os.environ",
+        {"OQT_OHSOME_BATCH_SIZE": "10", "OQT_CONCURRENT_COMPUTATIONS": "2"},
+    )
+    def test_concurrent_computations(self):
+        running = []
+        sizes = []
+
+        async def task(i):
+            running.append(i)
+            sizes.append((len(running), batch.current_batch.get().size))
+            await asyncio.sleep(0.01)
+            running.remove(i)
+            return i
+
+        results = asyncio.run(oqt.gather_batched([task(i) for i in range(5)]))
+        self.assertEqual(results, list(range(5)))
+        self.assertEqual(max(running for running, _ in sizes), 2)
+        self.assertTrue(all(size == 2 for _, size in sizes))
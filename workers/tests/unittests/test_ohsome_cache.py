@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+from ohsome_quality_analyst.ohsome import cache
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class AsyncMock(MagicMock):
+    async def __call__(self, *args, **kwargs):
+        return super().__call__(*args, **kwargs)
+
+
+class TestLRUCache(TestCase):
+    def test_get_set(self):
+        lru = cache.LRUCache(maxsize=2)
+        self.assertIsNone(lru.get("a"))
+        lru.set("a", {"value": 1})
+        self.assertDictEqual(lru.get("a"), {"value": 1})
+        self.assertEqual(lru.stats["hits"], 1)
+        self.assertEqual(lru.stats["misses"], 1)
+
+    def test_eviction(self):
+        lru = cache.LRUCache(maxsize=2)
+        lru.set("a", {})
+        lru.set("b", {})
+        lru.get("a")  # "b" is now least recently used
+        lru.set("c", {})
+        self.assertIsNone(lru.get("b"))
+        self.assertIsNotNone(lru.get("a"))
+        self.assertEqual(lru.stats["evictions"], 1)
+
+    def test_disabled(self):
+        lru = cache.LRUCache(maxsize=0)
+        lru.set("a", {})
+        self.assertIsNone(lru.get("a"))
+
+    def test_copy(self):
+        lru = cache.LRUCache(maxsize=1)
+        lru.set("a", {"result": [1]})
+        lru.get("a")["result"].append(2)
+        self.assertDictEqual(lru.get("a"), {"result": [1]})
+
+
+class TestBuildCacheKey(TestCase):
+    def setUp(self):
+        self.url = "https://api.ohsome.org/v1/elements/count"
+        self.bpolys = {"type": "FeatureCollection", "features": []}
+        self.data = {"filter": "building=*", "bpolys": json.dumps(self.bpolys)}
+
+    def test_normalized_bpolys(self):
+        data = {
+            "bpolys": json.dumps(dict(reversed(self.bpolys.items())), indent=4),
+            "filter": "building=*",
+        }
+        self.assertEqual(
+            cache.build_cache_key(self.url, self.data),
+            cache.build_cache_key(self.url, data),
+        )
+
+    def test_time(self):
+        data = {**self.data, "time": "2020-01-01"}
+        self.assertNotEqual(
+            cache.build_cache_key(self.url, self.data),
+            cache.build_cache_key(self.url, data),
+        )
+
+    def test_endpoint(self):
+        self.assertNotEqual(
+            cache.build_cache_key(self.url, self.data),
+            cache.build_cache_key(self.url + "/ratio", self.data),
+        )
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.url = "https://api.ohsome.org/v1/elements/count"
+        self.data = {"filter": "building=*", "bpolys": "{}"}
+        self.response = {"result": [{"value": 1.0, "timestamp": "2020-01-01"}]}
+
+    def test_no_snapshot(self):
+        response_cache = cache.ResponseCache(maxsize=10)
+        asyncio.run(
+            response_cache.set(
+                self.url, self.data, self.response, response_cache.snapshot
+            )
+        )
+        self.assertIsNone(asyncio.run(response_cache.get(self.url, self.data)))
+
+    def test_snapshot_invalidation(self):
+        response_cache = cache.ResponseCache(maxsize=10)
+        response_cache.set_snapshot(datetime(2022, 1, 1))
+        asyncio.run(
+            response_cache.set(
+                self.url, self.data, self.response, response_cache.snapshot
+            )
+        )
+        self.assertDictEqual(
+            asyncio.run(response_cache.get(self.url, self.data)),
+            self.response,
+        )
+        # Same snapshot
+        response_cache.set_snapshot(datetime(2022, 1, 1))
+        self.assertIsNotNone(asyncio.run(response_cache.get(self.url, self.data)))
+        # New snapshot
+        response_cache.set_snapshot(datetime(2022, 2, 1))
+        self.assertIsNone(asyncio.run(response_cache.get(self.url, self.data)))
+        self.assertEqual(response_cache.get_stats()["memory"]["invalidations"], 1)
+
+    def test_snapshot_changed(self):
+        response_cache = cache.ResponseCache(maxsize=10)
+        response_cache.set_snapshot(datetime(2022, 1, 1))
+        snapshot = response_cache.snapshot
+        # New snapshot while the response was requested
+        response_cache.set_snapshot(datetime(2022, 2, 1))
+        asyncio.run(response_cache.set(self.url, self.data, self.response, snapshot))
+        self.assertIsNone(asyncio.run(response_cache.get(self.url, self.data)))
+
+    def test_disk_tmp_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk = cache.DiskCache(directory)
+            with patch("os.replace") as replace:
+                disk.set("20220101T0000", "foo", {})
+            tmp_path = replace.call_args.args[0]
+            self.assertTrue(tmp_path.endswith(".{0}.tmp".format(os.getpid())))
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            response_cache = cache.ResponseCache(maxsize=0, directory=directory)
+            response_cache.set_snapshot(datetime(2022, 1, 1))
+            asyncio.run(
+                response_cache.set(
+                    self.url, self.data, self.response, response_cache.snapshot
+                )
+            )
+            self.assertDictEqual(
+                asyncio.run(response_cache.get(self.url, self.data)),
+                self.response,
+            )
+            self.assertEqual(response_cache.get_stats()["disk"]["hits"], 1)
+            response_cache.set_snapshot(datetime(2022, 2, 1))
+            self.assertIsNone(asyncio.run(response_cache.get(self.url, self.data)))
+            self.assertEqual(os.listdir(directory), [])
+
+
+class TestOhsomeClientQueryCache(TestCase):
+    def setUp(self):
+        fixture = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "fixtures",
+            "ohsome-response-200-valid.geojson",
+        )
+        with open(fixture, "r") as reader:
+            self.valid_response = reader.read()
+        self.bpolys = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+        response_cache = cache.ResponseCache(maxsize=10)
+        response_cache.set_snapshot(datetime(2022, 1, 1))
+        for patcher in (
+            patch.object(cache, "_cache", response_cache),
+            patch.object(
+                ohsome_client.metadata_service,
+                "get_latest_timestamp",
+                new_callable=AsyncMock,
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_query_cached(self):
+        async def query_twice():
+            await ohsome_client.query(self.layer, self.bpolys)
+            return await ohsome_client.query(self.layer, self.bpolys)
+
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = httpx.Response(
+                200,
+                content=self.valid_response,
+                request=httpx.Request("POST", "https://www.example.org/"),
+            )
+            response = asyncio.run(query_twice())
+            mock_request.assert_called_once()
+            self.assertIn("result", response)
@@ -9,7 +9,9 @@ from geojson import FeatureCollection
 from schema import Schema
 
 from ohsome_quality_analyst.base.layer import LayerData
+from ohsome_quality_analyst.ohsome import cache
 from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.ohsome import controller, transport
 from ohsome_quality_analyst.utils.exceptions import (
     LayerDataSchemaError,
     OhsomeApiError,
@@ -43,8 +45,13 @@ class TestOhsomeClientQuery(TestCase):
         self.bpolys = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
         self.layer = get_layer_fixture("building_count")
 
+        # Disable response cache
+        patcher = patch.object(cache, "_cache", cache.ResponseCache(maxsize=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_valid_response(self) -> None:
-        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_request:
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
             mock_request.return_value = httpx.Response(
                 200,
                 content=self.valid_response,
@@ -55,7 +62,7 @@ class TestOhsomeClientQuery(TestCase):
 
     def test_invalid_response_with_status_code_200(self) -> None:
         """When response is streamed it can be invalid while status code equals 200"""
-        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_request:
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
             mock_request.return_value = httpx.Response(
                 200,
                 content=self.invalid_response_geojson,
@@ -65,7 +72,7 @@ class TestOhsomeClientQuery(TestCase):
                 asyncio.run(ohsome_client.query(self.layer, self.bpolys))
 
     def test_status_code_400(self) -> None:
-        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_request:
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
             mock_request.return_value = httpx.Response(
                 400,
                 content=self.invalid_response_time,
@@ -74,23 +81,125 @@ class TestOhsomeClientQuery(TestCase):
             with self.assertRaises(OhsomeApiError):
                 asyncio.run(ohsome_client.query(self.layer, self.bpolys))
 
+    def test_status_code_503_retry(self) -> None:
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
+            mock_request.side_effect = [
+                httpx.Response(
+                    503,
+                    content="Service Unavailable",
+                    request=httpx.Request("POST", "https://www.example.org/"),
+                ),
+                httpx.Response(
+                    200,
+                    content=self.valid_response,
+                    request=httpx.Request("POST", "https://www.example.org/"),
+                ),
+            ]
+            with patch.object(controller.random, "uniform", return_value=0):
+                response = asyncio.run(ohsome_client.query(self.layer, self.bpolys))
+            self.assertEqual(mock_request.call_count, 2)
+            self.assertIn("result", response)
+
     def test_not_implemeted(self) -> None:
         """Query for layer type is not implemeted."""
         with self.assertRaises(NotImplementedError):
             asyncio.run(ohsome_client.query(""))
 
     def test_user_agent(self) -> None:
-        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_request:
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
             mock_request.return_value = httpx.Response(
                 200,
                 content=self.valid_response,
                 request=httpx.Request("POST", "https://www.example.org/"),
             )
             asyncio.run(ohsome_client.query(self.layer, self.bpolys))
+            request = mock_request.call_args[1]["request"]
             self.assertEqual(
                 "ohsome-quality-analyst",
-                mock_request.call_args[1]["headers"]["user-agent"].split("/")[0],
+                request.headers["user-agent"].split("/")[0],
+            )
+
+    def test_compact_response(self) -> None:
+        response = {
+            "result": [
+                {
+                    "timestamp": "2020-01-01T00:00:00Z",
+                    "value": 1,
+                    "unknown": [0] * 100,
+                }
+            ]
+        }
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = httpx.Response(
+                200,
+                json=response,
+                request=httpx.Request("POST", "https://www.example.org/"),
             )
+            response = asyncio.run(ohsome_client.query(self.layer, self.bpolys))
+            self.assertDictEqual(
+                response,
+                {"result": [{"timestamp": "2020-01-01T00:00:00Z", "value": 1}]},
+            )
+
+    def test_invalid_item(self) -> None:
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = httpx.Response(
+                200,
+                json={"result": [{"timestamp": "2020-01-01T00:00:00Z"}]},
+                request=httpx.Request("POST", "https://www.example.org/"),
+            )
+            with self.assertRaises(SchemaError):
+                asyncio.run(ohsome_client.query(self.layer, self.bpolys))
+
+    def test_query_arrays_group_by(self) -> None:
+        response = {
+            "groupByResult": [
+                {
+                    "groupByObject": str(i),
+                    "result": [
+                        {"timestamp": "2020-01-01T00:00:00Z", "value": i},
+                        {"timestamp": "2020-02-01T00:00:00Z", "value": i + 1},
+                    ],
+                }
+                for i in range(3)
+            ]
+        }
+
+        async def query_arrays():
+            return [
+                arrays
+                async for arrays in ohsome_client.query_arrays(
+                    self.layer,
+                    FeatureCollection([self.bpolys]),
+                    group_by_boundary=True,
+                )
+            ]
+
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = httpx.Response(
+                200,
+                json=response,
+                request=httpx.Request("POST", "https://www.example.org/"),
+            )
+            results = asyncio.run(query_arrays())
+        self.assertEqual([r.group_by_object for r in results], ["0", "1", "2"])
+        for i, result in enumerate(results):
+            self.assertEqual(result.values.tolist(), [i, i + 1])
+            self.assertEqual(len(result.timestamps), 2)
+
+    def test_query_arrays_invalid_response(self) -> None:
+        async def query_arrays():
+            async for _ in ohsome_client.query_arrays(self.layer, self.bpolys):
+                pass
+
+        with patch("httpx.AsyncClient.send", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = httpx.Response(
+                200,
+                content=self.invalid_response_geojson,
+                request=httpx.Request("POST", "https://www.example.org/"),
+            )
+            with self.assertRaises(OhsomeApiError):
+                asyncio.run(query_arrays())
 
     def test_layer_data_valid_1(self):
         data = asyncio.run(
@@ -176,6 +285,63 @@ class TestOhsomeClientQuery(TestCase):
             )
 
 
+class TestOhsomeClientSession(TestCase):
+    def tearDown(self) -> None:
+        asyncio.run(ohsome_client.shutdown())
+
+    def test_get_client_shared(self) -> None:
+        async def get_clients():
+            return ohsome_client.get_client(), ohsome_client.get_client()
+
+        client_1, client_2 = asyncio.run(get_clients())
+        self.assertIs(client_1, client_2)
+
+    def test_get_client_new_event_loop(self) -> None:
+        async def get_client():
+            return ohsome_client.get_client()
+
+        client_1 = asyncio.run(get_client())
+        client_2 = asyncio.run(get_client())
+        self.assertIsNot(client_1, client_2)
+
+    def test_get_controller_new_event_loop(self) -> None:
+        async def get_controllers():
+            return ohsome_client.get_controller(), ohsome_client.get_controller()
+
+        controller_1, controller_2 = asyncio.run(get_controllers())
+        self.assertIs(controller_1, controller_2)
+        controller_3, _ = asyncio.run(get_controllers())
+        self.assertIsNot(controller_1, controller_3)
+
+    def test_shutdown(self) -> None:
+        async def startup_shutdown():
+            await ohsome_client.startup()
+            client = ohsome_client.get_client()
+            await ohsome_client.shutdown()
+            return client
+
+        client = asyncio.run(startup_shutdown())
+        self.assertTrue(client.is_closed)
+
+    def test_get_pool_stats(self) -> None:
+        stats = ohsome_client.get_pool_stats()
+        self.assertEqual(
+            {"connections", "idle_connections", "in_flight", "requests", "waits"},
+            stats.keys(),
+        )
+        self.assertEqual(stats["connections"], 0)
+
+    def test_get_pool_stats_client(self) -> None:
+        async def get_stats():
+            ohsome_client.get_client()
+            return ohsome_client.get_pool_stats()
+
+        stats = asyncio.run(get_stats())
+        self.assertIsInstance(ohsome_client._transport, transport.PoolTransport)
+        self.assertEqual(stats["connections"], 0)
+        self.assertEqual(stats["in_flight"], 0)
+
+
 class TestOhsomeClientBuildUrl(TestCase):
     def setUp(self) -> None:
         self.ohsome_api = "https://api.ohsome.org/v1"
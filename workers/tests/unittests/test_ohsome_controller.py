@@ -0,0 +1,130 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+import httpx
+
+from ohsome_quality_analyst.ohsome import controller
+from ohsome_quality_analyst.utils.exceptions import OhsomeApiError
+
+
+class TestAdaptiveLimiter(TestCase):
+    def setUp(self):
+        self.limiter = controller.AdaptiveLimiter(
+            limit=2,
+            max_limit=4,
+            latency_target=60,
+        )
+
+    def test_limit_in_flight(self):
+        max_in_flight = 0
+
+        async def request():
+            nonlocal max_in_flight
+            async with self.limiter.acquire():
+                max_in_flight = max(max_in_flight, self.limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(request() for _ in range(6)))
+
+        asyncio.run(main())
+        self.assertEqual(max_in_flight, 2)
+        self.assertEqual(self.limiter.in_flight, 0)
+        self.assertEqual(self.limiter.get_stats()["waits"], 4)
+
+    def test_cancel_waiting(self):
+        async def main():
+            async with self.limiter.acquire():
+                async with self.limiter.acquire():
+                    task = asyncio.create_task(self.limiter._acquire())
+                    await asyncio.sleep(0)
+                    self.assertEqual(self.limiter.get_stats()["waiting"], 1)
+                    task.cancel()
+                    with self.assertRaises(asyncio.CancelledError):
+                        await task
+            self.assertEqual(self.limiter.get_stats()["waiting"], 0)
+
+        asyncio.run(main())
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    def test_additive_increase(self):
+        started_at = controller.time.monotonic()
+        self.limiter.on_success(started_at)
+        self.assertEqual(self.limiter.limit, 2.5)
+        for _ in range(10):
+            self.limiter.on_success(started_at)
+        self.assertEqual(self.limiter.limit, 4)  # max_limit
+
+    def test_multiplicative_decrease(self):
+        self.limiter.limit = 4
+        started_at = controller.time.monotonic()
+        self.limiter.on_overload(started_at)
+        self.assertEqual(self.limiter.limit, 2)
+        # Same overload episode
+        self.limiter.on_overload(started_at)
+        self.assertEqual(self.limiter.limit, 2)
+        # New episode
+        self.limiter.on_overload(controller.time.monotonic())
+        self.assertEqual(self.limiter.limit, 1)  # min_limit
+        self.assertEqual(self.limiter.get_stats()["decreases"], 2)
+
+    def test_latency_above_target(self):
+        # Slow successful requests are no overload signal
+        self.limiter.on_success(controller.time.monotonic() - 61)
+        self.assertEqual(self.limiter.limit, 2)
+        self.assertEqual(self.limiter.get_stats()["decreases"], 0)
+
+
+class TestController(TestCase):
+    def setUp(self):
+        limiter = controller.AdaptiveLimiter(limit=2, max_limit=4, latency_target=60)
+        self.controller = controller.Controller(limiter, retry_budget=60)
+        # No backoff delay
+        patcher = patch.object(controller.random, "uniform", return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retry(self):
+        errors = [
+            OhsomeApiError("Too Many Requests", status_code=429),
+            httpx.ConnectError("Connection refused"),
+        ]
+
+        async def request():
+            if errors:
+                raise errors.pop(0)
+            return "OK"
+
+        self.assertEqual(asyncio.run(self.controller.call(request)), "OK")
+        stats = self.controller.get_stats()
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["decreases"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_no_retry(self):
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            raise OhsomeApiError("The given query is too large.")
+
+        with self.assertRaises(OhsomeApiError):
+            asyncio.run(self.controller.call(request))
+        self.assertEqual(calls, 1)
+        self.assertEqual(self.controller.get_stats()["retries"], 0)
+
+    def test_retry_budget_exhausted(self):
+        self.controller.retry_budget = 0
+
+        async def request():
+            raise OhsomeApiError("Service Unavailable", status_code=503)
+
+        with patch.object(controller.random, "uniform", return_value=1):
+            with self.assertRaises(OhsomeApiError):
+                asyncio.run(self.controller.call(request))
+        stats = self.controller.get_stats()
+        self.assertEqual(stats["retries"], 0)
+        self.assertEqual(stats["retries_exhausted"], 1)
+        self.assertEqual(stats["limit"], 1)
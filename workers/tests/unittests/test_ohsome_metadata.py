@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from ohsome_quality_analyst.ohsome.metadata import MetadataService
+
+
+class TestMetadataService(TestCase):
+    def setUp(self):
+        self.timestamps = [datetime(2022, 1, 1), datetime(2022, 1, 1)]
+        self.fetch_count = 0
+
+        async def fetch():
+            self.fetch_count += 1
+            return self.timestamps.pop(0)
+
+        self.service = MetadataService(fetch=fetch, refresh_interval=lambda: 600)
+
+    def test_get_latest_timestamp(self):
+        async def get_twice():
+            await self.service.get_latest_timestamp()
+            return await self.service.get_latest_timestamp()
+
+        timestamp = asyncio.run(get_twice())
+        self.assertEqual(timestamp, datetime(2022, 1, 1))
+        self.assertEqual(self.fetch_count, 1)
+
+    def test_get_latest_timestamp_concurrent(self):
+        async def get_concurrent():
+            return await asyncio.gather(
+                self.service.get_latest_timestamp(),
+                self.service.get_latest_timestamp(),
+            )
+
+        asyncio.run(get_concurrent())
+        self.assertEqual(self.fetch_count, 1)
+
+    def test_get_latest_timestamp_expired(self):
+        self.service.refresh_interval = lambda: -1
+        asyncio.run(self.service.get_latest_timestamp())
+        asyncio.run(self.service.get_latest_timestamp())
+        self.assertEqual(self.fetch_count, 2)
+
+    def test_subscribe(self):
+        self.timestamps = [datetime(2022, 1, 1), datetime(2022, 1, 1)]
+        self.timestamps.append(datetime(2022, 2, 1))
+        subscriber = MagicMock()
+        self.service.subscribe(subscriber)
+        for _ in range(3):
+            asyncio.run(self.service.refresh())
+        self.assertEqual(subscriber.call_count, 2)
+        subscriber.assert_called_with(datetime(2022, 2, 1))
+
+    def test_start_stop(self):
+        async def start_stop():
+            await self.service.start()
+            await asyncio.sleep(0.1)
+            timestamp = await self.service.get_latest_timestamp()
+            await self.service.stop()
+            return timestamp
+
+        self.assertEqual(asyncio.run(start_stop()), datetime(2022, 1, 1))
+        self.assertEqual(self.fetch_count, 1)
+        self.assertIsNone(self.service._task)
@@ -0,0 +1,156 @@
+import asyncio
+import importlib.util
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import httpx
+from geojson import Feature
+
+from ohsome_quality_analyst.ohsome import cache
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.ohsome import metadata, series
+
+from ..ohsome_stand_in import StandInConfig, create_app
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class TestSeries(TestCase):
+    def setUp(self):
+        self.feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+
+    def test_fingerprint(self):
+        feature = Feature(id="foo", geometry=self.feature["geometry"], properties={})
+        self.assertEqual(
+            series.get_fingerprint(self.feature),
+            series.get_fingerprint(feature),
+        )
+        self.assertEqual(
+            series.get_fingerprint(self.feature),
+            series.get_fingerprint(self.feature["geometry"]),
+        )
+
+    def test_build_series_key(self):
+        url = "https://api.ohsome.org/v1/elements/count"
+        key = series.build_series_key(url, self.layer, self.feature, "2008-01-01//P1M")
+        self.assertEqual(
+            key,
+            series.build_series_key(
+                "http://localhost/v1/elements/count",
+                self.layer,
+                self.feature,
+                "2008-01-01//P1M",
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            series.build_series_key(url, self.layer, self.feature, "2010-01-01//P1M"),
+        )
+
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = series.SeriesStore(os.path.join(directory, "series"))
+            self.assertIsNone(asyncio.run(store.get("foo")))
+            asyncio.run(store.set("foo", {"result": []}))
+            self.assertEqual(asyncio.run(store.get("foo")), {"result": []})
+            self.assertEqual(store.get_stats()["hits"], 1)
+            self.assertEqual(store.get_stats()["misses"], 1)
+
+    def test_get_store_disabled(self):
+        with mock.patch.dict(os.environ, {"OQT_OHSOME_SERIES_DIR": ""}):
+            self.assertIsNone(series.get_store())
+
+
+class TestOhsomeClientSeries(TestCase):
+    def setUp(self):
+        self.app = create_app(StandInConfig(snapshot="2022-12-01T00:00Z"))
+        self.bpolys = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        metadata_service = metadata.MetadataService(
+            fetch=ohsome_client.fetch_latest_ohsome_timestamp,
+            refresh_interval=lambda: 0,
+        )
+        env = {
+            "OQT_OHSOME_API": "http://stand-in",
+            "OQT_OHSOME_SERIES_DIR": self.directory.name,
+        }
+        for patcher in (
+            mock.patch.dict(os.environ, env),
+            mock.patch.object(cache, "_cache", cache.ResponseCache(maxsize=0)),
+            mock.patch.object(ohsome_client, "get_client", self.get_client),
+            mock.patch.object(ohsome_client, "metadata_service", metadata_service),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(app=self.app)
+
+    def query_series(self, time="2008-01-01//P1M"):
+        return asyncio.run(ohsome_client.query_series(self.layer, self.bpolys, time))
+
+    def test_query_series(self):
+        response = self.query_series()
+        self.assertEqual(len(response["result"]), 180)
+        self.assertEqual(self.app.state.stats["requests"], 1)
+        # Same snapshot: Only the metadata is fetched
+        self.assertEqual(self.query_series()["result"], response["result"])
+        self.assertEqual(self.app.state.stats["requests"], 2)
+
+    def test_query_series_append(self):
+        self.query_series()
+        self.app.state.config.snapshot = "2023-02-01T00:00Z"
+        response = self.query_series()
+        # Metadata and months since the last stored timestamp
+        self.assertEqual(self.app.state.stats["requests"], 3)
+        self.assertEqual(len(response["result"]), 182)
+        self.assertEqual(response["result"][-1]["timestamp"], "2023-02-01T00:00:00Z")
+        expected = asyncio.run(
+            ohsome_client.query(self.layer, self.bpolys, time="2008-01-01//P1M")
+        )
+        self.assertEqual(response["result"], expected["result"])
+        self.assertEqual(series.get_store().get_stats()["appends"], 1)
+
+    def test_query_series_different_layer(self):
+        self.query_series()
+        self.layer = get_layer_fixture("major_roads_length")
+        self.query_series()
+        self.assertEqual(self.app.state.stats["requests"], 2)
+
+    def test_query_series_closed_time_range(self):
+        self.query_series("2008-01-01/2010-01-01/P1M")
+        self.query_series("2008-01-01/2010-01-01/P1M")
+        # Not stored
+        self.assertEqual(self.app.state.stats["requests"], 2)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_query_series_disabled(self):
+        with mock.patch.dict(os.environ, {"OQT_OHSOME_SERIES_DIR": ""}):
+            self.query_series()
+            self.query_series()
+        self.assertEqual(self.app.state.stats["requests"], 2)
+
+    def test_run_mapping_saturation_models(self):
+        """Query path of the script running the Mapping Saturation models."""
+        path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..",
+            "..",
+            "scripts",
+            "run_mapping_saturation_models.py",
+        )
+        spec = importlib.util.spec_from_file_location("script", path)
+        script = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(script)
+        values = asyncio.run(script.query_ohsome_api([self.bpolys], [self.layer]))
+        self.assertEqual(len(values), 1)
+        self.assertEqual(len(values[0]), 180)
+        # Time series is served by the series store
+        self.assertEqual(
+            asyncio.run(script.query_ohsome_api([self.bpolys], [self.layer])),
+            values,
+        )
+        self.assertEqual(self.app.state.stats["requests"], 2)
@@ -0,0 +1,143 @@
+import asyncio
+import datetime
+import os
+from unittest import TestCase, mock
+
+import httpx
+
+from ohsome_quality_analyst.ohsome import cache
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.ohsome import shard
+
+from ..ohsome_stand_in import StandInConfig, create_app
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class TestShard(TestCase):
+    def setUp(self):
+        self.latest = datetime.datetime(2022, 12, 1, 20, 0)
+
+    def test_get_timestamps(self):
+        timestamps = shard.get_timestamps("2008-01-01//P1M", self.latest)
+        self.assertEqual(len(timestamps), 180)
+        self.assertEqual(timestamps[0], datetime.datetime(2008, 1, 1))
+        self.assertEqual(timestamps[-1], datetime.datetime(2022, 12, 1))
+        timestamps = shard.get_timestamps("2020-01-01/2021-01-01/P1Y", self.latest)
+        self.assertEqual(len(timestamps), 2)
+
+    def test_get_timestamps_not_supported(self):
+        for time in (
+            "2020-01-01",
+            "2020-01-01,2021-01-01",
+            "2020-01-01/2021-01-01",
+            "2020-01-01/2021-01-01/PT1H",
+        ):
+            self.assertIsNone(shard.get_timestamps(time, self.latest))
+
+    def test_get_shard_count(self):
+        self.assertEqual(shard.get_shard_count(10, 120, 4, 180), 1)
+        self.assertEqual(shard.get_shard_count(300, 120, 4, 180), 3)
+        self.assertEqual(shard.get_shard_count(3000, 120, 4, 180), 4)
+        # At least 12 timestamps per shard
+        self.assertEqual(shard.get_shard_count(3000, 120, 4, 30), 2)
+
+    def test_split_time_range(self):
+        time = "2008-01-01//P1M"
+        timestamps = shard.get_timestamps(time, self.latest)
+        self.assertEqual(shard.split_time_range(time, timestamps, 1), [time])
+        self.assertEqual(
+            shard.split_time_range(time, timestamps, 3),
+            [
+                "2008-01-01/2013-01-01/P1M",
+                "2013-01-01/2018-01-01/P1M",
+                "2018-01-01//P1M",
+            ],
+        )
+
+    def test_merge_responses(self):
+        responses = [
+            {
+                "apiVersion": "1",
+                "result": [{"timestamp": "2008", "value": 1}, {"timestamp": "2009"}],
+            },
+            {
+                "apiVersion": "1",
+                "result": [{"timestamp": "2009"}, {"timestamp": "2010"}],
+            },
+        ]
+        merged = shard.merge_responses(responses)
+        self.assertEqual(
+            [item["timestamp"] for item in merged["result"]],
+            ["2008", "2009", "2010"],
+        )
+        self.assertEqual(merged["apiVersion"], "1")
+
+    def test_merge_responses_group_by(self):
+        responses = [
+            {
+                "groupByResult": [
+                    {"groupByObject": "a", "result": [{"timestamp": "2008"}]},
+                    {"groupByObject": "b", "result": [{"timestamp": "2008"}]},
+                ]
+            },
+            {
+                "groupByResult": [
+                    {"groupByObject": "a", "result": [{"timestamp": "2009"}]},
+                    {"groupByObject": "b", "result": [{"timestamp": "2009"}]},
+                ]
+            },
+        ]
+        merged = shard.merge_responses(responses)
+        self.assertEqual(len(merged["groupByResult"]), 2)
+        for group in merged["groupByResult"]:
+            self.assertEqual(len(group["result"]), 2)
+
+    def test_latency_model(self):
+        model = shard.LatencyModel(rate=1, alpha=0.5)
+        self.assertEqual(model.estimate(10), 10)
+        model.observe(10, 30)  # Rate of 3
+        self.assertEqual(model.rate, 2)
+
+
+class TestOhsomeClientShard(TestCase):
+    def setUp(self):
+        self.app = create_app(StandInConfig())
+        self.bpolys = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+        for patcher in (
+            mock.patch.dict(os.environ, {"OQT_OHSOME_API": "http://stand-in"}),
+            mock.patch.object(cache, "_cache", cache.ResponseCache(maxsize=0)),
+            mock.patch.object(ohsome_client, "get_client", self.get_client),
+            mock.patch.object(ohsome_client, "latency_model", shard.LatencyModel()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(app=self.app)
+
+    def query(self, **kwargs):
+        return asyncio.run(ohsome_client.query(self.layer, self.bpolys, **kwargs))
+
+    def test_query_sharded(self):
+        with mock.patch.dict(os.environ, {"OQT_OHSOME_MAX_SHARDS": "1"}):
+            expected = self.query(time="2008-01-01//P1M")
+        self.assertEqual(self.app.state.stats["requests"], 1)
+        # Estimated duration exceeds the targeted duration of a shard
+        ohsome_client.latency_model.rate = 1000
+        response = self.query(time="2008-01-01//P1M")
+        self.assertEqual(response, expected)
+        # Metadata and four shards
+        self.assertEqual(self.app.state.stats["requests"], 1 + 1 + 4)
+
+    def test_query_contributions_sharded(self):
+        time = "2008-01-01/2022-01-01/P1Y"
+        expected = self.query(time=time, count_latest_contributions=True)
+        ohsome_client.latency_model.rate = 1000
+        response = self.query(time=time, count_latest_contributions=True)
+        self.assertEqual(response, expected)
+        self.assertEqual(len(response["result"]), 14)
+
+    def test_latency_observed(self):
+        self.query(time="2008-01-01//P1M")
+        self.assertEqual(ohsome_client.latency_model.observations, 1)
@@ -0,0 +1,105 @@
+import asyncio
+from unittest import TestCase
+
+from ohsome_quality_analyst.ohsome.single_flight import SingleFlight
+
+
+class TestSingleFlight(TestCase):
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.call_count = 0
+
+    async def fetch(self, value=None):
+        self.call_count += 1
+        await asyncio.sleep(0.01)
+        return {"result": [value]}
+
+    async def fail(self):
+        self.call_count += 1
+        await asyncio.sleep(0.01)
+        raise ValueError()
+
+    def test_coalesce(self):
+        async def run():
+            return await asyncio.gather(
+                self.single_flight.do("a", self.fetch, 1),
+                self.single_flight.do("a", self.fetch, 1),
+                self.single_flight.do("b", self.fetch, 2),
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [{"result": [1]}, {"result": [1]}, {"result": [2]}])
+        self.assertEqual(self.call_count, 2)
+        self.assertDictEqual(
+            self.single_flight.get_stats(),
+            {"in_flight": 0, "executed": 2, "coalesced": 1},
+        )
+
+    def test_copy(self):
+        async def run():
+            return await asyncio.gather(
+                self.single_flight.do("a", self.fetch, 1),
+                self.single_flight.do("a", self.fetch, 1),
+            )
+
+        result_1, result_2 = asyncio.run(run())
+        self.assertIsNot(result_1, result_2)
+
+    def test_sequential(self):
+        asyncio.run(self.single_flight.do("a", self.fetch))
+        asyncio.run(self.single_flight.do("a", self.fetch))
+        self.assertEqual(self.call_count, 2)
+
+    def test_exception(self):
+        async def run():
+            return await asyncio.gather(
+                self.single_flight.do("a", self.fail),
+                self.single_flight.do("a", self.fail),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(self.call_count, 1)
+
+    def test_leader_cancelled(self):
+        """Other callers get the result if the first caller is cancelled."""
+
+        async def run():
+            leader = asyncio.create_task(self.single_flight.do("a", self.fetch, 1))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(self.single_flight.do("a", self.fetch, 1))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        self.assertEqual(asyncio.run(run()), {"result": [1]})
+        self.assertEqual(self.call_count, 1)
+        self.assertEqual(self.single_flight.get_stats()["in_flight"], 0)
+
+    def test_all_cancelled(self):
+        cancelled = []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            tasks = [
+                asyncio.create_task(self.single_flight.do("a", fetch)) for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        self.assertEqual(cancelled, [True])
+        self.assertEqual(self.single_flight.get_stats()["in_flight"], 0)
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import os
+from unittest import TestCase, mock
+
+import httpx
+from dateutil.parser import isoparse
+from fastapi.testclient import TestClient
+from geojson import Feature, FeatureCollection
+
+from ohsome_quality_analyst.ohsome import cache
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.ohsome import controller
+from ohsome_quality_analyst.utils.exceptions import OhsomeApiError
+
+from ..ohsome_stand_in import StandInConfig, create_app, parse_time
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class TestStandIn(TestCase):
+    def setUp(self):
+        self.client = TestClient(create_app(StandInConfig()))
+        self.feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.data = {
+            "bpolys": json.dumps(FeatureCollection([self.feature])),
+            "filter": "building=* and type:way",
+        }
+
+    def test_metadata(self):
+        response = self.client.get("/metadata").json()
+        self.assertEqual(
+            response["extractRegion"]["temporalExtent"]["toTimestamp"],
+            "2022-12-01T00:00Z",
+        )
+
+    def test_count_time_series(self):
+        data = {**self.data, "time": "2008-01-01//P1M"}
+        response = self.client.post("/elements/count", data=data).json()
+        self.assertEqual(len(response["result"]), 180)
+        values = [item["value"] for item in response["result"]]
+        self.assertEqual(values, sorted(values))  # Growth curve
+        self.assertIsInstance(values[0], int)
+        # Deterministic
+        response_2 = self.client.post("/elements/count", data=data).json()
+        self.assertEqual(response, response_2)
+
+    def test_filter(self):
+        response_1 = self.client.post("/elements/length", data=self.data).json()
+        data = {**self.data, "filter": "highway=*"}
+        response_2 = self.client.post("/elements/length", data=data).json()
+        self.assertNotEqual(response_1["result"], response_2["result"])
+
+    def test_ratio_group_by_boundary(self):
+        feature = {**self.feature, "id": "altstadt"}
+        data = {
+            **self.data,
+            "bpolys": json.dumps(FeatureCollection([feature, self.feature])),
+            "filter2": "building=* and name=*",
+        }
+        response = self.client.post(
+            "/elements/area/ratio/groupBy/boundary", data=data
+        ).json()
+        self.assertNotIn("groupByResult", response)
+        self.assertEqual(
+            [item["groupByObject"] for item in response["groupByBoundaryResult"]],
+            ["altstadt", "feature2"],
+        )
+        item = response["groupByBoundaryResult"][0]["ratioResult"][0]
+        self.assertAlmostEqual(item["ratio"], item["value2"] / item["value"])
+
+    def test_group_by_boundary(self):
+        data = {
+            **self.data,
+            "bpolys": json.dumps(FeatureCollection([self.feature, self.feature])),
+        }
+        response = self.client.post("/elements/count/groupBy/boundary", data=data)
+        self.assertEqual(len(response.json()["groupByResult"]), 2)
+
+    def test_contributions(self):
+        data = {**self.data, "time": "2008-01-01/2022-12-01/P1Y"}
+        response = self.client.post("/contributions/latest/count", data=data).json()
+        self.assertEqual(len(response["result"]), 14)
+        self.assertEqual(response["result"][0]["fromTimestamp"], "2008-01-01T00:00:00Z")
+
+    def test_contributions_not_supported(self):
+        for path in (
+            "/contributions/latest/count/groupBy/boundary",
+            "/contributions/latest/length",
+        ):
+            response = self.client.post(path, data=self.data)
+            self.assertEqual(response.status_code, 404)
+
+    def test_error_injection(self):
+        client = TestClient(create_app(StandInConfig(error_rate=1, error_status=429)))
+        response = client.post("/elements/count", data=self.data)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(client.get("/stats").json()["errors"], 1)
+
+    def test_timeout_injection(self):
+        client = TestClient(create_app(StandInConfig(error_rate=1, error_status=413)))
+        data = {**self.data, "time": "2008-01-01//P1M"}
+        response = client.post("/elements/count", data=data)
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaises(ValueError):
+            response.json()
+
+    def test_item_padding(self):
+        client = TestClient(create_app(StandInConfig(item_padding=1000)))
+        response = client.post("/elements/count", data=self.data)
+        self.assertGreater(len(response.content), 1000)
+
+    def test_parse_time(self):
+        latest = isoparse("2022-12-01T00:00Z")
+        self.assertEqual(parse_time(None, latest), [latest])
+        self.assertEqual(len(parse_time("2020-01-01,2021-01-01", latest)), 2)
+        self.assertEqual(len(parse_time("2020-01-01/2021-01-01", latest)), 2)
+        self.assertEqual(len(parse_time("2020-01-01/2021-01-01/P1M", latest)), 13)
+        self.assertEqual(parse_time("2022-01-01//P1Y", latest)[-1].year, 2022)
+        with self.assertRaises(ValueError):
+            parse_time("2020-01-01//PT1H", latest)
+
+
+class TestOhsomeClientStandIn(TestCase):
+    """Query the stand-in with the ohsome client end to end (Without network)."""
+
+    def setUp(self):
+        self.app = create_app(StandInConfig())
+        self.bpolys = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+        for patcher in (
+            mock.patch.dict(os.environ, {"OQT_OHSOME_API": "http://stand-in"}),
+            mock.patch.object(cache, "_cache", cache.ResponseCache(maxsize=0)),
+            mock.patch.object(ohsome_client, "get_client", self.get_client),
+            mock.patch.object(controller.random, "uniform", return_value=0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(app=self.app)
+
+    def test_query(self):
+        response = asyncio.run(
+            ohsome_client.query(self.layer, self.bpolys, time="2008-01-01//P1M")
+        )
+        self.assertEqual(len(response["result"]), 180)
+
+    def test_query_group_by_boundary(self):
+        bpolys = FeatureCollection([self.bpolys] * 3)
+        response = asyncio.run(
+            ohsome_client.query(self.layer, bpolys, group_by_boundary=True)
+        )
+        self.assertEqual(len(response["groupByResult"]), 3)
+
+    def test_query_batched(self):
+        """Queries of different features are sent as one group by boundary request."""
+        features = [Feature(id=i, geometry=self.bpolys.geometry) for i in range(3)]
+
+        async def run():
+            with ohsome_client.batch_queries(len(features)):
+                return await asyncio.gather(
+                    *(ohsome_client.query(self.layer, f) for f in features)
+                )
+
+        responses = asyncio.run(run())
+        self.assertEqual(self.app.state.stats["requests"], 1)
+        self.assertEqual(len(responses), 3)
+        for response in responses:
+            self.assertEqual(len(response["result"]), 1)
+
+    def test_query_batched_ratio(self):
+        features = [Feature(id=i, geometry=self.bpolys.geometry) for i in range(2)]
+
+        async def run():
+            with ohsome_client.batch_queries(len(features)):
+                return await asyncio.gather(
+                    *(ohsome_client.query(self.layer, f, ratio=True) for f in features)
+                )
+
+        responses = asyncio.run(run())
+        self.assertEqual(self.app.state.stats["requests"], 2)
+        for response in responses:
+            self.assertEqual(len(response["ratioResult"]), 1)
+
+    def test_query_batched_latest_contributions(self):
+        features = [Feature(id=i, geometry=self.bpolys.geometry) for i in range(2)]
+
+        async def run():
+            with ohsome_client.batch_queries(len(features)):
+                return await asyncio.gather(
+                    *(
+                        ohsome_client.query(
+                            self.layer,
+                            f,
+                            time="2008-01-01/2022-12-01/P1Y",
+                            count_latest_contributions=True,
+                        )
+                        for f in features
+                    )
+                )
+
+        responses = asyncio.run(run())
+        self.assertEqual(self.app.state.stats["requests"], 2)
+        for response in responses:
+            self.assertEqual(len(response["result"]), 14)
+
+    def test_query_retry(self):
+        self.app = create_app(StandInConfig(error_rate=0.5, seed=1))
+        for _ in range(5):
+            asyncio.run(ohsome_client.query(self.layer, self.bpolys))
+        self.assertGreater(self.app.state.stats["errors"], 0)
+
+    def test_query_timeout(self):
+        self.app = create_app(StandInConfig(error_rate=1, error_status=413))
+        with self.assertRaises(OhsomeApiError):
+            asyncio.run(
+                ohsome_client.query(self.layer, self.bpolys, time="2008-01-01//P1M")
+            )
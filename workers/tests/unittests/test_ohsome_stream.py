@@ -0,0 +1,132 @@
+import json
+import os
+from json import JSONDecodeError
+from unittest import TestCase
+
+import numpy as np
+
+from ohsome_quality_analyst.ohsome import stream
+
+
+def parse(body: bytes, chunk_size: int) -> tuple:
+    parser = stream.ResponseParser()
+    items = []
+    for i in range(0, len(body), chunk_size):
+        items += list(parser.feed(body[i : i + chunk_size]))
+    items += list(parser.close())
+    return items, parser.members
+
+
+class TestResponseParser(TestCase):
+    def setUp(self):
+        fixtures_dir = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "fixtures"
+        )
+        fixture = os.path.join(fixtures_dir, "ohsome-response-200-valid.geojson")
+        with open(fixture, "rb") as reader:
+            self.valid_response = reader.read()
+        fixture = os.path.join(fixtures_dir, "ohsome-response-200-invalid.geojson")
+        with open(fixture, "rb") as reader:
+            self.invalid_response = reader.read()
+
+    def test_valid_response(self):
+        expected = json.loads(self.valid_response)
+        for chunk_size in (1, 7, len(self.valid_response)):
+            items, members = parse(self.valid_response, chunk_size)
+            self.assertEqual([item for _, item in items], expected["result"])
+            self.assertEqual({key for key, _ in items}, {"result"})
+            self.assertDictEqual(members["attribution"], expected["attribution"])
+            self.assertEqual(members["apiVersion"], expected["apiVersion"])
+
+    def test_group_by(self):
+        response = {
+            "groupByResult": [
+                {
+                    "groupByObject": str(i),
+                    "result": [{"timestamp": "2020-01-01T00:00:00Z", "value": i}],
+                }
+                for i in range(10)
+            ],
+            "apiVersion": "1.6.2",
+        }
+        items, members = parse(json.dumps(response).encode(), 5)
+        self.assertEqual([item for _, item in items], response["groupByResult"])
+        self.assertEqual(members["apiVersion"], "1.6.2")
+
+    def test_numbers_split_by_chunks(self):
+        body = b'{"result": [{"value": 123456}], "count": 987654}'
+        for chunk_size in range(1, len(body)):
+            items, members = parse(body, chunk_size)
+            self.assertEqual(items, [("result", {"value": 123456})])
+            self.assertEqual(members["count"], 987654)
+
+    def test_multibyte_characters_split_by_chunks(self):
+        body = '{"text": "© OpenStreetMap contributors", "result": []}'.encode()
+        items, members = parse(body, 1)
+        self.assertEqual(items, [])
+        self.assertEqual(members["text"], "© OpenStreetMap contributors")
+
+    def test_nan(self):
+        items, _ = parse(b'{"ratioResult": [{"ratio": NaN}]}', 4)
+        self.assertTrue(np.isnan(items[0][1]["ratio"]))
+
+    def test_invalid_response_timeout(self):
+        """Error object of the ohsome API is appended to the streamed response."""
+        with self.assertRaises(JSONDecodeError):
+            parse(self.invalid_response, 64)
+
+    def test_error_object_appended_to_result(self):
+        body = (
+            b'{"result": [{"value": 1}, {"value": 2}{"status": 413, "message": '
+            + b'"The given query is too large in respect to the given timeout."}'
+        )
+        parser = stream.ResponseParser()
+        items = []
+        # Error is detected as soon as it arrives (Before closing the parser)
+        with self.assertRaises(JSONDecodeError):
+            for i in range(0, len(body), 8):
+                for item in parser.feed(body[i : i + 8]):
+                    items.append(item)
+        self.assertEqual(len(items), 2)
+
+    def test_truncated(self):
+        for body in (
+            b'{"result": [{"value": 1}, {"val',
+            b'{"result": [{"value": 1}',
+            b'{"result": [{"value": 1}]',
+            b"",
+        ):
+            with self.assertRaises(JSONDecodeError):
+                parse(body, 8)
+
+    def test_extra_data(self):
+        with self.assertRaises(JSONDecodeError):
+            parse(b'{"result": []} {}', 8)
+
+
+class TestToArrays(TestCase):
+    def test_to_arrays(self):
+        items = [
+            {"timestamp": "2020-01-01T00:00:00Z", "value": 1},
+            {"timestamp": "2020-02-01T00:00:00Z", "value": 2.5},
+        ]
+        arrays = stream.to_arrays(items, group_by_object="1")
+        self.assertEqual(arrays.group_by_object, "1")
+        self.assertEqual(arrays.values.dtype, np.float64)
+        np.testing.assert_array_equal(arrays.values, [1.0, 2.5])
+        np.testing.assert_array_equal(
+            arrays.timestamps,
+            np.array(["2020-01-01", "2020-02-01"], dtype="datetime64[s]"),
+        )
+
+    def test_to_arrays_ratio(self):
+        items = [{"toTimestamp": "2020-01-01T00:00:00Z", "ratio": "NaN"}]
+        arrays = stream.to_arrays(items, value_key="ratio")
+        self.assertTrue(np.isnan(arrays.values[0]))
+
+    def test_compact_item(self):
+        item = {"timestamp": "2020-01-01T00:00:00Z", "value": 1, "extra": {}}
+        self.assertDictEqual(
+            stream.compact_item(item),
+            {"timestamp": "2020-01-01T00:00:00Z", "value": 1},
+        )
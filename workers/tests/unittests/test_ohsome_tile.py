@@ -0,0 +1,179 @@
+import asyncio
+import os
+from unittest import TestCase, mock
+
+import httpx
+from geojson import Feature, FeatureCollection
+from shapely.geometry import box, mapping, shape
+
+from ohsome_quality_analyst.config import get_config_value
+from ohsome_quality_analyst.ohsome import cache
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.ohsome import tile
+from ohsome_quality_analyst.utils.geometry import get_area
+
+from ..ohsome_stand_in import StandInConfig, create_app
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+def get_box_feature(*bounds) -> Feature:
+    return Feature(geometry=mapping(box(*bounds)))
+
+
+class TestTile(TestCase):
+    def test_get_tiles(self):
+        # About 2 x 1 degree with a hole in the center
+        polygon = box(8, 49, 10, 50).difference(box(8.9, 49.4, 9.1, 49.6))
+        feature = Feature(geometry=mapping(polygon))
+        tiles = tile.get_tiles(feature, 1000)
+        self.assertGreater(len(tiles), 10)
+        for t in tiles:
+            self.assertLessEqual(get_area(t), 1000)
+            self.assertTrue(shape(t["geometry"]).within(polygon.buffer(1e-9)))
+        self.assertAlmostEqual(
+            sum(get_area(t) for t in tiles) / get_area(feature), 1, places=3
+        )
+        # Rather square tiles
+        self.assertLess(len(tiles), 2 * get_area(feature) / 1000 + 2)
+
+    @mock.patch.dict("os.environ", {}, clear=True)
+    def test_default_tile_size(self):
+        # AOIs of the API (bpolys) can only be tiled if tiles are below the size limit
+        self.assertLess(
+            get_config_value("ohsome_tile_size"),
+            get_config_value("geom_size_limit"),
+        )
+
+    def test_get_tiles_small(self):
+        feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.assertEqual(tile.get_tiles(feature, 1000), [feature])
+        self.assertEqual(tile.get_tiles(feature, 0), [feature])
+
+    def test_get_tiles_clipped(self):
+        # Diagonal line of small squares. Most cells of the grid are empty.
+        polygon = shape(
+            {
+                "type": "MultiPolygon",
+                "coordinates": [
+                    mapping(box(8 + i, 49 + i, 8.1 + i, 49.1 + i))["coordinates"]
+                    for i in range(3)
+                ],
+            }
+        )
+        tiles = tile.get_tiles(Feature(geometry=mapping(polygon)), 1000)
+        self.assertLess(len(tiles), 6)
+        for t in tiles:
+            self.assertEqual(t["geometry"]["type"], "Polygon")
+
+    def test_is_additive(self):
+        self.assertTrue(tile.is_additive(get_layer_fixture("building_area"), False))
+        self.assertTrue(
+            tile.is_additive(get_layer_fixture("major_roads_length"), False)
+        )
+        self.assertFalse(tile.is_additive(get_layer_fixture("building_area"), True))
+        # Elements crossing the border of tiles would be counted multiple times
+        self.assertFalse(tile.is_additive(get_layer_fixture("building_count"), False))
+
+    def test_merge_responses(self):
+        responses = [
+            {"result": [{"timestamp": "2020", "value": 1}]},
+            {"result": [{"timestamp": "2020", "value": 2.5}]},
+        ]
+        merged = tile.merge_responses(responses)
+        self.assertEqual(merged["result"], [{"timestamp": "2020", "value": 3.5}])
+
+    def test_merge_responses_ratio(self):
+        responses = [
+            {
+                "ratioResult": [
+                    {"timestamp": "2020", "value": 4, "value2": 1, "ratio": 0.25},
+                    {"timestamp": "2021", "value": 0, "value2": 0, "ratio": "NaN"},
+                ]
+            },
+            {
+                "ratioResult": [
+                    {"timestamp": "2020", "value": 6, "value2": 4, "ratio": 0.67},
+                    {"timestamp": "2021", "value": 0, "value2": 0, "ratio": "NaN"},
+                ]
+            },
+        ]
+        merged = tile.merge_responses(responses, ratio=True)
+        self.assertEqual(merged["ratioResult"][0]["ratio"], 0.5)
+        self.assertEqual(merged["ratioResult"][1]["ratio"], "NaN")
+        # Responses are not modified
+        self.assertEqual(responses[0]["ratioResult"][0]["value"], 4)
+
+
+class TestOhsomeClientTile(TestCase):
+    def setUp(self):
+        self.app = create_app(StandInConfig())
+        self.bpolys = get_box_feature(8, 49, 9, 50)
+        self.layer = get_layer_fixture("major_roads_length")
+        for patcher in (
+            mock.patch.dict(
+                os.environ,
+                {"OQT_OHSOME_API": "http://stand-in", "OQT_OHSOME_TILE_SIZE": "2500"},
+            ),
+            mock.patch.object(cache, "_cache", cache.ResponseCache(maxsize=0)),
+            mock.patch.object(ohsome_client, "get_client", self.get_client),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(app=self.app)
+
+    def test_query_tiled(self):
+        tiles = tile.get_tiles(self.bpolys, 2500)
+        self.assertEqual(len(tiles), 4)
+        response = asyncio.run(ohsome_client.query(self.layer, self.bpolys))
+        self.assertEqual(self.app.state.stats["requests"], 4)
+        expected = 0
+        for t in tiles:
+            result = asyncio.run(ohsome_client.query(self.layer, t))
+            expected += result["result"][0]["value"]
+        self.assertAlmostEqual(response["result"][0]["value"], expected)
+
+    def test_query_tiled_ratio(self):
+        response = asyncio.run(
+            ohsome_client.query(self.layer, self.bpolys, time="2020-01-01", ratio=True)
+        )
+        item = response["ratioResult"][0]
+        self.assertAlmostEqual(item["ratio"], item["value2"] / item["value"])
+        self.assertEqual(self.app.state.stats["requests"], 4)
+
+    def test_query_not_tiled(self):
+        with mock.patch.dict(os.environ, {"OQT_OHSOME_TILE_SIZE": "0"}):
+            asyncio.run(ohsome_client.query(self.layer, self.bpolys))
+        self.assertEqual(self.app.state.stats["requests"], 1)
+        asyncio.run(
+            ohsome_client.query(get_layer_fixture("building_count"), self.bpolys)
+        )
+        self.assertEqual(self.app.state.stats["requests"], 2)
+        asyncio.run(
+            ohsome_client.query(
+                self.layer,
+                self.bpolys,
+                time="2020-01-01/2021-01-01/P1Y",
+                count_latest_contributions=True,
+            )
+        )
+        self.assertEqual(self.app.state.stats["requests"], 3)
+
+    def test_query_tiled_in_batch(self):
+        async def main():
+            with ohsome_client.batch_queries(2):
+                return await asyncio.gather(
+                    ohsome_client.query(self.layer, self.bpolys),
+                    ohsome_client.query(self.layer, get_box_feature(8, 49, 8.1, 49.1)),
+                )
+
+        responses = asyncio.run(main())
+        self.assertEqual(len(responses), 2)
+        # Four tiles and one unbatched request of the small AOI
+        self.assertEqual(self.app.state.stats["requests"], 5)
+
+    def test_query_group_by_boundary_not_tiled(self):
+        bpolys = FeatureCollection([self.bpolys, self.bpolys])
+        asyncio.run(ohsome_client.query(self.layer, bpolys, group_by_boundary=True))
+        self.assertEqual(self.app.state.stats["requests"], 1)
@@ -0,0 +1,164 @@
+import asyncio
+from collections import Counter
+from unittest import TestCase
+
+import httpcore
+import httpx
+
+from ohsome_quality_analyst.ohsome import transport
+
+
+class Connection:
+    """Stand-in for a connection of `httpcore.AsyncConnectionPool`."""
+
+    def __init__(self, available: bool = False, idle: bool = False) -> None:
+        self.available = available
+        self.idle = idle
+
+    def is_available(self) -> bool:
+        return self.available
+
+    def is_idle(self) -> bool:
+        return self.idle
+
+
+class Stream:
+    """Response body which is not read before it is streamed."""
+
+    def __init__(self, error: Exception = None) -> None:
+        self.error = error
+
+    async def __aiter__(self):
+        yield b"foo"
+        if self.error is not None:
+            raise self.error
+
+    async def aclose(self):
+        pass
+
+
+class Pool:
+    """Stand-in for `httpcore.AsyncConnectionPool`."""
+
+    def __init__(self, error: Exception = None, stream_error: Exception = None):
+        self.connections = []
+        self.error = error
+        self.stream_error = stream_error
+
+    async def handle_async_request(self, request: httpcore.Request):
+        if self.error is not None:
+            raise self.error
+        return httpcore.Response(200, content=Stream(self.stream_error))
+
+    async def aclose(self):
+        pass
+
+
+class TestPoolTransport(TestCase):
+    def setUp(self):
+        self.stats = Counter()
+
+    def get_client(self, pool: Pool) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=transport.PoolTransport(
+                httpx.Limits(max_connections=2),
+                http2=False,
+                stats=self.stats,
+                pool=pool,
+            )
+        )
+
+    def test_in_flight(self):
+        async def main():
+            async with self.get_client(Pool()) as client:
+                async with client.stream("GET", "https://www.example.org/") as resp:
+                    # Request is in flight until the response is closed
+                    self.assertEqual(self.stats["in_flight"], 1)
+                    self.assertEqual(await resp.aread(), b"foo")
+                self.assertEqual(self.stats["in_flight"], 0)
+                await client.get("https://www.example.org/")
+
+        asyncio.run(main())
+        self.assertEqual(self.stats["requests"], 2)
+        self.assertEqual(self.stats["in_flight"], 0)
+        self.assertEqual(self.stats["waits"], 0)
+
+    def test_waits(self):
+        pool = Pool()
+
+        async def main():
+            async with self.get_client(pool) as client:
+                # Pool is not full
+                pool.connections = [Connection()]
+                await client.get("https://www.example.org/")
+                # Pool is full but a connection can take another request (HTTP/2)
+                pool.connections = [Connection(), Connection(available=True)]
+                await client.get("https://www.example.org/")
+                # Pool is full and all connections are busy
+                pool.connections = [Connection(), Connection()]
+                await client.get("https://www.example.org/")
+
+        asyncio.run(main())
+        self.assertEqual(self.stats["requests"], 3)
+        self.assertEqual(self.stats["waits"], 1)
+
+    def test_waits_in_flight(self):
+        async def main():
+            async with self.get_client(Pool()) as client:
+                # Connections are still being opened (HTTP/1.1)
+                async with client.stream("GET", "https://www.example.org/"):
+                    async with client.stream("GET", "https://www.example.org/"):
+                        await client.get("https://www.example.org/")
+
+        asyncio.run(main())
+        self.assertEqual(self.stats["requests"], 3)
+        self.assertEqual(self.stats["waits"], 1)
+
+    def test_get_stats(self):
+        pool = Pool()
+        pool.connections = [Connection(idle=True), Connection()]
+        pool_transport = transport.PoolTransport(
+            httpx.Limits(max_connections=2),
+            http2=False,
+            stats=self.stats,
+            pool=pool,
+        )
+        stats = pool_transport.get_stats()
+        self.assertEqual(stats["connections"], 2)
+        self.assertEqual(stats["idle_connections"], 1)
+
+    def test_error(self):
+        async def main():
+            async with self.get_client(Pool(httpcore.ConnectTimeout("foo"))) as client:
+                with self.assertRaises(httpx.ConnectTimeout):
+                    await client.get("https://www.example.org/")
+
+        asyncio.run(main())
+        self.assertEqual(self.stats["requests"], 1)
+        self.assertEqual(self.stats["in_flight"], 0)
+
+    def test_stream_error(self):
+        pool = Pool(stream_error=httpcore.ReadTimeout("foo"))
+
+        async def main():
+            async with self.get_client(pool) as client:
+                with self.assertRaises(httpx.ReadTimeout):
+                    await client.get("https://www.example.org/")
+
+        asyncio.run(main())
+        self.assertEqual(self.stats["in_flight"], 0)
+
+    def test_map_exception(self):
+        error = transport.map_exception(httpcore.ReadTimeout("foo"))
+        self.assertIsInstance(error, httpx.ReadTimeout)
+        error = ValueError()
+        self.assertIs(transport.map_exception(error), error)
+
+    def test_pool(self):
+        pool_transport = transport.PoolTransport(
+            httpx.Limits(max_connections=2),
+            http2=False,
+            stats=self.stats,
+        )
+        self.assertIsInstance(pool_transport.pool, httpcore.AsyncConnectionPool)
+        self.assertEqual(pool_transport.get_stats()["connections"], 0)
@@ -0,0 +1,74 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from asyncpg.exceptions import UndefinedTableError
+
+from ohsome_quality_analyst import oqt
+from ohsome_quality_analyst.api.request_models import ReportDatabase
+from ohsome_quality_analyst.geodatabase import client as db_client
+
+from .utils import get_geojson_fixture
+
+
+class AsyncMock(MagicMock):
+    async def __call__(self, *args, **kwargs):
+        return super().__call__(*args, **kwargs)
+
+
+def load_indicator_results_batch(indicators, *_args, **_kwargs):
+    """Results are only stored for the Mapping Saturation indicator."""
+    missing = []
+    for indicator in indicators:
+        if indicator.metadata.name == "Mapping Saturation":
+            indicator.result.class_ = 5
+        else:
+            missing.append(indicator)
+    return missing
+
+
+def run_indicator(indicator):
+    indicator.result.class_ = 1
+    return indicator
+
+
+class TestCreateReportDatabase(TestCase):
+    def setUp(self):
+        self.parameters = ReportDatabase(name="Minimal", dataset="regions", featureId=3)
+        feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.load = AsyncMock(side_effect=load_indicator_results_batch)
+        self.save = AsyncMock()
+        self.run = AsyncMock(side_effect=run_indicator)
+        for patcher in (
+            patch.object(db_client, "get_feature_from_db", AsyncMock()),
+            patch.object(db_client, "load_indicator_results_batch", self.load),
+            patch.object(db_client, "save_indicator_results", self.save),
+            patch.object(oqt, "fetch_inputs", AsyncMock()),
+            patch.object(oqt, "run_indicator", self.run),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        db_client.get_feature_from_db.return_value = feature
+
+    def test_create_report(self):
+        report = asyncio.run(oqt.create_report(self.parameters))
+        db_client.get_feature_from_db.assert_called_once()
+        self.load.assert_called_once()
+        # Only the missing indicator is created and saved
+        self.run.assert_called_once()
+        self.save.assert_called_once()
+        self.assertEqual(self.save.call_args[0][0].metadata.name, "Currentness")
+        self.assertEqual([i.result.class_ for i in report.indicators], [5, 1])
+        # Figures are not requested
+        self.assertFalse(self.load.call_args[1]["include_svg"])
+
+    def test_create_report_force(self):
+        asyncio.run(oqt.create_report(self.parameters, force=True))
+        self.load.assert_not_called()
+        self.assertEqual(self.run.call_count, 2)
+        self.assertEqual(self.save.call_count, 2)
+
+    def test_create_report_undefined_table(self):
+        self.load.side_effect = UndefinedTableError()
+        asyncio.run(oqt.create_report(self.parameters))
+        self.assertEqual(self.run.call_count, 2)
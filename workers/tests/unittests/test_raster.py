@@ -1,5 +1,7 @@
 import os
+import shutil
 import tempfile
+import threading
 import unittest
 from unittest import mock
 
@@ -85,6 +87,78 @@ class TestRaster(unittest.TestCase):
         )
         self.assertEqual(expected, result)
 
+    def test_get_dataset(self):
+        self.addCleanup(raster_client.close_datasets)
+        path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "fixtures",
+            "GHS_BUILT_R2018A-Heidelberg.tif",
+        )
+        handle = raster_client.get_dataset(path)
+        self.assertIs(raster_client.get_dataset(path), handle)
+        self.assertFalse(handle.dataset.closed)
+        self.assertEqual(handle.shape, handle.dataset.shape)
+
+    def test_get_dataset_file_changed(self):
+        self.addCleanup(raster_client.close_datasets)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "raster.tif")
+            shutil.copy(
+                os.path.join(
+                    os.path.dirname(os.path.abspath(__file__)),
+                    "fixtures",
+                    "GHS_BUILT_R2018A-Heidelberg.tif",
+                ),
+                path,
+            )
+            handle = raster_client.get_dataset(path)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertIsNot(raster_client.get_dataset(path), handle)
+            self.assertTrue(handle.dataset.closed)
+            raster_client.close_datasets()
+
+    def test_get_dataset_file_changed_read(self):
+        self.addCleanup(raster_client.close_datasets)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "raster.tif")
+            shutil.copy(
+                os.path.join(
+                    os.path.dirname(os.path.abspath(__file__)),
+                    "fixtures",
+                    "GHS_BUILT_R2018A-Heidelberg.tif",
+                ),
+                path,
+            )
+            handle = raster_client.get_dataset(path)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            # Outdated dataset is not closed while another thread reads from it
+            with handle.lock:
+                thread = threading.Thread(target=raster_client.get_dataset, args=[path])
+                thread.start()
+                thread.join(timeout=0.1)
+                self.assertTrue(thread.is_alive())
+                self.assertFalse(handle.dataset.closed)
+            thread.join()
+            self.assertTrue(handle.dataset.closed)
+            raster_client.close_datasets()
+
+    def test_get_dataset_forked(self):
+        self.addCleanup(raster_client.close_datasets)
+        path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "fixtures",
+            "GHS_BUILT_R2018A-Heidelberg.tif",
+        )
+        handle = raster_client.get_dataset(path)
+        with mock.patch("os.getpid", return_value=handle.pid + 1):
+            forked = raster_client.get_dataset(path)
+        self.assertIsNot(forked, handle)
+        # Dataset of the parent process is left untouched
+        self.assertFalse(handle.dataset.closed)
+        handle.dataset.close()
+
     def test_transform_different_crs(self):
         expected = {
             "type": "Feature",
@@ -106,6 +180,66 @@ class TestRaster(unittest.TestCase):
         self.assertDictEqual(expected, result)
         self.assertNotEqual(self.feature, result)
 
+    def test_transform_cached(self):
+        raster_client._projected.clear()
+        transformer = raster_client.get_transformer(
+            "EPSG:4326", self.raster_dataset.crs
+        )
+        with mock.patch.object(
+            transformer, "transform", wraps=transformer.transform
+        ) as transform:
+            feature = geojson.loads(geojson.dumps(self.feature))
+            result = raster_client.transform(feature, self.raster_dataset)
+            # Same geometry is projected only once
+            self.assertDictEqual(
+                raster_client.transform(dict(feature), self.raster_dataset),
+                result,
+            )
+        transform.assert_called_once()
+
+    def test_transform_mutated(self):
+        feature = geojson.loads(geojson.dumps(self.feature))
+        result = raster_client.transform(feature, self.raster_dataset)
+        # Mutated geometry is projected again
+        feature["geometry"]["coordinates"][0][0] = [13.0, 52.0]
+        mutated = raster_client.transform(feature, self.raster_dataset)
+        self.assertNotEqual(mutated, result)
+        self.assertEqual(
+            mutated["geometry"]["coordinates"][0][1],
+            result["geometry"]["coordinates"][0][1],
+        )
+
+    def test_transform_properties(self):
+        feature = geojson.Feature(
+            geometry=self.feature["geometry"], properties={"foo": {"bar": 1}}
+        )
+        result = raster_client.transform(feature, self.raster_dataset)
+        # Properties are not shared with the input
+        result["properties"]["foo"]["bar"] = 2
+        self.assertEqual(feature["properties"]["foo"]["bar"], 1)
+        # Properties of features with the same geometry are kept
+        other = geojson.Feature(geometry=self.feature["geometry"], properties={})
+        self.assertEqual(
+            raster_client.transform(other, self.raster_dataset)["properties"], {}
+        )
+
+    def test_transform_featurecollection(self):
+        featurecollection = geojson.FeatureCollection(
+            features=[self.feature, self.feature]
+        )
+        result = raster_client.transform(featurecollection, self.raster_dataset)
+        expected = raster_client.transform(self.feature, self.raster_dataset)
+        self.assertEqual(len(result["features"]), 2)
+        for feature in result["features"]:
+            self.assertDictEqual(feature, expected)
+
+    def test_get_transformer(self):
+        transformer = raster_client.get_transformer("EPSG:4326", "ESRI:54009")
+        self.assertIs(
+            raster_client.get_transformer("EPSG:4326", "ESRI:54009"),
+            transformer,
+        )
+
     def test_transform_same_crs(self):
         raster_dataset = get_raster_dataset("VNL")
         result = raster_client.transform(self.feature, raster_dataset)
@@ -0,0 +1,132 @@
+import asyncio
+from dataclasses import replace
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from geojson import Feature
+
+from ohsome_quality_analyst import oqt
+from ohsome_quality_analyst.base.layer import LayerData
+from ohsome_quality_analyst.base.requirement import Area, OhsomeQuery, ZonalStats
+from ohsome_quality_analyst.indicators.ghs_pop_comparison_buildings.indicator import (
+    GhsPopComparisonBuildings,
+)
+from ohsome_quality_analyst.indicators.minimal.indicator import Minimal
+from ohsome_quality_analyst.indicators.poi_density.indicator import PoiDensity
+
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class AsyncMock(MagicMock):
+    async def __call__(self, *args, **kwargs):
+        return super().__call__(*args, **kwargs)
+
+
+RESPONSE = {"result": [{"timestamp": "2022-12-01T00:00:00Z", "value": 42}]}
+
+
+class TestRequirement(TestCase):
+    def setUp(self):
+        self.layer = get_layer_fixture("building_count")
+
+    def test_ohsome_query_key(self):
+        # Same endpoint and filter but different layer key
+        layer = replace(self.layer, key="foo", name="Foo")
+        self.assertEqual(OhsomeQuery(self.layer).key, OhsomeQuery(layer).key)
+        self.assertNotEqual(
+            OhsomeQuery(self.layer).key,
+            OhsomeQuery(self.layer, ratio=True).key,
+        )
+        self.assertNotEqual(
+            OhsomeQuery(self.layer).key,
+            OhsomeQuery(get_layer_fixture("major_roads_length")).key,
+        )
+
+    def test_ohsome_query_key_layer_data(self):
+        layer_1 = LayerData("foo", "bar", RESPONSE)
+        layer_2 = LayerData("foo", "bar", RESPONSE)
+        self.assertEqual(OhsomeQuery(layer_1).key, OhsomeQuery(layer_1).key)
+        self.assertNotEqual(OhsomeQuery(layer_1).key, OhsomeQuery(layer_2).key)
+
+    def test_key(self):
+        self.assertEqual(Area().key, Area().key)
+        self.assertEqual(
+            ZonalStats("GHS_POP_R2019A", ("sum", "mean")).key,
+            ZonalStats("GHS_POP_R2019A", ("mean", "sum")).key,
+        )
+        self.assertNotEqual(Area().key, ZonalStats("VNL", ("sum",)).key)
+
+
+@patch("ohsome_quality_analyst.ohsome.client.query", new_callable=AsyncMock)
+class TestFetchInputs(TestCase):
+    def setUp(self):
+        self.feature = get_geojson_fixture("heidelberg-altstadt-feature.geojson")
+        self.layer = get_layer_fixture("building_count")
+
+    def test_get_inputs(self, mock_query):
+        mock_query.return_value = RESPONSE
+        indicator = Minimal(self.layer, self.feature)
+        asyncio.run(indicator.preprocess())
+        self.assertEqual(indicator.count, 42)
+        self.assertEqual(indicator.inputs, {"count": RESPONSE})
+        self.assertNotIn("inputs", indicator.data)
+        # Inputs are fetched only once
+        asyncio.run(indicator.get_inputs())
+        mock_query.assert_called_once()
+
+    def test_fetch_inputs_deduplicated(self, mock_query):
+        mock_query.return_value = RESPONSE
+        indicators = [
+            Minimal(self.layer, self.feature),
+            Minimal(self.layer, self.feature),
+            PoiDensity(self.layer, self.feature),
+        ]
+        asyncio.run(oqt.fetch_inputs(indicators))
+        mock_query.assert_called_once()
+        for indicator in indicators:
+            self.assertEqual(indicator.inputs["count"], RESPONSE)
+        self.assertIn("area", indicators[2].inputs)
+        # Preprocessing does not fetch any data
+        for indicator in indicators:
+            asyncio.run(indicator.preprocess())
+        mock_query.assert_called_once()
+
+    def test_fetch_inputs_different_features(self, mock_query):
+        mock_query.return_value = RESPONSE
+        feature = Feature(geometry={"type": "Point", "coordinates": [0, 0]})
+        indicators = [
+            Minimal(self.layer, self.feature),
+            Minimal(self.layer, feature),
+        ]
+        asyncio.run(oqt.fetch_inputs(indicators))
+        self.assertEqual(mock_query.call_count, 2)
+
+    def test_run_batched(self, mock_query):
+        mock_query.return_value = RESPONSE
+        feature = Feature(geometry={"type": "Point", "coordinates": [0, 0]})
+        for batch_size in ("1", "10"):
+            mock_query.reset_mock()
+            indicators = [
+                Minimal(self.layer, self.feature),
+                Minimal(self.layer, self.feature),
+                Minimal(self.layer, feature),
+            ]
+            with patch.dict("os.environ", {"OQT_OHSOME_BATCH_SIZE": batch_size}):
+                with patch.object(oqt, "get_snapshot", AsyncMock()):
+                    results = asyncio.run(oqt.run_batched(indicators))
+            self.assertEqual(results, indicators)
+            # Duplicated feature is queried only once
+            self.assertEqual(mock_query.call_count, 2)
+            for indicator in indicators:
+                self.assertEqual(indicator.count, 42)
+
+    def test_fetch_inputs_zonal_stats(self, mock_query):
+        mock_query.return_value = RESPONSE
+        indicator = GhsPopComparisonBuildings(self.layer, self.feature)
+        with patch(
+            "ohsome_quality_analyst.raster.client.get_zonal_stats",
+            return_value=[{"sum": 100}],
+        ) as mock_zonal_stats:
+            asyncio.run(oqt.fetch_inputs([indicator]))
+        mock_zonal_stats.assert_called_once()
+        self.assertEqual(indicator.inputs["pop_count"], [{"sum": 100}])
@@ -0,0 +1,191 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from unittest import TestCase, mock
+
+from ohsome_quality_analyst import oqt
+from ohsome_quality_analyst.geodatabase import client as db_client
+from ohsome_quality_analyst.indicators.minimal.indicator import Minimal
+from ohsome_quality_analyst.ohsome import client as ohsome_client
+from ohsome_quality_analyst.utils.revalidation import Revalidator
+
+from .utils import get_geojson_fixture, get_layer_fixture
+
+
+class TestRevalidator(TestCase):
+    def test_schedule_deduplicated(self):
+        calls = []
+
+        async def recompute(value):
+            await asyncio.sleep(0)
+            calls.append(value)
+
+        async def main():
+            revalidator = Revalidator()
+            self.assertTrue(revalidator.schedule("foo", recompute, 1))
+            self.assertFalse(revalidator.schedule("foo", recompute, 2))
+            self.assertTrue(revalidator.schedule("bar", recompute, 3))
+            await revalidator.join()
+            # Can be queued again after completion
+            self.assertTrue(revalidator.schedule("foo", recompute, 4))
+            await revalidator.join()
+            return revalidator.get_stats()
+
+        stats = asyncio.run(main())
+        self.assertEqual(calls, [1, 3, 4])
+        self.assertEqual(stats["queued"], 3)
+        self.assertEqual(stats["deduplicated"], 1)
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["pending"], 0)
+
+    def test_failure(self):
+        async def fail():
+            raise ValueError()
+
+        async def main():
+            revalidator = Revalidator()
+            revalidator.schedule("foo", fail)
+            await revalidator.join()
+            return revalidator.get_stats()
+
+        self.assertEqual(asyncio.run(main())["failed"], 1)
+
+    def test_stop(self):
+        async def main():
+            revalidator = Revalidator()
+            revalidator.schedule("foo", asyncio.sleep, 60)
+            await asyncio.sleep(0)
+            await revalidator.stop()
+            return revalidator.get_stats()
+
+        self.assertEqual(asyncio.run(main())["pending"], 0)
+
+
+class TestRevalidateOutdated(TestCase):
+    def setUp(self):
+        self.indicator = Minimal(
+            get_layer_fixture("building_count"),
+            get_geojson_fixture("heidelberg-altstadt-feature.geojson"),
+        )
+        self.indicator.result.timestamp_osm = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.revalidator = Revalidator()
+        self.recreated = []
+        self.run_indicator = oqt.run_indicator
+
+        async def get_latest_ohsome_timestamp():
+            return datetime(2022, 2, 1)
+
+        async def save_indicator_results(indicator, dataset, feature_id):
+            self.recreated.append((indicator, dataset, feature_id))
+
+        async def run_indicator(indicator):
+            return indicator
+
+        env = {"OQT_STALE_WHILE_REVALIDATE": "true"}
+        for patcher in (
+            mock.patch.dict(os.environ, env),
+            mock.patch.object(oqt, "revalidator", self.revalidator),
+            mock.patch.object(oqt, "run_indicator", run_indicator),
+            mock.patch.object(
+                ohsome_client,
+                "get_latest_ohsome_timestamp",
+                get_latest_ohsome_timestamp,
+            ),
+            mock.patch.object(
+                db_client,
+                "save_indicator_results",
+                save_indicator_results,
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def revalidate(self, indicators):
+        async def main():
+            await oqt.revalidate_outdated(indicators, "regions", "3")
+            await self.revalidator.join()
+
+        asyncio.run(main())
+
+    def test_is_outdated(self):
+        latest = datetime(2022, 2, 1)
+        self.assertTrue(oqt.is_outdated(datetime(2022, 1, 1), latest))
+        self.assertFalse(oqt.is_outdated(latest, latest))
+        self.assertFalse(oqt.is_outdated(None, latest))
+        # Results of the database are timezone aware
+        aware = datetime(2022, 2, 1, 1, tzinfo=timezone.utc)
+        self.assertFalse(oqt.is_outdated(aware, latest))
+
+    def test_revalidate_outdated(self):
+        self.revalidate([self.indicator])
+        self.assertTrue(self.indicator.result.stale)
+        self.assertEqual(len(self.recreated), 1)
+        indicator, dataset, feature_id = self.recreated[0]
+        self.assertIsNot(indicator, self.indicator)
+        self.assertEqual((dataset, feature_id), ("regions", "3"))
+
+    def test_revalidate_deduplicated(self):
+        async def main():
+            await oqt.revalidate_outdated([self.indicator], "regions", "3")
+            await oqt.revalidate_outdated([self.indicator], "regions", "3")
+            await self.revalidator.join()
+
+        asyncio.run(main())
+        self.assertEqual(len(self.recreated), 1)
+
+    def test_revalidate_up_to_date(self):
+        self.indicator.result.timestamp_osm = datetime(2022, 2, 1, tzinfo=timezone.utc)
+        self.revalidate([self.indicator])
+        self.assertFalse(self.indicator.result.stale)
+        self.assertEqual(self.recreated, [])
+
+    def test_revalidate_snapshot(self):
+        """Results are compared by data snapshot instead of timestamp of OSM data."""
+        # E.g. Last month of a time series
+        self.indicator.result.timestamp_osm = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.indicator.result.timestamp_snapshot = datetime(
+            2022, 2, 1, tzinfo=timezone.utc
+        )
+        self.revalidate([self.indicator])
+        self.assertFalse(self.indicator.result.stale)
+        self.assertEqual(self.recreated, [])
+
+    def test_revalidate_snapshot_outdated(self):
+        self.indicator.result.timestamp_osm = datetime(2021, 1, 1, tzinfo=timezone.utc)
+        self.indicator.result.timestamp_snapshot = datetime(
+            2022, 1, 1, tzinfo=timezone.utc
+        )
+        self.revalidate([self.indicator])
+        self.assertTrue(self.indicator.result.stale)
+        self.assertEqual(len(self.recreated), 1)
+
+    def test_get_snapshot(self):
+        snapshot = asyncio.run(oqt.get_snapshot())
+        self.assertEqual(snapshot, datetime(2022, 2, 1, tzinfo=timezone.utc))
+
+    def test_run_indicator_snapshot(self):
+        """Snapshot is recorded even if outdated results are not recomputed."""
+        patcher = mock.patch.object(self.indicator, "preprocess", mock.AsyncMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ("calculate", "create_figure", "create_html"):
+            patcher = mock.patch.object(self.indicator, name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        with mock.patch.dict(os.environ, {"OQT_STALE_WHILE_REVALIDATE": "false"}):
+            asyncio.run(self.run_indicator(self.indicator))
+        self.assertEqual(
+            self.indicator.result.timestamp_snapshot,
+            datetime(2022, 2, 1, tzinfo=timezone.utc),
+        )
+
+    def test_snapshot_not_in_feature(self):
+        self.indicator.result.timestamp_snapshot = datetime(2022, 2, 1)
+        feature = self.indicator.as_feature()
+        self.assertNotIn("timestamp_snapshot", feature["properties"]["result"])
+
+    def test_revalidate_disabled(self):
+        with mock.patch.dict(os.environ, {"OQT_STALE_WHILE_REVALIDATE": "false"}):
+            self.revalidate([self.indicator])
+        self.assertFalse(self.indicator.result.stale)
+        self.assertEqual(self.recreated, [])
@@ -0,0 +1,105 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from unittest import TestCase, mock
+
+from geojson import Feature, FeatureCollection
+from shapely import wkb
+from shapely.geometry import box, mapping
+
+from ohsome_quality_analyst.geodatabase import client as db_client
+from ohsome_quality_analyst.geodatabase import shdi_index
+
+
+class FakeConnection:
+    def __init__(self, records: list) -> None:
+        self.records = records
+        self.queries = []
+
+    async def fetch(self, query: str, *_args) -> list:
+        self.queries.append(query)
+        return self.records
+
+
+class TestShdiIndex(TestCase):
+    def setUp(self):
+        # Two adjacent GDL regions
+        self.index = shdi_index.ShdiIndex(
+            geometries=[box(0, 0, 10, 10), box(10, 0, 20, 10)],
+            values=[0.4, 0.8],
+        )
+
+    def test_within(self):
+        records = self.index.get_shdi([box(1, 1, 2, 2)])
+        self.assertEqual(records, [{"shdi": 0.4, "rownumber": 1}])
+
+    def test_intersecting_multiple_regions(self):
+        # Equal shares of both regions. Only the northern half intersects with them.
+        records = self.index.get_shdi([box(9, -1, 11, 1)])
+        self.assertEqual(len(records), 1)
+        self.assertAlmostEqual(records[0]["shdi"], (0.4 + 0.8) / 4, places=4)
+
+    def test_not_intersecting(self):
+        records = self.index.get_shdi([box(30, 30, 31, 31), box(1, 1, 2, 2)])
+        self.assertEqual(records, [{"shdi": 0.4, "rownumber": 2}])
+
+    def test_empty(self):
+        self.assertEqual(self.index.get_shdi([box(30, 30, 31, 31)]), [])
+
+
+class TestGetShdi(TestCase):
+    def setUp(self):
+        self.conn = FakeConnection(
+            [
+                {"shdi": 0.4, "geom": wkb.dumps(box(0, 0, 10, 10))},
+                {"shdi": 0.8, "geom": wkb.dumps(box(10, 0, 20, 10))},
+            ]
+        )
+        self.featurecollection = FeatureCollection(
+            features=[
+                Feature(geometry=mapping(box(1, 1, 2, 2))),
+                Feature(geometry=mapping(box(11, 1, 12, 2))),
+            ]
+        )
+
+        @asynccontextmanager
+        async def get_connection():
+            yield self.conn
+
+        for patcher in (
+            mock.patch.dict(os.environ, {"OQT_SHDI_INDEX": "true"}),
+            mock.patch.object(db_client, "get_connection", get_connection),
+            mock.patch.object(shdi_index, "_index", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_get_shdi(self):
+        async def main():
+            first = await shdi_index.get_shdi(self.featurecollection)
+            second = await shdi_index.get_shdi(self.featurecollection["features"][1])
+            return first, second
+
+        first, second = asyncio.run(main())
+        self.assertEqual(
+            first,
+            [{"shdi": 0.4, "rownumber": 1}, {"shdi": 0.8, "rownumber": 2}],
+        )
+        self.assertEqual(second, [{"shdi": 0.8, "rownumber": 1}])
+        # Index is loaded once
+        self.assertEqual(len(self.conn.queries), 1)
+
+    def test_get_shdi_disabled(self):
+        async def get_shdi(bpoly):
+            return [{"shdi": 0.5, "rownumber": 1}]
+
+        with mock.patch.dict(os.environ, {"OQT_SHDI_INDEX": "false"}):
+            with mock.patch.object(db_client, "get_shdi", get_shdi):
+                result = asyncio.run(shdi_index.get_shdi(self.featurecollection))
+        self.assertEqual(result, [{"shdi": 0.5, "rownumber": 1}])
+        self.assertEqual(self.conn.queries, [])
+
+    def test_get_shdi_type_error(self):
+        geometry = self.featurecollection["features"][0].geometry
+        with self.assertRaises(TypeError):
+            asyncio.run(shdi_index.get_shdi(geometry))